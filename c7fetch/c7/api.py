@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import threading
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional
 
 import requests
 
+from c7fetch.c7 import offline, ratelimit, remote
 from c7fetch.cli import settings
 
 BASE_URL = "https://context7.com/api/v1"
 _TIMEOUT = 30
-_global_last_request_ts: float = 0.0
+# Limiter name shared by every process using the single configured key.
+_DEFAULT_SLOT = "default"
+_session = requests.Session()
 
 
 class ApiError(Exception):
@@ -30,28 +36,71 @@ class HttpError(ApiError):
     pass
 
 
+class OfflineMiss(ApiError):
+    """Raised in offline mode when the response store has no answer for a request."""
+
+
 @dataclass
 class FetchResponse:
     payload: Any
     content_type: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # True when a conditional fetch was answered with 304; ``payload`` is then None.
+    not_modified: bool = False
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _SingleFlight:
+    """Collapse concurrent calls with the same key into one; every waiter gets its outcome."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
 
 
-def _rate_limit_delay() -> None:
-    global _global_last_request_ts
+_in_flight = _SingleFlight()
+
+
+def _request_delay_seconds() -> float:
     delay_ms = settings.get_setting("request_delay")
     try:
-        delay_seconds = max(int(delay_ms), 0) / 1000.0
+        return max(int(delay_ms), 0) / 1000.0
     except (TypeError, ValueError):
-        delay_seconds = 0.0
+        return 0.0
 
-    if delay_seconds <= 0:
-        return
 
-    now = time.monotonic()
-    elapsed = now - _global_last_request_ts if _global_last_request_ts else None
-    if elapsed is not None and elapsed < delay_seconds:
-        time.sleep(delay_seconds - elapsed)
-    _global_last_request_ts = time.monotonic()
+def _rate_limit_delay() -> None:
+    """Wait for this request's turn in the host-wide ``request_delay`` schedule."""
+    ratelimit.wait_for_slot(_DEFAULT_SLOT, _request_delay_seconds())
 
 
 def _resolve_api_key() -> str:
@@ -66,8 +115,122 @@ def _resolve_api_key() -> str:
     raise MissingApiKey("Context7 API key is not configured. Use config set or environment variable.")
 
 
+# Used when a 429 response carries no usable Retry-After header.
+_DEFAULT_COOLDOWN = 30.0
+# A Retry-After of 0 (or a date in the past) must not let a throttled key be retried in a tight loop.
+_MIN_COOLDOWN = 1.0
+# Pooled requests give up after this many tries per key instead of rotating forever.
+_MAX_ATTEMPTS_PER_KEY = 2
+
+
+@dataclass
+class _KeyState:
+    key: str
+    next_slot: float = 0.0
+    cooldown_until: float = 0.0
+    dropped: bool = False
+
+    @property
+    def ready_at(self) -> float:
+        return max(self.next_slot, self.cooldown_until)
+
+
+class _KeyPool:
+    """Spreads requests over several API keys, each with its own (host-wide) request_delay and 429 cooldown.
+
+    ``acquire`` reserves the earliest free slot across live keys under the lock and
+    sleeps outside it, so concurrent callers queue on different keys.
+    """
+
+    def __init__(self, keys: List[str]):
+        self.keys = tuple(keys)
+        self._states = [_KeyState(key) for key in keys]
+        self._lock = threading.Lock()
+
+    def acquire(self, delay: float) -> str:
+        with self._lock:
+            live = [state for state in self._states if not state.dropped]
+            if not live:
+                raise MissingApiKey("Every key in apikey_pool was rejected by Context7 (401 Unauthorized).")
+            now = time.time()
+            state = min(live, key=lambda s: s.ready_at)
+            if state.cooldown_until > now:
+                raise HttpError(
+                    "Context7 API rate limit reached (429) on every pooled key. Retry after a delay.", status=429
+                )
+            # Other processes using the same key share its slots through the host-wide limiter.
+            start = ratelimit.reserve(_key_slot(state.key), delay) if delay > 0 else now
+            state.next_slot = start + delay
+        if start > now:
+            time.sleep(start - now)
+        return state.key
+
+    def cooldown(self, key: str, seconds: float) -> None:
+        with self._lock:
+            for state in self._states:
+                if state.key == key:
+                    state.cooldown_until = max(state.cooldown_until, time.time() + seconds)
+
+    def drop(self, key: str) -> None:
+        with self._lock:
+            for state in self._states:
+                if state.key == key:
+                    state.dropped = True
+
+
+def _key_slot(key: str) -> str:
+    return "key:" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+_key_pool: Optional[_KeyPool] = None
+_key_pool_lock = threading.Lock()
+
+
+def _pool_keys() -> List[str]:
+    """Keys from ``apikey_pool``: comma separated, ``env:NAME`` entries are read from the environment."""
+    keys: List[str] = []
+    for entry in (settings.get_setting("apikey_pool") or "").split(","):
+        entry = entry.strip()
+        if entry.startswith("env:"):
+            entry = os.getenv(entry[4:], "").strip()
+        if entry and entry not in keys:
+            keys.append(entry)
+    return keys
+
+
+def _active_pool() -> Optional[_KeyPool]:
+    """Return the shared pool for the configured keys (rebuilt when the setting changes), or None."""
+    global _key_pool
+    keys = _pool_keys()
+    if not keys:
+        return None
+    with _key_pool_lock:
+        if _key_pool is None or _key_pool.keys != tuple(keys):
+            _key_pool = _KeyPool(keys)
+        return _key_pool
+
+
+def _retry_after(response: requests.Response) -> float:
+    """Seconds to rest a throttled key: Retry-After as seconds or an HTTP date, at least ``_MIN_COOLDOWN``."""
+    raw = response.headers.get("Retry-After", "").strip()
+    try:
+        seconds = float(raw)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(raw).timestamp() - time.time()
+        except (TypeError, ValueError):
+            seconds = _DEFAULT_COOLDOWN
+    return max(seconds, _MIN_COOLDOWN)
+
+
 def is_api_key_configured() -> bool:
-    """Return True if an API key is discoverable via config or environment."""
+    """Return True if an API key is discoverable via config or environment.
+
+    When requests are forwarded to a ``c7fetch serve`` daemon, the daemon's key is used; offline
+    mode needs no key at all.
+    """
+    if offline.is_enabled() or remote.server_url() or _pool_keys():
+        return True
     env_var = settings.get_setting("apikey_env")
     if env_var:
         candidate = os.getenv(env_var)
@@ -77,9 +240,9 @@ def is_api_key_configured() -> bool:
     return bool(key)
 
 
-def _base_headers() -> Dict[str, str]:
+def _base_headers(api_key: str) -> Dict[str, str]:
     headers = {
-        "Authorization": f"Bearer {_resolve_api_key()}",
+        "Authorization": f"Bearer {api_key}",
         "User-Agent": settings.get_setting("user_agent") or "c7fetch/0.0.0",
     }
     return headers
@@ -90,15 +253,49 @@ def _request(
     *,
     params: Optional[Dict[str, Any]] = None,
     accept: str = "application/json",
+    conditional: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """GET ``path``; identical requests already in flight share a single upstream call."""
+    key = (path, tuple(sorted((params or {}).items())), accept, tuple(sorted((conditional or {}).items())))
+    return _in_flight.do(key, lambda: _send_request(path, params=params, accept=accept, conditional=conditional))
+
+
+def _send_request(
+    path: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    accept: str = "application/json",
+    conditional: Optional[Dict[str, str]] = None,
 ) -> requests.Response:
-    _rate_limit_delay()
     url = f"{BASE_URL}/{path.lstrip('/')}"
-    headers = _base_headers()
-    headers["Accept"] = accept
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=_TIMEOUT)
-    except requests.RequestException as exc:
-        raise ApiError(f"Failed to call Context7 API: {exc}") from exc
+    pool = _active_pool()
+    attempts = 0
+    while True:
+        attempts += 1
+        if pool is not None:
+            api_key = pool.acquire(_request_delay_seconds())
+        else:
+            _rate_limit_delay()
+            api_key = _resolve_api_key()
+        headers = _base_headers(api_key)
+        headers["Accept"] = accept
+        headers.update(conditional or {})
+        try:
+            response = _session.get(url, params=params, headers=headers, timeout=_TIMEOUT)
+        except requests.RequestException as exc:
+            raise ApiError(f"Failed to call Context7 API: {exc}") from exc
+        # With a key pool, a rejected or throttled key is set aside and the request retried on another.
+        if pool is None or response.status_code not in (401, 429):
+            break
+        if response.status_code == 401:
+            pool.drop(api_key)
+        else:
+            pool.cooldown(api_key, _retry_after(response))
+        if attempts >= _MAX_ATTEMPTS_PER_KEY * len(pool.keys):
+            raise HttpError(
+                f"Context7 API kept answering {response.status_code} after {attempts} attempts over apikey_pool.",
+                status=response.status_code,
+            )
 
     if response.status_code == 401:
         raise MissingApiKey("Context7 API rejected credentials (401 Unauthorized).")
@@ -113,10 +310,35 @@ def _request(
     return response
 
 
-def search(query: str) -> Dict[str, Any]:
-    """Execute a search request against Context7."""
+def _forward(endpoint: str, params: Dict[str, Any]) -> Any:
+    try:
+        return remote.get(endpoint, params)
+    except remote.RemoteError as exc:
+        if exc.status == 401:
+            raise MissingApiKey(str(exc)) from exc
+        if exc.status is not None:
+            raise HttpError(str(exc), status=exc.status) from exc
+        raise ApiError(str(exc)) from exc
+
+
+def _offline_lookup(kind: str, key: str, label: str) -> offline.StoredResponse:
+    stored = offline.lookup(kind, key)
+    if stored is None:
+        raise OfflineMiss(f"Offline mode: no stored response for {label}; run `c7fetch warm` first.")
+    return stored
+
+
+def search(query: str, *, forward: bool = True) -> Dict[str, Any]:
+    """Execute a search request against Context7.
+
+    With ``forward`` (the default) the request goes through a configured ``c7fetch serve`` daemon.
+    """
     if not query:
         raise ValueError("Query must not be empty.")
+    if offline.is_enabled():
+        return _offline_lookup("search", offline.search_key(query), f"search {query!r}").body
+    if forward and remote.server_url():
+        return _forward("search", {"query": query})
     response = _request("search", params={"query": query})
     try:
         return response.json()
@@ -130,7 +352,15 @@ def fetch(
     tokens: Optional[int] = None,
     format: str = "text",
     topic: Optional[str] = None,
+    forward: bool = True,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
 ) -> FetchResponse:
+    """Fetch a library's documentation.
+
+    ``etag``/``last_modified`` from an earlier response make the request conditional; an
+    unchanged document then comes back as ``FetchResponse(not_modified=True)`` without a body.
+    """
     if not library_id:
         raise ValueError("library_id must not be empty.")
 
@@ -143,13 +373,39 @@ def fetch(
     if topic:
         params["topic"] = topic
 
+    if offline.is_enabled():
+        stored = _offline_lookup("fetch", offline.fetch_key(library_id, format, topic), f"fetch {library_id}")
+        return FetchResponse(payload=stored.body, content_type=stored.content_type)
+
+    if forward and remote.server_url():
+        body = _forward("fetch", {"library_id": library_id, **params, "etag": etag, "last_modified": last_modified})
+        return FetchResponse(
+            payload=body["payload"],
+            content_type=body["content_type"],
+            etag=body.get("etag"),
+            last_modified=body.get("last_modified"),
+            not_modified=bool(body.get("not_modified")),
+        )
+
+    conditional: Dict[str, str] = {}
+    if etag:
+        conditional["If-None-Match"] = etag
+    if last_modified:
+        conditional["If-Modified-Since"] = last_modified
+
     accept = "application/json" if format == "json" else "text/markdown"
-    response = _request(library_id, params=params, accept=accept)
+    response = _request(library_id, params=params, accept=accept, conditional=conditional)
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
 
+    if response.status_code == 304:
+        return FetchResponse(payload=None, content_type=accept, not_modified=True, **validators)
     if format == "json":
         try:
             payload = response.json()
         except ValueError as exc:
             raise ApiError("Context7 API returned invalid JSON for fetch response.") from exc
-        return FetchResponse(payload=payload, content_type="application/json")
-    return FetchResponse(payload=response.text, content_type="text/markdown")
+        return FetchResponse(payload=payload, content_type="application/json", **validators)
+    return FetchResponse(payload=response.text, content_type="text/markdown", **validators)
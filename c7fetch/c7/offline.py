@@ -0,0 +1,130 @@
+"""Local response store used by ``c7fetch warm`` and served from in ``--offline`` mode."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from c7fetch.cli import settings
+
+STORE_FILENAME = "responses.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    tokens INTEGER,
+    stored_at REAL NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+# Set by the global ``--offline`` flag; None defers to the ``offline`` setting.
+_forced: Optional[bool] = None
+# Stores opened by lookup(), kept for the life of the process.
+_open_stores: Dict[Path, "ResponseStore"] = {}
+_open_lock = threading.Lock()
+
+
+class StoreError(Exception):
+    """Raised when the response store cannot be opened."""
+
+
+@dataclass
+class StoredResponse:
+    body: Any
+    content_type: str
+    tokens: Optional[int]
+    stored_at: float
+
+
+def set_offline(value: Optional[bool]) -> None:
+    global _forced
+    _forced = value
+
+
+def is_enabled() -> bool:
+    if _forced is not None:
+        return _forced
+    return settings.get_setting("offline").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def store_path() -> Path:
+    configured = settings.get_setting("response_store")
+    if configured:
+        return Path(configured).expanduser()
+    return Path(settings.CONFIG_DIR) / STORE_FILENAME
+
+
+def search_key(query: str) -> str:
+    return query
+
+
+def fetch_key(library_id: str, fmt: str, topic: Optional[str]) -> str:
+    # Token budgets are deliberately not part of the key: a warmed document answers any budget.
+    return f"{library_id}|{fmt}|{topic or ''}"
+
+
+class ResponseStore:
+    def __init__(self, path: Path, *, shared: bool = False):
+        """Open ``path``; a ``shared`` store may be used from any thread, one call at a time."""
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=not shared)
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.Error as exc:
+            raise StoreError(f"Unable to open response store {path}: {exc}") from exc
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ResponseStore":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def put(self, kind: str, key: str, body: Any, content_type: str, tokens: Optional[int] = None) -> None:
+        encoded = json.dumps(body) if content_type == "application/json" else str(body)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (kind, key, content_type, tokens, stored_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, content_type, tokens, time.time(), encoded),
+            )
+
+    def get(self, kind: str, key: str) -> Optional[StoredResponse]:
+        row = self._conn.execute(
+            "SELECT body, content_type, tokens, stored_at FROM responses WHERE kind = ? AND key = ?",
+            (kind, key),
+        ).fetchone()
+        if row is None:
+            return None
+        body = json.loads(row[0]) if row[1] == "application/json" else row[0]
+        return StoredResponse(body=body, content_type=row[1], tokens=row[2], stored_at=row[3])
+
+    def count(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0])
+
+
+def lookup(kind: str, key: str) -> Optional[StoredResponse]:
+    """Read one response from the configured store; a missing store is a miss.
+
+    The store stays open for the rest of the process, so each offline request costs one query.
+    """
+    path = store_path()
+    with _open_lock:
+        store = _open_stores.get(path)
+        if store is None:
+            if not path.exists():
+                return None
+            store = _open_stores[path] = ResponseStore(path, shared=True)
+        return store.get(kind, key)
@@ -0,0 +1,84 @@
+"""Host-wide request slots shared by every c7fetch process through a locked file under CONFIG_DIR.
+
+Each caller takes the next free slot for a limiter name under an exclusive ``flock``
+and then sleeps outside the lock until its slot starts, so concurrent processes
+queue up exactly ``delay`` apart instead of each assuming the full budget.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from c7fetch.cli import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+STATE_FILENAME = "rate_limit.json"
+
+# Reservations further out than this are assumed to come from a clock jump and are ignored.
+_MAX_AHEAD = 3600.0
+# Slots that ended this long ago are pruned from the state file.
+_STALE_AFTER = 60.0
+
+# Fallback when file locking is unavailable: slots are only shared within this process.
+_local_lock = threading.Lock()
+_local_slots: Dict[str, float] = {}
+
+
+def state_path() -> Path:
+    return Path(settings.CONFIG_DIR) / STATE_FILENAME
+
+
+def _take_slot(slots: Dict[str, float], name: str, delay: float, now: float) -> float:
+    next_slot = slots.get(name, 0.0)
+    if next_slot > now + _MAX_AHEAD:
+        next_slot = 0.0
+    start = max(now, next_slot)
+    slots[name] = start + delay
+    return start
+
+
+def reserve(name: str, delay: float, path: Optional[Path] = None) -> float:
+    """Reserve the next ``delay``-spaced slot for ``name`` and return its start (``time.time()`` based)."""
+    now = time.time()
+    if fcntl is None:
+        with _local_lock:
+            return _take_slot(_local_slots, name, delay, now)
+    target = path or state_path()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # The in-process lock keeps threads from contending on flock, which is per open file.
+    with _local_lock, open(target, "a+", encoding="utf-8") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            handle.seek(0)
+            try:
+                slots = {k: float(v) for k, v in json.loads(handle.read() or "{}").items()}
+            except (ValueError, TypeError, AttributeError):
+                slots = {}
+            now = time.time()
+            start = _take_slot(slots, name, delay, now)
+            slots = {k: v for k, v in slots.items() if v >= now - _STALE_AFTER}
+            handle.seek(0)
+            handle.truncate()
+            handle.write(json.dumps(slots))
+            handle.flush()
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+    return start
+
+
+def wait_for_slot(name: str, delay: float) -> None:
+    """Block until this caller's host-wide slot for ``name`` begins."""
+    if delay <= 0:
+        return
+    start = reserve(name, delay)
+    remaining = start - time.time()
+    if remaining > 0:
+        time.sleep(remaining)
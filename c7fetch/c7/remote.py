@@ -0,0 +1,71 @@
+"""Client side of ``c7fetch serve``: forwards requests to a running daemon."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from c7fetch.cli import settings
+
+_TIMEOUT = 120
+_session = requests.Session()
+
+TOKEN_FILENAME = "serve_token"
+TOKEN_HEADER = "X-C7fetch-Token"
+
+
+class RemoteError(Exception):
+    """Raised when the daemon cannot be reached or answers with an error."""
+
+    def __init__(self, message: str, *, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def server_url() -> Optional[str]:
+    value = settings.get_setting("server_url")
+    return value.rstrip("/") if value else None
+
+
+def token_path(port: int) -> Path:
+    """Where the daemon on ``port`` publishes its access token (readable by the owning user only)."""
+    return Path(settings.CONFIG_DIR) / f"{TOKEN_FILENAME}.{port}"
+
+
+def access_token() -> Optional[str]:
+    configured = settings.get_setting("server_token")
+    if configured:
+        return configured
+    base = server_url()
+    if base is None:
+        return None
+    try:
+        port = urlsplit(base).port or 80
+        return token_path(port).read_text(encoding="utf-8").strip() or None
+    except (OSError, ValueError):
+        return None
+
+
+def get(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """GET ``endpoint`` from the daemon and return its decoded JSON body."""
+    base = server_url()
+    if base is None:
+        raise RemoteError("No c7fetch server configured (set server_url).")
+    query = {k: v for k, v in (params or {}).items() if v is not None}
+    token = access_token()
+    headers = {TOKEN_HEADER: token} if token else {}
+    try:
+        response = _session.get(f"{base}/{endpoint.lstrip('/')}", params=query, headers=headers, timeout=_TIMEOUT)
+    except requests.RequestException as exc:
+        raise RemoteError(f"Failed to reach c7fetch server at {base}: {exc}") from exc
+    try:
+        body = response.json()
+    except ValueError as exc:
+        raise RemoteError(f"c7fetch server returned invalid JSON (status {response.status_code}).") from exc
+    if not response.ok:
+        message = body.get("error") if isinstance(body, dict) else None
+        raise RemoteError(message or f"c7fetch server error {response.status_code}", status=response.status_code)
+    return body
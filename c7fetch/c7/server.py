@@ -0,0 +1,255 @@
+"""Local HTTP daemon that keeps the API session, rate limiter and caches warm.
+
+Every request must carry the token the daemon writes (mode 0600) to ``remote.token_path(port)``,
+so only the owning user can spend the API key. Each port gets its own token file, removed
+when the daemon closes, so daemons on different ports never lock out each other's clients.
+Browsers are kept out as well: requests with an ``Origin`` header are refused, and a loopback
+daemon only answers loopback ``Host`` names, which defeats DNS rebinding.
+"""
+
+from __future__ import annotations
+
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from c7fetch.c7 import api, remote
+from c7fetch.cli import common
+from c7fetch.store import search_results
+
+Route = Callable[[Dict[str, str]], Any]
+
+
+class ResponseCache:
+    """Thread-safe TTL cache of endpoint responses, bounded by entry count and encoded size.
+
+    Expired entries are dropped on every write; beyond the bounds the least recently
+    used entries go first.
+    """
+
+    def __init__(self, ttl: float, *, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[Tuple[str, Tuple[Tuple[str, str], ...]], Tuple[float, int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, endpoint: str, params: Dict[str, str], compute: Callable[[], Any]) -> Any:
+        if self.ttl <= 0:
+            return compute()
+        key = (endpoint, tuple(sorted(params.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[2]
+        value = compute()
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (now + self.ttl, size, value)
+            self.size += size
+            self._evict(now)
+        return value
+
+    def _discard(self, key: Tuple[str, Tuple[Tuple[str, str], ...]]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def _evict(self, now: float) -> None:
+        for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+            self._discard(key)
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+
+
+def is_loopback(host: str) -> bool:
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def issue_token(port: int) -> str:
+    """Create a fresh access token for the daemon bound to ``port`` where only the current user can read it.
+
+    Binding the port proves no other daemon owns it, so an existing file is a leftover to replace.
+    """
+    token = secrets.token_urlsafe(32)
+    path = remote.token_path(port)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        handle.write(token)
+    return token
+
+
+class DocServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        *,
+        cache_ttl: float = 300.0,
+        verbose: bool = False,
+    ):
+        super().__init__(address, _Handler)
+        self.token = issue_token(self.port)
+        self.verbose = verbose
+        self.local_only = is_loopback(address[0])
+        self.cache = ResponseCache(cache_ttl)
+        self.catalog = search_results.Catalog()
+        self._catalog_lock = threading.Lock()
+        self.routes: Dict[str, Route] = {
+            "/health": lambda _params: {"status": "ok"},
+            "/search": self._search,
+            "/fetch": self._fetch,
+            "/review": self._review,
+        }
+
+    def rejection(self, headers: Any) -> Optional[Tuple[int, str]]:
+        """Return ``(status, reason)`` when a request must not be served."""
+        if headers.get("Origin") is not None:
+            return HTTPStatus.FORBIDDEN, "Cross-origin requests are not allowed."
+        if self.local_only:
+            hostname = urlsplit(f"//{headers.get('Host', '')}").hostname or ""
+            if not is_loopback(hostname):
+                return HTTPStatus.FORBIDDEN, f"Host {hostname!r} is not a loopback name."
+        # http.server decodes headers as latin-1; compare bytes so any value is simply a mismatch.
+        presented = headers.get(remote.TOKEN_HEADER, "").encode("latin-1", "replace")
+        if not hmac.compare_digest(presented, self.token.encode("ascii")):
+            return (
+                HTTPStatus.UNAUTHORIZED,
+                f"Missing or wrong {remote.TOKEN_HEADER}; see {remote.token_path(self.port)}.",
+            )
+        return None
+
+    def server_close(self) -> None:
+        super().server_close()
+        path = remote.token_path(self.port)
+        try:
+            if path.read_text(encoding="utf-8") == self.token:
+                path.unlink()
+        except OSError:
+            pass
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.port}"
+
+    def _search(self, params: Dict[str, str]) -> Any:
+        query = params.get("query", "")
+        return self.cache.get_or_compute("search", params, lambda: api.search(query, forward=False))
+
+    def _fetch(self, params: Dict[str, str]) -> Any:
+        def compute() -> Dict[str, Any]:
+            tokens = params.get("tokens")
+            response = api.fetch(
+                params.get("library_id", ""),
+                tokens=int(tokens) if tokens else None,
+                format=params.get("type", "text"),
+                topic=params.get("topic"),
+                forward=False,
+                etag=params.get("etag"),
+                last_modified=params.get("last_modified"),
+            )
+            return {
+                "payload": response.payload,
+                "content_type": response.content_type,
+                "etag": response.etag,
+                "last_modified": response.last_modified,
+                "not_modified": response.not_modified,
+            }
+
+        return self.cache.get_or_compute("fetch", params, compute)
+
+    def _review(self, params: Dict[str, str]) -> Any:
+        filters = search_results.Filters(
+            library=params.get("library"),
+            title=params.get("title"),
+            description=params.get("description"),
+        )
+        with self._catalog_lock:
+            self.catalog.refresh(search_results.list_directory(common.config_path("search_dir")))
+            parsed_files = self.catalog.parsed()
+        return {"files": [{"path": str(parsed.path), "results": parsed.matching(filters)} for parsed in parsed_files]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: DocServer
+
+    def do_GET(self) -> None:
+        rejected = self.server.rejection(self.headers)
+        if rejected is not None:
+            self._send(rejected[0], {"error": rejected[1]})
+            return
+        parts = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        route = self.server.routes.get(parts.path)
+        if route is None:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint {parts.path}"})
+            return
+        try:
+            body = route(params)
+        except api.MissingApiKey as exc:
+            self._send(HTTPStatus.UNAUTHORIZED, {"error": str(exc)})
+        except api.ApiError as exc:
+            self._send(exc.status or HTTPStatus.BAD_GATEWAY, {"error": str(exc)})
+        except ValueError as exc:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+        else:
+            self._send(HTTPStatus.OK, body)
+
+    def _send(self, status: int, body: Any) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(
+    host: str,
+    port: int,
+    *,
+    cache_ttl: float = 300.0,
+    verbose: bool = False,
+    allow_remote: bool = False,
+) -> DocServer:
+    """Bind a daemon; the requests it serves always go straight to Context7.
+
+    Binding a non-loopback interface is refused unless ``allow_remote`` is set.
+    """
+    if not allow_remote and not is_loopback(host):
+        raise ValueError(f"Refusing to listen on non-loopback host {host!r} without allow_remote.")
+    return DocServer((host, port), cache_ttl=cache_ttl, verbose=verbose)
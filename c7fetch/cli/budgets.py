@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import common, settings
+
+_FILENAME = "token_budgets.json"
+
+
+def budgets_path() -> Path:
+    return Path(settings.CONFIG_DIR) / _FILENAME
+
+
+def budget_key(library_id: str, topic: Optional[str]) -> str:
+    return f"{library_id}#{topic}" if topic else library_id
+
+
+def load_budgets() -> Dict[str, int]:
+    """Return recorded adaptive token budgets keyed by ``budget_key``."""
+    path = budgets_path()
+    if not path.exists():
+        return {}
+    try:
+        data = common.load_json(path)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(k): int(v) for k, v in data.items() if isinstance(v, int)}
+
+
+def record_budgets(updates: Dict[str, int]) -> None:
+    if not updates:
+        return
+    budgets = load_budgets()
+    budgets.update(updates)
+    common.write_json(budgets_path(), budgets)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import re
 from pathlib import Path
 from typing import Any, Iterable, List, Optional
 import typing
@@ -9,6 +10,7 @@ from pathvalidate import sanitize_filename
 
 from . import settings
 
+_QUERY_SPLIT = re.compile(r"\|")
 _TRUE_VALUES = {"1", "true", "yes", "on"}
 _FALSE_VALUES = {"0", "false", "no", "off"}
 
@@ -20,6 +22,13 @@ def config_path(key: str) -> Path:
     return path if path.is_absolute() else Path.cwd() / path
 
 
+def resolve_output_dir(output_dir: Optional[Path]) -> Path:
+    """Return an explicit ``--output-dir``, or the configured output_dir."""
+    if output_dir is not None:
+        return output_dir
+    return config_path("output_dir")
+
+
 def parse_bool(value: typing.Optional[str | bool]) -> bool:
     if isinstance(value, bool):
         return value
@@ -40,28 +49,41 @@ def should_overwrite() -> bool:
     return not no_overwrite
 
 
-def default_token_count() -> int:
-    value = settings.get_setting("token_count")
+def int_setting(key: str, fallback: int) -> int:
+    value = settings.get_setting(key)
     try:
         return int(value)
     except (TypeError, ValueError):
-        return 10000
+        return fallback
+
+
+def default_token_count() -> int:
+    return int_setting("token_count", 10000)
+
+
+def normalize_queries(raw: str) -> List[str]:
+    """Split a ``|``-separated query argument into its stripped, non-empty queries."""
+    queries = [part.strip() for part in _QUERY_SPLIT.split(raw)]
+    return [q for q in queries if q]
 
 
 def ensure_directory(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
+def sanitize_segment(part: str) -> str:
+    # Break into multiple statements for readability
+    sanitized = sanitize_filename(part, replacement_text="_")
+    sanitized = sanitized.replace(" ", "_")
+    return sanitized.strip("._")
+
+
 def auto_filename(parts: Iterable[Optional[str]], extension: str) -> str:
     segments: List[str] = []
     for part in parts:
         if not part:
             continue
-        # Break into multiple statements for readability
-        part_str = str(part)
-        sanitized = sanitize_filename(part_str, replacement_text="_")
-        sanitized = sanitized.replace(" ", "_")
-        sanitized = sanitized.strip("._")
+        sanitized = sanitize_segment(str(part))
         if sanitized:
             segments.append(sanitized)
     stem = "_".join(segments) if segments else "output"
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Optional
 
@@ -7,54 +8,95 @@ import rich
 import typer
 
 from c7fetch.c7 import api
+from c7fetch.store import search_results
 
-from . import common, typer_util
+from . import budgets, common, fetching, probe, scheduling, settings, typer_util
 
 app = typer_util.TyperAlias(module=__name__)
 
 
-def _resolve_base_dir(output_dir: Optional[Path]) -> Path:
-    if output_dir is not None:
-        return output_dir
-    return common.config_path("output_dir")
+def _estimated_tokens(catalog: dict, job: fetching.FetchJob) -> int:
+    total = catalog.get(job.library_id, {}).get("totalTokens")
+    if isinstance(total, int) and total > 0:
+        return min(job.tokens, total)
+    return job.tokens
 
 
-def _should_overwrite(override: Optional[bool]) -> bool:
-    if override is not None:
-        return override
-    return common.should_overwrite()
+def _load_catalog() -> dict:
+    search_files = search_results.list_directory(common.config_path("search_dir"))
+    return search_results.load_catalog(search_files, search_results.default_cache())
 
 
-def _extension(fmt: str) -> str:
-    return "md" if fmt == "text" else "json"
+def _schedule_jobs(
+    fetch_jobs: List[fetching.FetchJob], priorities: Optional[List[str]], catalog: dict
+) -> List[fetching.FetchJob]:
+    """Order jobs by priority, then fair-share across orgs, smallest estimated budget first."""
+    try:
+        rules = scheduling.parse_priorities(priorities)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from None
+    return scheduling.schedule(
+        fetch_jobs,
+        priority=lambda job: scheduling.priority_for(job.library_id, rules),
+        size=lambda job: _estimated_tokens(catalog, job),
+        group=lambda job: scheduling.namespace(job.library_id),
+    )
 
 
-def _write_payload(path: Path, payload: api.FetchResponse, overwrite: bool) -> None:
-    if path.exists() and not overwrite:
-        rich.print(f"Skipping existing file: {path}")
-        return
-    common.ensure_directory(path.parent)
-    if payload.content_type == "application/json":
-        common.write_json(path, payload.payload)
-    else:
-        path.write_text(str(payload.payload), encoding="utf-8")
-    rich.print(f"Saved fetched content to {path}")
+def _probe_jobs(
+    fetch_jobs: List[fetching.FetchJob],
+    catalog: dict,
+    states: dict[str, probe.ProbeState],
+    writer: fetching.OutputWriter,
+    fmt: str,
+    max_tokens: Optional[int],
+) -> List[fetching.FetchJob]:
+    """Drop jobs the catalog says are unchanged or too big; make the rest conditional requests."""
+    remaining: List[fetching.FetchJob] = []
+    for job in fetch_jobs:
+        stored = writer.has(job)
+        state = states.get(probe.state_key(job.library_id, job.topic, fmt))
+        reason = probe.skip_reason(catalog.get(job.library_id), state, stored, max_tokens)
+        if reason is not None:
+            rich.print(f"Skipping {job.library_id}: {reason}")
+            continue
+        if stored and state is not None:
+            job.etag, job.last_modified = state.etag, state.last_modified
+        remaining.append(job)
+    return remaining
 
 
 def _execute(
     library_ids: List[str],
     tokens: Optional[int],
     fmt: str,
-    topic: Optional[str],
+    topics: Optional[List[str]],
+    topics_file: Optional[Path],
     output: Optional[Path],
     output_dir: Optional[Path],
     overwrite: Optional[bool],
+    jobs: int = 1,
+    adaptive: bool = False,
+    write_chunks: Optional[bool] = None,
+    archive_path: Optional[Path] = None,
+    schedule: bool = False,
+    priorities: Optional[List[str]] = None,
+    probe_first: bool = False,
+    max_size: Optional[int] = None,
+    keep_history: Optional[bool] = None,
+    store_snippets: Optional[bool] = None,
 ) -> None:
     if not library_ids:
         raise typer.BadParameter("Provide at least one library id to fetch.")
 
-    if output is not None and len(library_ids) != 1:
-        raise typer.BadParameter("--output is only valid when fetching a single library id.")
+    topic_list = fetching.resolve_topics(topics, topics_file)
+    combos = [(library_id, topic) for library_id in library_ids for topic in topic_list]
+
+    if output is not None and len(combos) != 1:
+        raise typer.BadParameter("--output is only valid when fetching a single library id and topic.")
+
+    if output is not None and archive_path is not None:
+        raise typer.BadParameter("--output and --archive cannot be combined.")
 
     fmt_normalized = fmt.lower()
     if fmt_normalized not in {"text", "json"}:
@@ -66,28 +108,89 @@ def _execute(
         )
         raise typer.Exit(code=1)
 
-    token_limit = tokens if tokens is not None else common.default_token_count()
-    base_dir = _resolve_base_dir(output_dir)
-    overwrite_flag = _should_overwrite(overwrite)
+    adaptive_cap: Optional[int] = None
+    if adaptive:
+        adaptive_cap = tokens if tokens is not None else common.int_setting("adaptive_max_tokens", 100000)
+        recorded = budgets.load_budgets()
+        start = common.int_setting("adaptive_start_tokens", 2000)
+        fetch_jobs = [
+            fetching.FetchJob(library_id, topic, recorded.get(budgets.budget_key(library_id, topic), start))
+            for library_id, topic in combos
+        ]
+    else:
+        token_limit = tokens if tokens is not None else common.default_token_count()
+        fetch_jobs = [fetching.FetchJob(library_id, topic, token_limit) for library_id, topic in combos]
+
+    catalog = _load_catalog() if (schedule or priorities or probe_first) else {}
+    if schedule or priorities:
+        fetch_jobs = _schedule_jobs(fetch_jobs, priorities, catalog)
+
+    try:
+        writer = fetching.open_writer(
+            common.resolve_output_dir(output_dir),
+            fmt_normalized,
+            output=output,
+            archive_path=archive_path,
+            overwrite=overwrite,
+            write_chunks=write_chunks,
+            keep_history=keep_history,
+            store_snippets=store_snippets,
+        )
+    except fetching.WRITER_ERRORS as exc:
+        rich.print(f"Error: {exc}")
+        raise typer.Exit(code=1) from None
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from None
 
-    for library_id in library_ids:
+    states = probe.load_states() if probe_first else {}
+    if probe_first:
+        if max_size is None and settings.get_setting("probe_max_tokens"):
+            max_size = common.int_setting("probe_max_tokens", 0) or None
+        fetch_jobs = _probe_jobs(fetch_jobs, catalog, states, writer, fmt_normalized, max_size)
+
+    outcomes: List[fetching.FetchOutcome] = []
+    failures = 0
+    # Requests share api's rate limiter, so extra workers only overlap network latency.
+    with writer, ThreadPoolExecutor(max_workers=max(1, min(jobs, len(fetch_jobs)))) as pool:
+        futures = {pool.submit(fetching.run_job, job, fmt_normalized, adaptive_cap): job for job in fetch_jobs}
         try:
-            response = api.fetch(
-                library_id,
-                tokens=token_limit,
-                format=fmt_normalized,
-                topic=topic,
-            )
-        except api.MissingApiKey as exc:
+            # Store each document as soon as it arrives so a slow job never holds back finished ones.
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    outcome = future.result()
+                except (api.MissingApiKey, api.OfflineMiss):
+                    raise
+                except api.ApiError as exc:
+                    failures += 1
+                    rich.print(f"Fetch {job.library_id} failed: {exc}")
+                    continue
+                outcomes.append(outcome)
+                stored = writer.store(outcome)
+                # A 304 also confirms the copy on disk matches the catalog's current lastUpdateDate.
+                if probe_first and (stored or outcome.response.not_modified):
+                    states[probe.state_key(job.library_id, job.topic, fmt_normalized)] = probe.ProbeState(
+                        last_update=catalog.get(job.library_id, {}).get("lastUpdateDate"),
+                        etag=outcome.response.etag or job.etag,
+                        last_modified=outcome.response.last_modified or job.last_modified,
+                    )
+        except (api.MissingApiKey, api.OfflineMiss) as exc:
             rich.print(str(exc))
             raise typer.Exit(code=1) from None
-        if output is not None:
-            target = output
-        else:
-            filename = common.auto_filename([library_id, topic], _extension(fmt_normalized))
-            target = common.render_path(base_dir, filename)
-        _write_payload(target, response, overwrite_flag)
+        finally:
+            # Anything still queued is pointless once the batch is aborted (a no-op after a clean run).
+            for pending in futures:
+                pending.cancel()
 
+    if probe_first:
+        probe.save_states(states)
+    if adaptive:
+        budgets.record_budgets({budgets.budget_key(o.job.library_id, o.job.topic): o.tokens for o in outcomes})
+    if len(outcomes) > 1 or adaptive:
+        fetching.print_summary(outcomes)
+    if failures:
+        rich.print(f"{failures} of {len(fetch_jobs)} fetch(es) failed.")
+        raise typer.Exit(code=1)
     rich.print("Done.")
 
 
@@ -103,7 +206,7 @@ def callback(
         None,
         "--tokens",
         "-t",
-        help="Maximum tokens to request (defaults to configured token_count).",
+        help="Maximum tokens to request (defaults to configured token_count; caps --adaptive).",
     ),
     fmt: str = typer.Option(
         "text",
@@ -112,10 +215,18 @@ def callback(
         case_sensitive=False,
         help="Output format: text or json.",
     ),
-    topic: Optional[str] = typer.Option(
+    topics: Optional[List[str]] = typer.Option(
         None,
         "--topic",
-        help="Optional topic within the library to target.",
+        help="Topic within the library to target; repeat to fetch several topics.",
+    ),
+    topics_file: Optional[Path] = typer.Option(
+        None,
+        "--topics-file",
+        help="File with one topic per line (blank lines and '#' comments ignored).",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
     ),
     output: Optional[Path] = typer.Option(
         None,
@@ -138,7 +249,82 @@ def callback(
         "--overwrite/--no-overwrite",
         help="Override configured overwrite behaviour.",
     ),
+    jobs: int = typer.Option(
+        4,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Number of library/topic combinations to fetch concurrently.",
+    ),
+    adaptive: bool = typer.Option(
+        False,
+        "--adaptive",
+        help="Grow the token budget until content stops growing and remember it per library.",
+    ),
+    write_chunks: Optional[bool] = typer.Option(
+        None,
+        "--chunks/--no-chunks",
+        help="Also write a section-level JSONL chunk file for text documents (overrides write_chunks).",
+    ),
+    archive_path: Optional[Path] = typer.Option(
+        None,
+        "--archive",
+        help="Append fetched documents to this compressed single-file archive instead of writing files.",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    schedule: bool = typer.Option(
+        False,
+        "--schedule",
+        help="Run smallest estimated documents first, taking turns between orgs.",
+    ),
+    priorities: Optional[List[str]] = typer.Option(
+        None,
+        "--priority",
+        metavar="PATTERN=N",
+        help="Give library ids matching the glob priority N (higher runs first); implies --schedule.",
+    ),
+    probe_first: bool = typer.Option(
+        False,
+        "--probe",
+        help="Skip documents the search catalog shows unchanged or over the size cap; fetch the rest conditionally.",
+    ),
+    max_size: Optional[int] = typer.Option(
+        None,
+        "--max-size",
+        min=1,
+        help="With --probe, skip libraries whose catalog totalTokens exceeds this (defaults to probe_max_tokens).",
+    ),
+    keep_history: Optional[bool] = typer.Option(
+        None,
+        "--history/--no-history",
+        help="Record each fetched revision in the history store (defaults to keep_history setting).",
+    ),
+    store_snippets: Optional[bool] = typer.Option(
+        None,
+        "--snippets/--no-snippets",
+        help="With --format json, ingest snippets into the indexed snippet store (defaults to snippet_store).",
+    ),
 ):
     if ctx.invoked_subcommand:
         return
-    _execute(library_ids, tokens, fmt, topic, output, output_dir, overwrite)
+    _execute(
+        library_ids,
+        tokens,
+        fmt,
+        topics,
+        topics_file,
+        output,
+        output_dir,
+        overwrite,
+        jobs=jobs,
+        adaptive=adaptive,
+        write_chunks=write_chunks,
+        archive_path=archive_path,
+        schedule=schedule,
+        priorities=priorities,
+        probe_first=probe_first,
+        max_size=max_size,
+        keep_history=keep_history,
+        store_snippets=store_snippets,
+    )
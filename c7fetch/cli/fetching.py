@@ -0,0 +1,328 @@
+"""Shared fetch machinery: jobs, the request runner and the output writer.
+
+Used by ``c7fetch fetch``, ``c7fetch pipeline`` and ``c7fetch queue work``.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import rich
+from rich.table import Table
+
+from c7fetch.c7 import api
+from c7fetch.store import archive, chunks, fulltext, history, layout, snippets
+
+from . import common, settings
+
+
+def should_overwrite(override: Optional[bool]) -> bool:
+    if override is not None:
+        return override
+    return common.should_overwrite()
+
+
+def _extension(fmt: str) -> str:
+    return "md" if fmt == "text" else "json"
+
+
+def _payload_text(payload: api.FetchResponse) -> str:
+    """Render a payload exactly as it is written to disk."""
+    if payload.content_type == "application/json":
+        return json.dumps(payload.payload, indent=2, sort_keys=True)
+    return str(payload.payload)
+
+
+def _write_payload(path: Path, payload: api.FetchResponse, overwrite: bool) -> bool:
+    if path.exists() and not overwrite:
+        rich.print(f"Skipping existing file: {path}")
+        return False
+    common.ensure_directory(path.parent)
+    # Write-then-rename so concurrent writers (e.g. queue workers) never leave a torn file.
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(_payload_text(payload), encoding="utf-8")
+    os.replace(tmp, path)
+    rich.print(f"Saved fetched content to {path}")
+    return True
+
+
+def _open_fulltext_index(base_dir: Path) -> Optional[fulltext.FullTextIndex]:
+    if not common.parse_bool(settings.get_setting("fulltext_index")):
+        return None
+    return fulltext.open_index(base_dir)
+
+
+def _index_written(index: Optional[fulltext.FullTextIndex], base_dir: Path, path: Path) -> None:
+    if index is None or not path.resolve().is_relative_to(base_dir.resolve()):
+        return
+    index.update_file(path)
+
+
+def should_keep_history(override: Optional[bool]) -> bool:
+    if override is not None:
+        return override
+    return common.parse_bool(settings.get_setting("keep_history"))
+
+
+def _open_history(base_dir: Path) -> history.HistoryStore:
+    interval = common.int_setting("history_keyframe_interval", history.DEFAULT_KEYFRAME_INTERVAL)
+    return history.open_history(base_dir, interval)
+
+
+def should_store_snippets(override: Optional[bool]) -> bool:
+    if override is not None:
+        return override
+    return common.parse_bool(settings.get_setting("snippet_store"))
+
+
+def _output_layout() -> str:
+    return (settings.get_setting("output_layout") or "flat").strip().lower()
+
+
+def should_write_chunks(override: Optional[bool]) -> bool:
+    if override is not None:
+        return override
+    return common.parse_bool(settings.get_setting("write_chunks"))
+
+
+def _write_chunks(path: Path, payload: api.FetchResponse) -> None:
+    if payload.content_type == "application/json":
+        return
+    target = chunks.write_chunks(path, str(payload.payload))
+    rich.print(f"Saved chunks to {target}")
+
+
+def payload_size(payload: api.FetchResponse) -> int:
+    if payload.content_type == "application/json":
+        return len(json.dumps(payload.payload).encode("utf-8"))
+    return len(str(payload.payload).encode("utf-8"))
+
+
+def _read_topics_file(path: Path) -> List[str]:
+    topics: List[str] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            topics.append(stripped)
+    return topics
+
+
+def resolve_topics(topics: Optional[List[str]], topics_file: Optional[Path]) -> List[Optional[str]]:
+    resolved: List[str] = list(topics or [])
+    if topics_file is not None:
+        resolved.extend(_read_topics_file(topics_file))
+    # Preserve the given order while dropping repeats.
+    unique: List[Optional[str]] = list(dict.fromkeys(t for t in resolved if t))
+    return unique or [None]
+
+
+# Rough markdown/JSON bytes per token, used to tell whether a response filled its budget.
+_BYTES_PER_TOKEN = 4
+_ADAPTIVE_GROWTH = 2
+_ADAPTIVE_MIN_GAIN = 0.05
+
+
+@dataclass
+class FetchJob:
+    library_id: str
+    topic: Optional[str]
+    tokens: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class FetchOutcome:
+    job: FetchJob
+    response: api.FetchResponse
+    elapsed: float
+    tokens: int
+
+
+def _fetch_once(job: FetchJob, tokens: int, fmt: str) -> api.FetchResponse:
+    return api.fetch(
+        job.library_id,
+        tokens=tokens,
+        format=fmt,
+        topic=job.topic,
+        etag=job.etag,
+        last_modified=job.last_modified,
+    )
+
+
+def _fills_budget(size: int, budget: int) -> bool:
+    return size >= budget * _BYTES_PER_TOKEN * (1 - _ADAPTIVE_MIN_GAIN)
+
+
+def _fetch_adaptive(job: FetchJob, cap: int, fmt: str) -> tuple[api.FetchResponse, int]:
+    """Grow the token budget geometrically until the content stops growing or ``cap`` is hit.
+
+    Returns the largest response seen and the smallest budget that produced it, which
+    may be below the starting budget when the document has shrunk.
+    """
+    budget = min(job.tokens, cap)
+    response = _fetch_once(job, budget, fmt)
+    if response.not_modified:
+        return response, budget
+    size = payload_size(response)
+    while budget < cap and _fills_budget(size, budget):
+        next_budget = min(budget * _ADAPTIVE_GROWTH, cap)
+        candidate = _fetch_once(job, next_budget, fmt)
+        if candidate.not_modified:
+            # No payload to compare; keep the content we already have.
+            break
+        candidate_size = payload_size(candidate)
+        if candidate_size <= size * (1 + _ADAPTIVE_MIN_GAIN):
+            if candidate_size > size:
+                response = candidate
+            break
+        budget, response, size = next_budget, candidate, candidate_size
+    if _fills_budget(size, budget):
+        return response, budget
+    # The content fit with room to spare: remember just enough budget for it not to look truncated.
+    return response, min(budget, math.floor(size / (_BYTES_PER_TOKEN * (1 - _ADAPTIVE_MIN_GAIN))) + 1)
+
+
+def run_job(job: FetchJob, fmt: str, adaptive_cap: Optional[int] = None) -> FetchOutcome:
+    started = time.perf_counter()
+    if adaptive_cap is None:
+        response, tokens = _fetch_once(job, job.tokens, fmt), job.tokens
+    else:
+        response, tokens = _fetch_adaptive(job, adaptive_cap, fmt)
+    return FetchOutcome(job=job, response=response, elapsed=time.perf_counter() - started, tokens=tokens)
+
+
+class OutputWriter:
+    """Stores fetch outcomes as files (plus index/chunks) or into an archive."""
+
+    def __init__(
+        self,
+        *,
+        base_dir: Path,
+        fmt: str,
+        output: Optional[Path],
+        overwrite: bool,
+        chunks: bool,
+        archive_path: Optional[Path],
+        keep_history: bool = False,
+        store_snippets: bool = False,
+    ):
+        self.base_dir = base_dir
+        self.fmt = fmt
+        self.output = output
+        self.overwrite = overwrite
+        self.chunks = chunks
+        self.bundle = archive.Archive(archive_path) if archive_path is not None else None
+        self.index = _open_fulltext_index(base_dir) if self.bundle is None else None
+        self.layout = layout.OutputIndex(base_dir, _output_layout()) if self.bundle is None else None
+        self.history = _open_history(base_dir) if keep_history else None
+        self.snippets = snippets.open_store(base_dir) if store_snippets and fmt == "json" else None
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        if self.layout is not None:
+            self.layout.save()
+        if self.history is not None:
+            self.history.close()
+        if self.snippets is not None:
+            self.snippets.close()
+        if self.index is not None:
+            self.index.close()
+        if self.bundle is not None:
+            self.bundle.close()
+
+    def has(self, job: FetchJob) -> bool:
+        if self.bundle is not None:
+            return self.bundle.contains(job.library_id, job.topic, self.fmt)
+        # target_for prefers the indexed location; the index can outlive a deleted file.
+        return self.target_for(job).exists()
+
+    def target_for(self, job: FetchJob) -> Path:
+        if self.output is not None:
+            return self.output
+        return self.layout.path_for(job.library_id, job.topic, _extension(self.fmt))
+
+    def store(self, outcome: FetchOutcome) -> bool:
+        job, response = outcome.job, outcome.response
+        if response.not_modified:
+            rich.print(f"Skipping {job.library_id}: not modified since last fetch")
+            return False
+        if self.history is not None:
+            # Recorded even when the file itself is kept because overwriting is off.
+            revision = self.history.record(job.library_id, job.topic, response.content_type, _payload_text(response))
+            if revision is not None:
+                rich.print(f"Recorded revision {revision} of {job.library_id} in history")
+        if self.snippets is not None and response.content_type == "application/json":
+            count = self.snippets.ingest(job.library_id, job.topic, response.payload)
+            rich.print(f"Stored {count} snippet(s) of {job.library_id} in {self.snippets.path}")
+        if self.bundle is not None:
+            if not self.overwrite and self.bundle.contains(job.library_id, job.topic, self.fmt):
+                rich.print(f"Skipping {job.library_id}: already in {self.bundle.path}")
+                return False
+            self.bundle.append(job.library_id, job.topic, response.payload, response.content_type, self.fmt)
+            rich.print(f"Archived {job.library_id} into {self.bundle.path}")
+            return True
+        target = self.target_for(job)
+        if not _write_payload(target, response, self.overwrite):
+            return False
+        _index_written(self.index, self.base_dir, target)
+        if self.output is None:
+            self.layout.record(job.library_id, job.topic, _extension(self.fmt), target)
+        if self.chunks:
+            _write_chunks(target, response)
+        return True
+
+
+# Raised by open_writer when a store cannot be opened (ValueError covers a bad output_layout).
+WRITER_ERRORS = (archive.ArchiveError, history.HistoryError, snippets.SnippetStoreError)
+
+
+def open_writer(
+    base_dir: Path,
+    fmt: str,
+    *,
+    output: Optional[Path] = None,
+    archive_path: Optional[Path] = None,
+    overwrite: Optional[bool] = None,
+    write_chunks: Optional[bool] = None,
+    keep_history: Optional[bool] = None,
+    store_snippets: Optional[bool] = None,
+) -> OutputWriter:
+    """Build an ``OutputWriter``; each ``None`` override falls back to its setting."""
+    return OutputWriter(
+        base_dir=base_dir,
+        fmt=fmt,
+        output=output,
+        overwrite=should_overwrite(overwrite),
+        chunks=should_write_chunks(write_chunks),
+        archive_path=archive_path,
+        keep_history=should_keep_history(keep_history),
+        store_snippets=should_store_snippets(store_snippets),
+    )
+
+
+def print_summary(outcomes: List[FetchOutcome]) -> None:
+    table = Table(title="Fetch Summary")
+    table.add_column("Library", style="cyan", no_wrap=True)
+    table.add_column("Topic", style="magenta", no_wrap=True)
+    table.add_column("Tokens", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("Time", justify="right")
+    for outcome in outcomes:
+        table.add_row(
+            outcome.job.library_id,
+            outcome.job.topic or "-",
+            str(outcome.tokens),
+            f"{payload_size(outcome.response):,} B",
+            f"{outcome.elapsed:.2f}s",
+        )
+    rich.print(table)
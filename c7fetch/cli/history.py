@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import rich
+import typer
+from rich.table import Table
+
+from c7fetch.store import history
+
+from . import common, typer_util
+
+app = typer_util.TyperAlias(module=__name__)
+
+_CONTENT_TYPES = {"text": "text/markdown", "json": "application/json"}
+
+
+def _parse_at(raw_value: str) -> float:
+    try:
+        parsed = datetime.fromisoformat(raw_value.replace("Z", "+00:00"))
+    except ValueError:
+        raise typer.BadParameter(f"Invalid --at timestamp '{raw_value}'; use ISO-8601 such as 2025-01-31.") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if len(raw_value) == 10:
+        # A bare date means "as of the end of that day".
+        return parsed.timestamp() + 86400 - 1e-3
+    return parsed.timestamp()
+
+
+def _print_revisions(store: history.HistoryStore, library_id: str, topic: Optional[str], content_type: str) -> None:
+    revisions = store.revisions(library_id, topic, content_type)
+    if not revisions:
+        rich.print(f"No recorded revisions of {library_id}.")
+        raise typer.Exit(code=1)
+    table = Table(title=f"History of {library_id}" + (f" ({topic})" if topic else ""))
+    table.add_column("Rev", justify="right")
+    table.add_column("Fetched", style="cyan")
+    table.add_column("Kind")
+    table.add_column("Size", justify="right")
+    table.add_column("Stored", justify="right")
+    for rev in revisions:
+        fetched = datetime.fromtimestamp(rev.fetched_at, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        table.add_row(
+            str(rev.revision),
+            fetched,
+            "keyframe" if rev.keyframe else "delta",
+            f"{rev.size:,} B",
+            f"{rev.stored:,} B",
+        )
+    rich.print(table)
+
+
+def _execute(
+    library_id: str,
+    topic: Optional[str],
+    fmt: str,
+    revision: Optional[int],
+    at: Optional[str],
+    output: Optional[Path],
+    output_dir: Optional[Path],
+) -> None:
+    content_type = _CONTENT_TYPES.get(fmt.lower())
+    if content_type is None:
+        raise typer.BadParameter("--format must be either 'text' or 'json'.")
+    if revision is not None and at is not None:
+        raise typer.BadParameter("--revision and --at cannot be combined.")
+
+    path = history.history_path(common.resolve_output_dir(output_dir))
+    if not path.exists():
+        rich.print(f"Error: no history store at {path}; fetch with --history first.")
+        raise typer.Exit(code=1)
+
+    with history.HistoryStore(path) as store:
+        if revision is None and at is None and output is None:
+            _print_revisions(store, library_id, topic, content_type)
+            return
+        try:
+            if at is not None:
+                revision = store.revision_at(library_id, topic, content_type, _parse_at(at))
+            text = store.materialize(library_id, topic, content_type, revision)
+        except history.HistoryError as exc:
+            rich.print(f"Error: {exc}")
+            raise typer.Exit(code=1) from None
+
+    if output is None:
+        sys.stdout.write(text)
+        return
+    common.ensure_directory(output.parent)
+    output.write_text(text, encoding="utf-8")
+    rich.print(f"Materialized {library_id} to {output}")
+
+
+@app.callback(invoke_without_command=True)
+def callback(
+    ctx: typer.Context,
+    library_id: str = typer.Argument(
+        ...,
+        metavar="LIBRARY_ID",
+        help="Library identifier whose history to list or materialize.",
+    ),
+    topic: Optional[str] = typer.Option(None, "--topic", help="Topic the revisions were fetched with."),
+    fmt: str = typer.Option(
+        "text",
+        "--format",
+        "-f",
+        help="Format the revisions were fetched in (text or json).",
+    ),
+    revision: Optional[int] = typer.Option(
+        None,
+        "--revision",
+        "-r",
+        min=1,
+        help="Materialize this revision number (omit to list revisions).",
+    ),
+    at: Optional[str] = typer.Option(
+        None,
+        "--at",
+        help="Materialize the newest revision fetched at or before this ISO-8601 date/time.",
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write the materialized revision here instead of stdout (latest if no revision is given).",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    output_dir: Optional[Path] = typer.Option(
+        None,
+        "--output-dir",
+        help="Directory holding the history store (defaults to configured output_dir).",
+        file_okay=False,
+        resolve_path=True,
+    ),
+):
+    if ctx.invoked_subcommand:
+        return
+    _execute(library_id, topic, fmt, revision, at, output, output_dir)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict
+from typing import List, Optional
+
+import rich
+import typer
+from rich.markup import escape
+from rich.table import Table
+
+from c7fetch.store import search_results, trigram
+
+from . import common, typer_util
+
+app = typer_util.TyperAlias(name="lookup | find")
+
+
+def _execute(terms: List[str], limit: int, refresh: bool, as_json: bool) -> None:
+    query = " ".join(terms).strip()
+    if not query:
+        raise typer.BadParameter("Provide a library name to look up.")
+
+    try:
+        index = trigram.open_index()
+    except trigram.TrigramIndexError as exc:
+        rich.print(f"Error: {exc}")
+        raise typer.Exit(code=1) from None
+
+    with index:
+        if refresh:
+            changed = index.refresh(
+                search_results.list_directory(common.config_path("search_dir")), cache=search_results.default_cache()
+            )
+            if changed and not as_json:
+                rich.print(f"Indexed {changed} changed search file(s).")
+        matches = index.lookup(query, limit=limit)
+
+    if as_json:
+        for match in matches:
+            typer.echo(json.dumps(asdict(match), ensure_ascii=False))
+        return
+    if not matches:
+        rich.print(f"No cached libraries resemble {query!r}. Run 'c7fetch search' first.")
+        raise typer.Exit(code=1)
+
+    table = Table(title=f"Libraries like: {escape(query)}")
+    table.add_column("ID", style="cyan", no_wrap=True)
+    table.add_column("Title", style="magenta")
+    table.add_column("⭐", justify="right")
+    table.add_column("Score", justify="right")
+    table.add_column("Description", style="dim")
+    for match in matches:
+        table.add_row(
+            escape(match.library_id),
+            escape(match.title or "-"),
+            "-" if match.stars is None else str(match.stars),
+            f"{match.score:.2f}",
+            escape(match.description or ""),
+        )
+    rich.print(table)
+
+
+@app.callback(invoke_without_command=True)
+def callback(
+    ctx: typer.Context,
+    terms: Optional[List[str]] = typer.Argument(
+        None,
+        metavar="QUERY",
+        help="Approximate library name; typos and partial words are fine (e.g. 'nxtjs').",
+    ),
+    limit: int = typer.Option(10, "--limit", "-n", min=1, help="Maximum number of libraries to show."),
+    refresh: bool = typer.Option(
+        True,
+        "--refresh/--no-refresh",
+        help="Index new or changed search result files before looking up.",
+    ),
+    as_json: bool = typer.Option(False, "--json", help="Print one JSON object per match."),
+):
+    if ctx.invoked_subcommand:
+        return
+    _execute(terms or [], limit, refresh, as_json)
@@ -1,10 +1,104 @@
-from . import config, fetch, review, search, typer_util
+from typing import Optional
 
-app = typer_util.TyperAlias()
+import typer
+import typer.core
+
+from c7fetch.c7 import offline
+
+from . import (
+    config,
+    fetch,
+    history,
+    lookup,
+    pipeline,
+    profiling,
+    query,
+    review,
+    search,
+    serve,
+    snippets,
+    typer_util,
+    warm,
+    workqueue,
+)
+
+
+class _RootGroup(typer_util.TyperAliasGroup):
+    def parse_args(self, ctx, args):
+        # Let a bare ``--profile`` (no ``=path``) fall back to the default path
+        # instead of swallowing the subcommand name as its value.
+        args = list(args)
+        takes_value = {
+            opt
+            for param in self.params
+            if isinstance(param, typer.core.TyperOption) and not param.is_flag and not param.count
+            for opt in param.opts
+            if opt != "--profile"
+        }
+        idx = 0
+        while idx < len(args):
+            arg = args[idx]
+            if not arg.startswith("-"):
+                break
+            if arg == "--profile":
+                args[idx] = "--profile="
+            elif arg in takes_value:
+                # Step over the option's value so it is not mistaken for the subcommand.
+                idx += 1
+            idx += 1
+        return super().parse_args(ctx, args)
+
+
+app = typer_util.TyperAlias(cls=_RootGroup)
 app.add_module(config)
 app.add_module(search)
 app.add_module(fetch)
 app.add_module(review)
+app.add_module(query)
+app.add_module(serve)
+app.add_module(history)
+app.add_module(snippets)
+app.add_module(warm)
+app.add_module(pipeline)
+app.add_module(workqueue)
+app.add_module(lookup)
+
+
+@app.callback()
+def callback(
+    ctx: typer.Context,
+    profile: Optional[str] = typer.Option(
+        None,
+        "--profile",
+        metavar="[=PATH]",
+        help="Profile the subcommand with cProfile and write pstats plus a summary to PATH.",
+    ),
+    profile_top: int = typer.Option(
+        profiling.DEFAULT_TOP,
+        "--profile-top",
+        min=1,
+        help="Number of entries to include in the profile summary.",
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="Also trace allocations with tracemalloc while profiling.",
+    ),
+    offline_mode: bool = typer.Option(
+        False,
+        "--offline",
+        help="Answer search/fetch only from the local response store (see `c7fetch warm`).",
+    ),
+):
+    if offline_mode:
+        offline.set_offline(True)
+        ctx.call_on_close(lambda: offline.set_offline(None))
+    path = profiling.resolve_profile_path(profile)
+    if path is None:
+        return
+    session = profiling.ProfileSession(path, top=profile_top, memory=profile_memory)
+    session.start()
+    ctx.call_on_close(session.finish)
 
 
 def main():
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import rich
+import typer
+
+from c7fetch.c7 import api
+from c7fetch.store import columns, search_results
+
+from . import common, fetching, typer_util
+
+app = typer_util.TyperAlias(module=__name__)
+
+
+def _select_library_ids(
+    payload: dict,
+    filters: search_results.Filters,
+    now_ms: int,
+    max_age: Optional[int],
+    sort: Optional[str],
+    top: Optional[int],
+) -> List[str]:
+    """Apply review's filter, age and sort rules to one search response and keep the top ``top`` ids."""
+    table = columns.ResultTable.from_results(
+        search_results.trim_result(result) for result in payload.get("results", []) if isinstance(result, dict)
+    )
+    selected = table.select(filters, now_ms=now_ms, max_age=max_age, sort=sort, limit=top)
+    return [table.ids[index] for index in selected if table.ids[index] != "-"]
+
+
+def _execute(
+    raw_queries: List[str],
+    filters: search_results.Filters,
+    max_age: Optional[int],
+    sort: Optional[str],
+    top: Optional[int],
+    tokens: Optional[int],
+    fmt: str,
+    topics: Optional[List[str]],
+    output_dir: Optional[Path],
+    overwrite: Optional[bool],
+    jobs: int,
+) -> None:
+    queries = [q for raw in raw_queries for q in common.normalize_queries(raw)]
+    if not queries:
+        raise typer.BadParameter("At least one non-empty query is required.")
+    fmt_normalized = fmt.lower()
+    if fmt_normalized not in {"text", "json"}:
+        raise typer.BadParameter("--format must be either 'text' or 'json'.")
+    if sort is not None and sort not in columns.SORT_COLUMNS:
+        raise typer.BadParameter(f"--sort must be one of: {', '.join(columns.SORT_COLUMNS)}.")
+    if not api.is_api_key_configured():
+        rich.print("Error: Context7 API key is not configured. Set one via `c7fetch config set apikey <value>`.")
+        raise typer.Exit(code=1)
+
+    topic_list = fetching.resolve_topics(topics, None)
+    token_limit = tokens if tokens is not None else common.default_token_count()
+    now_ms = search_results.now_ms()
+    try:
+        writer = fetching.open_writer(common.resolve_output_dir(output_dir), fmt_normalized, overwrite=overwrite)
+    except fetching.WRITER_ERRORS as exc:
+        rich.print(f"Error: {exc}")
+        raise typer.Exit(code=1) from None
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from None
+
+    scheduled: Set[str] = set()
+    outcomes: List[fetching.FetchOutcome] = []
+    failures = 0
+    # Searches and downloads share one pool (and api's rate limiter): fetches for a
+    # query's picks are queued as soon as its results arrive, while other searches run.
+    with writer, ThreadPoolExecutor(max_workers=jobs) as pool:
+        searches: Dict[Future, str] = {pool.submit(api.search, query): query for query in queries}
+        fetches: Set[Future] = set()
+        pending: Set[Future] = set(searches)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    label = f"Search {searches[future]!r}" if future in searches else "Fetch"
+                    try:
+                        result = future.result()
+                    except (api.MissingApiKey, api.OfflineMiss):
+                        raise
+                    except api.ApiError as exc:
+                        failures += 1
+                        rich.print(f"{label} failed: {exc}")
+                        continue
+                    if future in fetches:
+                        outcomes.append(result)
+                        writer.store(result)
+                        continue
+                    query, payload = searches[future], result
+                    picked = [
+                        library_id
+                        for library_id in _select_library_ids(payload, filters, now_ms, max_age, sort, top)
+                        if library_id not in scheduled
+                    ]
+                    rich.print(f"Search {query!r}: fetching {', '.join(picked) if picked else 'nothing new'}")
+                    for library_id in picked:
+                        scheduled.add(library_id)
+                        for topic in topic_list:
+                            job = fetching.FetchJob(library_id, topic, token_limit)
+                            fetch_future = pool.submit(fetching.run_job, job, fmt_normalized)
+                            fetches.add(fetch_future)
+                            pending.add(fetch_future)
+        except (api.MissingApiKey, api.OfflineMiss) as exc:
+            for future in pending:
+                future.cancel()
+            rich.print(str(exc))
+            raise typer.Exit(code=1) from None
+
+    if outcomes:
+        fetching.print_summary(outcomes)
+    rich.print(
+        f"Fetched {len(outcomes)} document(s) for {len(scheduled)} library id(s) from {len(queries)} search(es)."
+    )
+    if failures:
+        raise typer.Exit(code=1)
+
+
+@app.callback(invoke_without_command=True)
+def callback(
+    ctx: typer.Context,
+    queries: Optional[List[str]] = typer.Argument(
+        None,
+        metavar="QUERY",
+        help="Search queries; use '|' to separate several in one argument.",
+    ),
+    library: Optional[str] = typer.Option(None, "--library", "-l", help="Glob pattern to filter by library id."),
+    title: Optional[str] = typer.Option(None, "--title", help="Glob pattern to filter by title."),
+    description: Optional[str] = typer.Option(
+        None, "--description", "-d", help="Glob pattern applied to description text."
+    ),
+    max_age: Optional[int] = typer.Option(
+        None, "--max-age", min=0, help="Only fetch libraries updated within this many days."
+    ),
+    sort: Optional[str] = typer.Option(
+        None,
+        "--sort",
+        case_sensitive=False,
+        help="Rank results by: updated (newest first), stars or trust (highest first) before --top.",
+    ),
+    top: Optional[int] = typer.Option(None, "--top", "-k", min=1, help="Fetch at most this many libraries per query."),
+    tokens: Optional[int] = typer.Option(
+        None, "--tokens", "-t", help="Maximum tokens to request (defaults to configured token_count)."
+    ),
+    fmt: str = typer.Option(
+        "text",
+        "--format",
+        "-f",
+        help="Response format: text or json.",
+    ),
+    topics: Optional[List[str]] = typer.Option(
+        None, "--topic", help="Topic to fetch for every selected library (repeatable)."
+    ),
+    output_dir: Optional[Path] = typer.Option(
+        None,
+        "--output-dir",
+        help="Directory for fetched documents (defaults to configured output_dir).",
+        file_okay=False,
+        resolve_path=True,
+    ),
+    overwrite: Optional[bool] = typer.Option(
+        None,
+        "--overwrite/--no-overwrite",
+        help="Override the configured overwrite behaviour for this run.",
+    ),
+    jobs: int = typer.Option(4, "--jobs", "-j", min=1, help="Searches and fetches to run concurrently."),
+):
+    if ctx.invoked_subcommand:
+        return
+    if not queries:
+        rich.print(ctx.command.get_help(ctx))
+        raise typer.Exit(code=1)
+    _execute(
+        queries,
+        search_results.Filters(library=library, title=title, description=description),
+        max_age,
+        sort.lower() if sort else None,
+        top,
+        tokens,
+        fmt,
+        topics,
+        output_dir,
+        overwrite,
+        jobs,
+    )
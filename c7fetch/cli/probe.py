@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from . import budgets, common, settings
+
+_FILENAME = "fetch_state.json"
+
+
+@dataclass
+class ProbeState:
+    """What we knew about a document when it was last stored."""
+
+    last_update: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def state_path() -> Path:
+    return Path(settings.CONFIG_DIR) / _FILENAME
+
+
+def state_key(library_id: str, topic: Optional[str], fmt: str) -> str:
+    return f"{budgets.budget_key(library_id, topic)}|{fmt}"
+
+
+def load_states() -> Dict[str, ProbeState]:
+    path = state_path()
+    if not path.exists():
+        return {}
+    try:
+        data = common.load_json(path)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    # Ignore keys this version does not know, e.g. from a newer or older state file.
+    known = {field.name for field in fields(ProbeState)}
+    return {
+        key: ProbeState(**{name: item for name, item in value.items() if name in known})
+        for key, value in data.items()
+        if isinstance(value, dict)
+    }
+
+
+def save_states(states: Dict[str, ProbeState]) -> None:
+    common.write_json(state_path(), {key: vars(state) for key, state in states.items()})
+
+
+def skip_reason(
+    meta: Optional[Dict[str, Any]],
+    state: Optional[ProbeState],
+    stored: bool,
+    max_tokens: Optional[int],
+) -> Optional[str]:
+    """Decide from catalog metadata alone whether a download can be skipped.
+
+    Returns a human readable reason, or None when the document should be requested.
+    """
+    total = (meta or {}).get("totalTokens")
+    if max_tokens is not None and isinstance(total, int) and total > max_tokens:
+        return f"{total:,} tokens exceeds the {max_tokens:,} token cap"
+    last_update = (meta or {}).get("lastUpdateDate")
+    if stored and state is not None and last_update and state.last_update == last_update:
+        return f"unchanged since {last_update}"
+    return None
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import rich
+
+DEFAULT_TOP = 25
+
+
+def default_profile_path() -> Path:
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return Path.cwd() / f"c7fetch-profile-{stamp}.prof"
+
+
+def resolve_profile_path(raw: Optional[str]) -> Optional[Path]:
+    """Map the raw ``--profile`` value to an output path (``""`` means use the default)."""
+    if raw is None:
+        return None
+    if not raw:
+        return default_profile_path()
+    path = Path(raw).expanduser()
+    return path if path.is_absolute() else Path.cwd() / path
+
+
+def summary_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.txt")
+
+
+@dataclass
+class ProfileSession:
+    path: Path
+    top: int = DEFAULT_TOP
+    memory: bool = False
+    _profiler: cProfile.Profile = field(default_factory=cProfile.Profile, init=False)
+
+    def start(self) -> None:
+        if self.memory:
+            tracemalloc.start()
+        self._profiler.enable()
+
+    def finish(self) -> None:
+        self._profiler.disable()
+        snapshot = None
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._profiler.dump_stats(str(self.path))
+
+        buffer = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=buffer)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        if snapshot is not None:
+            buffer.write(f"\nTop {self.top} allocations by line:\n")
+            for stat in snapshot.statistics("lineno")[: self.top]:
+                buffer.write(f"{stat}\n")
+
+        target = summary_path(self.path)
+        target.write_text(buffer.getvalue(), encoding="utf-8")
+        rich.print(f"Profile written to {self.path} (summary: {target})")
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional
+
+import rich
+import typer
+from rich.markup import escape
+from rich.table import Table
+
+from c7fetch.store import fulltext
+
+from . import common, typer_util
+
+app = typer_util.TyperAlias(name="query | grep")
+
+
+def _highlight(snippet: str) -> str:
+    text = escape(" ".join(snippet.split()))
+    return text.replace(fulltext.MATCH_START, "[bold yellow]").replace(fulltext.MATCH_END, "[/bold yellow]")
+
+
+def _execute(terms: List[str], limit: int, output_dir: Optional[Path], refresh: bool) -> None:
+    expression = " ".join(terms).strip()
+    if not expression:
+        raise typer.BadParameter("Provide at least one search term.")
+
+    base_dir = common.resolve_output_dir(output_dir)
+    try:
+        index = fulltext.FullTextIndex(base_dir)
+    except fulltext.FullTextError as exc:
+        rich.print(f"Error: {exc}")
+        raise typer.Exit(code=1) from None
+
+    with index:
+        if refresh:
+            changed = index.refresh(exclude=[common.config_path("search_dir")])
+            if changed:
+                rich.print(f"Indexed {changed} changed document(s).")
+        try:
+            hits = index.query(expression, limit=limit)
+        except fulltext.FullTextError as exc:
+            raise typer.BadParameter(str(exc)) from None
+
+    if not hits:
+        rich.print(f"No documents match {expression!r}.")
+        raise typer.Exit(code=1)
+
+    table = Table(title=f"Matches for: {escape(expression)}")
+    table.add_column("Document", style="cyan", no_wrap=True)
+    table.add_column("Score", justify="right")
+    table.add_column("Snippet", style="dim")
+    for hit in hits:
+        try:
+            label = hit.path.relative_to(base_dir).as_posix()
+        except ValueError:
+            label = str(hit.path)
+        table.add_row(escape(label), f"{hit.score:.2f}", _highlight(hit.snippet))
+    rich.print(table)
+
+
+@app.callback(invoke_without_command=True)
+def callback(
+    ctx: typer.Context,
+    terms: Optional[List[str]] = typer.Argument(
+        None,
+        metavar="TERMS",
+        help="Keywords or an FTS5 query expression (e.g. 'useState AND effect', 'route*').",
+    ),
+    limit: int = typer.Option(
+        20,
+        "--limit",
+        "-n",
+        min=1,
+        help="Maximum number of documents to show.",
+    ),
+    output_dir: Optional[Path] = typer.Option(
+        None,
+        "--output-dir",
+        help="Directory of fetched documents (defaults to configured output_dir).",
+        file_okay=False,
+        resolve_path=True,
+    ),
+    refresh: bool = typer.Option(
+        True,
+        "--refresh/--no-refresh",
+        help="Re-index new or changed documents before querying.",
+    ),
+):
+    if ctx.invoked_subcommand:
+        return
+    if not terms:
+        rich.print(ctx.command.get_help(ctx))
+        raise typer.Exit(code=1)
+    _execute(terms, limit, output_dir, refresh)
@@ -1,15 +1,20 @@
-import fnmatch
 import math
+import os
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional
 import typing
 
 import rich
 import typer
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
 from rich.table import Table, Column
+from rich.text import Text
 
+from c7fetch.c7 import remote
+from c7fetch.store import columns, search_results
 from c7fetch.table import NegColTable
 
 from . import common, typer_util
@@ -29,12 +34,6 @@ def _collect_files(explicit_file: Optional[Path]) -> List[Path]:
     return sorted(search_dir.glob("*.json"))
 
 
-def _matches(value: str, pattern: Optional[str]) -> bool:
-    if not pattern:
-        return True
-    return fnmatch.fnmatch(value, pattern)
-
-
 def _current_time() -> datetime:
     """Return the current UTC time.
 
@@ -44,50 +43,69 @@ def _current_time() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _humanize_last_updated(raw_value: typing.Optional[str]) -> str:
-    if not raw_value:
-        return "-"
-    if raw_value == "-":
-        return raw_value
+def _now_ms() -> int:
+    return int(_current_time().timestamp() * 1000)
 
-    normalized = raw_value.replace("Z", "+00:00")
-    try:
-        parsed = datetime.fromisoformat(normalized)
-    except ValueError:
-        return raw_value
-
-    if parsed.tzinfo is None:
-        parsed = parsed.replace(tzinfo=timezone.utc)
-
-    delta = _current_time() - parsed
-    total_seconds = delta.total_seconds()
-    if total_seconds <= 0:
-        days = 0
-    else:
-        days = math.ceil(total_seconds / 86400)
+
+def _humanize_days(days: int) -> str:
     unit = "day" if days == 1 else "days"
     return f"{days} {unit}"
 
 
-def _rows_from_result(result: dict[str, str]) -> List[str]:
-    library_id = result.get("id", "-")
-    title = result.get("title", "-")
-    last_updated = _humanize_last_updated(result.get("lastUpdateDate"))
-    stars = result.get("stars")
-    trust = result.get("trustScore")
-    description = result.get("description", "")
-
-    stars_display = "-" if stars in (-1, None) else str(stars)
-    trust_display = "-" if trust is None else str(trust)
-
-    return [
-        library_id,
-        title,
-        last_updated,
-        stars_display,
-        trust_display,
-        description,
-    ]
+def _format_number(value: float) -> str:
+    if math.isnan(value):
+        return "-"
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+def _display_rows(table: columns.ResultTable, indices: List[int], now_ms: int) -> List[List[str]]:
+    """Format only the selected rows, against a single captured ``now``."""
+    day_labels: dict[int, str] = {}
+    displayed: List[List[str]] = []
+    for index in indices:
+        days = table.age_days(index, now_ms)
+        if days is not None:
+            updated = day_labels.get(days)
+            if updated is None:
+                updated = day_labels[days] = _humanize_days(days)
+        else:
+            updated = table.updated_raw[index] or "-"
+        stars = table.stars[index]
+        displayed.append(
+            [
+                table.ids[index],
+                table.titles[index],
+                updated,
+                "-" if stars < 0 else str(stars),
+                _format_number(table.trust[index]),
+                table.descriptions[index],
+            ]
+        )
+    return displayed
+
+
+_STAT_QUANTILES = (50, 90, 100)
+
+
+def _print_stats(table: columns.ResultTable, now_ms: int) -> None:
+    """Aggregate the displayed rows: count, star and trust percentiles and median age."""
+    stars = table.percentiles("stars", _STAT_QUANTILES)
+    trust = table.percentiles("trust", _STAT_QUANTILES)
+    median_updated = table.percentiles("updated_ms", (50,))[0]
+    stats = Table(title="Summary")
+    for header in ("Rows", "⭐ p50", "⭐ p90", "⭐ max", "Trust p50", "Trust p90", "Median age"):
+        stats.add_column(header, justify="right")
+    median_age = "-"
+    if not math.isnan(median_updated):
+        elapsed = max(0, now_ms - int(median_updated))
+        median_age = _humanize_days(-(-elapsed // columns.MS_PER_DAY))
+    stats.add_row(
+        str(len(table)),
+        *(_format_number(value) for value in stars),
+        *(_format_number(value) for value in trust[:2]),
+        median_age,
+    )
+    console.print(stats)
 
 
 def _configure_table(table: Table, rows: List[list[str]]) -> None:
@@ -102,10 +120,7 @@ def _configure_table(table: Table, rows: List[list[str]]) -> None:
         Column(_index=next(col_indices), header="Updated", style="green", no_wrap=True),
         Column(_index=next(col_indices), header="⭐", no_wrap=True),
         Column(_index=next(col_indices), header="Trust", no_wrap=True),
-        Column(_index=next(col_indices), header="Description", 
-               style="dim", 
-               no_wrap=True, 
-               width=-1),
+        Column(_index=next(col_indices), header="Description", style="dim", no_wrap=True, width=-1),
     ]
 
     # debug_display_col_cfg(columns)
@@ -131,54 +146,178 @@ def _execute(
     title: Optional[str],
     description: Optional[str],
     merge: bool,
+    jobs: int = 1,
+    use_cache: bool = True,
+    max_age: Optional[int] = None,
+    sort: Optional[str] = None,
+    watch: bool = False,
+    interval: float = 1.0,
+    stats: bool = False,
 ) -> None:
+    if sort is not None and sort not in columns.SORT_COLUMNS:
+        raise typer.BadParameter(f"--sort must be one of: {', '.join(columns.SORT_COLUMNS)}.")
+
+    filters = search_results.Filters(library=library, title=title, description=description)
+    cache = search_results.default_cache() if use_cache else None
+
+    if watch:
+        _watch(file, filters, merge, max_age, sort, jobs, cache, interval)
+        rich.print("Done.")
+        return
+
     search_files = _collect_files(file)
-    if not search_files:
+    if not search_files and not (file is None and remote.server_url()):
         rich.print("No search result files found. Run 'c7fetch search' first.")
         raise typer.Exit(code=1)
 
-    aggregated_rows: List[List[str]] = []
+    now_ms = _now_ms()
+    # Filtered (but not yet aged/sorted) rows for --merge; displayed rows for --stats.
+    merged: List[columns.ResultTable] = []
+    shown: List[columns.ResultTable] = []
 
-    for file_path in search_files:
-        try:
-            payload = common.load_json(file_path)
-        except Exception as exc:  # pragma: no cover - best effort error surfacing
-            rich.print(f"Failed to read {file_path}: {exc}")
+    for parsed in _parsed_files(search_files, file, filters, jobs, cache):
+        file_path = parsed.path
+        if parsed.error is not None:
+            rich.print(f"Failed to read {file_path}: {parsed.error}")
+            continue
+        table = columns.ResultTable.from_results(parsed.results)
+        if merge:
+            matched = table.matching(filters)
+            merged.append(table.take(matched))
+            if not matched:
+                rich.print(f"No matching results in {file_path}.")
             continue
-        results = payload.get("results", [])
-        filtered_rows = [
-            _rows_from_result(result)
-            for result in results
-            if _matches(result.get("id", ""), library)
-            and _matches(result.get("title", ""), title)
-            and _matches(result.get("description", ""), description)
-        ]
-        if not filtered_rows:
+
+        selected = table.select(filters, now_ms=now_ms, max_age=max_age, sort=sort)
+        if not selected:
             rich.print(f"No matching results in {file_path}.")
             continue
+        _print_table(f"Results from: {file_path}", _display_rows(table, selected, now_ms))
+        if stats:
+            shown.append(table.take(selected))
 
-        if merge:
-            aggregated_rows.extend(filtered_rows)
-        else:
-            table = _new_table(f"Results from: {file_path}", filtered_rows)
-            for row in filtered_rows:
-                table.add_row(*row)
-            console.print(table)
+    if cache is not None and file is None and search_files:
+        cache.prune(search_files)
 
-    if merge and aggregated_rows:
-        table = _new_table("Search Results", aggregated_rows)
-        for row in aggregated_rows:
-            table.add_row(*row)
-        console.print(table)
+    if merge:
+        table = columns.ResultTable.concat(merged)
+        selected = table.select(now_ms=now_ms, max_age=max_age, sort=sort)
+        if selected:
+            _print_table("Search Results", _display_rows(table, selected, now_ms))
+            shown.append(table.take(selected))
+
+    if stats and shown:
+        _print_stats(columns.ResultTable.concat(shown), now_ms)
 
     rich.print("Done.")
 
-def _new_table(title:str, aggregated_rows: List[List[str]]) -> NegColTable:
+
+def _new_table(title: str, aggregated_rows: List[List[str]]) -> NegColTable:
     table = NegColTable(title=title)
     _configure_table(table, aggregated_rows)
     return table
 
 
+def _build_table(title: str, rows: List[List[str]]) -> NegColTable:
+    table = _new_table(title, rows)
+    for row in rows:
+        table.add_row(*row)
+    return table
+
+
+def _print_table(title: str, rows: List[List[str]]) -> None:
+    console.print(_build_table(title, rows))
+
+
+def _remote_parsed(filters: search_results.Filters) -> List[search_results.ParsedFile]:
+    try:
+        body = remote.get(
+            "review",
+            {"library": filters.library, "title": filters.title, "description": filters.description},
+        )
+    except remote.RemoteError as exc:
+        rich.print(f"Error: {exc}")
+        raise typer.Exit(code=1) from None
+    return [
+        search_results.ParsedFile(path=Path(entry["path"]), size=-1, mtime_ns=-1, results=entry["results"])
+        for entry in body["files"]
+    ]
+
+
+def _parsed_files(
+    search_files: List[Path],
+    file: Optional[Path],
+    filters: search_results.Filters,
+    jobs: int,
+    cache: Optional[search_results.ParseCache],
+) -> typing.Iterable[search_results.ParsedFile]:
+    # A running daemon already holds the parsed catalog of search_dir.
+    if file is None and remote.server_url():
+        return _remote_parsed(filters)
+    return search_results.iter_parsed(search_files, jobs=jobs, cache=cache, filters=filters)
+
+
+def _watched_paths(file: Optional[Path]) -> List[Path]:
+    if file is not None:
+        return [file]
+    return search_results.list_directory(common.config_path("search_dir"))
+
+
+def _watch_view(
+    parsed_files: List[search_results.ParsedFile],
+    filters: search_results.Filters,
+    merge: bool,
+    max_age: Optional[int],
+    sort: Optional[str],
+) -> Group:
+    now_ms = _now_ms()
+    tables: List[Any] = []
+    merged: List[columns.ResultTable] = []
+    for parsed in parsed_files:
+        table = columns.ResultTable.from_results(parsed.results)
+        if merge:
+            merged.append(table.take(table.matching(filters)))
+            continue
+        selected = table.select(filters, now_ms=now_ms, max_age=max_age, sort=sort)
+        if selected:
+            tables.append(_build_table(f"Results from: {parsed.path}", _display_rows(table, selected, now_ms)))
+    if merge:
+        table = columns.ResultTable.concat(merged)
+        selected = table.select(now_ms=now_ms, max_age=max_age, sort=sort)
+        if selected:
+            tables.append(_build_table("Search Results", _display_rows(table, selected, now_ms)))
+    if not tables:
+        tables.append(Text("Waiting for matching search results...", style="dim"))
+    return Group(*tables)
+
+
+def _watch(
+    file: Optional[Path],
+    filters: search_results.Filters,
+    merge: bool,
+    max_age: Optional[int],
+    sort: Optional[str],
+    jobs: int,
+    cache: Optional[search_results.ParseCache],
+    interval: float,
+) -> None:
+    """Keep the review table on screen, re-parsing only files that appear or change."""
+    catalog = search_results.Catalog(cache, filters)
+    catalog.refresh(_watched_paths(file), jobs=jobs)
+
+    def view() -> Group:
+        return _watch_view(catalog.parsed(), filters, merge, max_age, sort)
+
+    try:
+        with Live(view(), console=console, auto_refresh=False) as live:
+            while True:
+                time.sleep(interval)
+                if catalog.refresh(_watched_paths(file)):
+                    live.update(view(), refresh=True)
+    except KeyboardInterrupt:
+        pass
+
+
 @app.callback(invoke_without_command=True)
 def callback(
     ctx: typer.Context,
@@ -214,7 +353,61 @@ def callback(
         "--merge",
         help="Combine all rows into a single table instead of grouping per file.",
     ),
+    jobs: int = typer.Option(
+        os.cpu_count() or 1,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Worker processes used to parse search result files.",
+    ),
+    use_cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse parsed results for files whose size and mtime are unchanged.",
+    ),
+    max_age: Optional[int] = typer.Option(
+        None,
+        "--max-age",
+        min=0,
+        help="Only show libraries updated within this many days.",
+    ),
+    sort: Optional[str] = typer.Option(
+        None,
+        "--sort",
+        case_sensitive=False,
+        help="Sort rows by: updated (newest first), stars or trust (highest first).",
+    ),
+    watch: bool = typer.Option(
+        False,
+        "--watch",
+        "-w",
+        help="Keep the table on screen and refresh it as search result files are added or changed.",
+    ),
+    interval: float = typer.Option(
+        1.0,
+        "--interval",
+        min=0.1,
+        help="Seconds between checks for new or changed files in --watch mode.",
+    ),
+    stats: bool = typer.Option(
+        False,
+        "--stats",
+        help="Also print star/trust percentiles and median age of the displayed rows.",
+    ),
 ):
     if ctx.invoked_subcommand:
         return
-    _execute(file, library, title, description, merge)
+    _execute(
+        file,
+        library,
+        title,
+        description,
+        merge,
+        jobs=jobs,
+        use_cache=use_cache,
+        max_age=max_age,
+        sort=sort.lower() if sort else None,
+        watch=watch,
+        interval=interval,
+        stats=stats,
+    )
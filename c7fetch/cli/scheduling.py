@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import fnmatch
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def namespace(library_id: str) -> str:
+    """Return the owning org of a library id (``/vercel/next.js`` -> ``vercel``)."""
+    parts = [part for part in library_id.split("/") if part]
+    return parts[0] if parts else library_id
+
+
+def parse_priorities(specs: Optional[Iterable[str]]) -> List[Tuple[str, int]]:
+    """Parse ``PATTERN=N`` specs into ``(glob, priority)`` pairs."""
+    rules: List[Tuple[str, int]] = []
+    for spec in specs or []:
+        pattern, sep, value = spec.rpartition("=")
+        if not sep or not pattern:
+            raise ValueError(f"Invalid priority {spec!r}; expected PATTERN=N.")
+        try:
+            rules.append((pattern, int(value)))
+        except ValueError:
+            raise ValueError(f"Invalid priority {spec!r}; N must be an integer.") from None
+    return rules
+
+
+def priority_for(library_id: str, rules: Sequence[Tuple[str, int]]) -> int:
+    """Highest priority among the rules whose glob matches ``library_id`` (0 if none)."""
+    matched = [value for pattern, value in rules if fnmatch.fnmatch(library_id, pattern)]
+    return max(matched) if matched else 0
+
+
+def schedule(
+    items: Sequence[T],
+    *,
+    priority: Callable[[T], int],
+    size: Callable[[T], int],
+    group: Callable[[T], str],
+) -> List[T]:
+    """Order ``items`` for execution.
+
+    Higher priority runs first. Within a priority level, groups take turns
+    (round-robin fair queuing) so one large group cannot starve the others,
+    and each group's queue, as well as every round, runs smallest first.
+    """
+    levels: Dict[int, Dict[str, List[T]]] = defaultdict(lambda: defaultdict(list))
+    for item in items:
+        levels[priority(item)][group(item)].append(item)
+
+    ordered: List[T] = []
+    for level in sorted(levels, reverse=True):
+        queues: List[Deque[T]] = [deque(sorted(members, key=size)) for members in levels[level].values()]
+        while queues:
+            round_items = [queue.popleft() for queue in queues]
+            ordered.extend(sorted(round_items, key=size))
+            queues = [queue for queue in queues if queue]
+    return ordered
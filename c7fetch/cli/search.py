@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import re
 from pathlib import Path
 from typing import Optional
 
@@ -13,13 +12,6 @@ from . import common, typer_util
 
 app = typer_util.TyperAlias(module=__name__)
 
-_QUERY_SPLIT = re.compile(r"\|")
-
-
-def _normalize_queries(raw: str) -> list[str]:
-    queries = [part.strip() for part in _QUERY_SPLIT.split(raw)]
-    return [q for q in queries if q]
-
 
 def _resolve_base_dir(output_dir: Optional[Path]) -> Path:
     if output_dir is not None:
@@ -47,7 +39,7 @@ def _execute(
     output_dir: Optional[Path],
     overwrite: Optional[bool],
 ) -> None:
-    queries = _normalize_queries(query)
+    queries = common.normalize_queries(query)
     if not queries:
         raise typer.BadParameter("At least one non-empty query is required.")
 
@@ -67,7 +59,7 @@ def _execute(
     for q in queries:
         try:
             payload = api.search(q)
-        except api.MissingApiKey as exc:
+        except (api.MissingApiKey, api.OfflineMiss) as exc:
             rich.print(exc)
             raise typer.Exit(code=1) from None
         if output:
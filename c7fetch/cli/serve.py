@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import rich
+import typer
+
+from c7fetch.c7 import remote, server
+
+from . import common, typer_util
+
+app = typer_util.TyperAlias(module=__name__)
+
+
+def _execute(host: str, port: Optional[int], cache_ttl: float, verbose: bool, allow_remote: bool) -> None:
+    port_number = port if port is not None else common.int_setting("serve_port", 7077)
+    try:
+        daemon = server.create_server(
+            host, port_number, cache_ttl=cache_ttl, verbose=verbose, allow_remote=allow_remote
+        )
+    except ValueError as exc:
+        raise typer.BadParameter(f"{exc} Pass --allow-remote to expose the daemon (and your API key).") from None
+    except OSError as exc:
+        rich.print(f"Error: unable to listen on {host}:{port_number}: {exc}")
+        raise typer.Exit(code=1) from None
+
+    rich.print(f"Serving c7fetch on {daemon.url} (Ctrl-C to stop).")
+    rich.print(f"Forward requests to it with: c7fetch config set server_url {daemon.url}")
+    if not daemon.local_only:
+        rich.print(
+            f"Remote clients also need: c7fetch config set server_token <contents of {remote.token_path(daemon.port)}>"
+        )
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Also removes this daemon's token file.
+        daemon.server_close()
+    rich.print("Done.")
+
+
+@app.callback(invoke_without_command=True)
+def callback(
+    ctx: typer.Context,
+    host: str = typer.Option("127.0.0.1", "--host", help="Interface to bind (loopback unless --allow-remote)."),
+    port: Optional[int] = typer.Option(
+        None,
+        "--port",
+        "-p",
+        help="Port to listen on (defaults to configured serve_port).",
+    ),
+    cache_ttl: float = typer.Option(
+        300.0,
+        "--cache-ttl",
+        min=0,
+        help="Seconds to keep search/fetch responses in memory (0 disables).",
+    ),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Log every request."),
+    allow_remote: bool = typer.Option(
+        False,
+        "--allow-remote",
+        help="Allow --host to be a non-loopback interface; clients then need the server_token setting.",
+    ),
+):
+    if ctx.invoked_subcommand:
+        return
+    _execute(host, port, cache_ttl, verbose, allow_remote)
@@ -46,6 +46,82 @@ S_REQUEST_DELAY = SettingDesc(
     desc="Delay between API requests (in milliseconds)",
     default="1000",
 )
+S_ADAPTIVE_START_TOKENS = SettingDesc(
+    key="adaptive_start_tokens",
+    desc="Initial token budget for adaptive fetches",
+    default="2000",
+)
+S_ADAPTIVE_MAX_TOKENS = SettingDesc(
+    key="adaptive_max_tokens",
+    desc="Token budget cap for adaptive fetches",
+    default="100000",
+)
+S_FULLTEXT_INDEX = SettingDesc(
+    key="fulltext_index",
+    desc="Maintain a full-text index of fetched documents for `c7fetch query`",
+    default="false",
+)
+S_WRITE_CHUNKS = SettingDesc(
+    key="write_chunks",
+    desc="Write a section-level JSONL chunk file next to each fetched text document",
+    default="false",
+)
+S_SERVER_URL = SettingDesc(
+    key="server_url",
+    desc="URL of a running `c7fetch serve` daemon to forward search/fetch/review to",
+)
+S_SERVE_PORT = SettingDesc(key="serve_port", desc="Port for `c7fetch serve` to listen on", default="7077")
+S_SERVER_TOKEN = SettingDesc(
+    key="server_token",
+    desc="Token for a `c7fetch serve` daemon on another host (local daemons publish theirs in serve_token)",
+)
+S_PROBE_MAX_TOKENS = SettingDesc(
+    key="probe_max_tokens",
+    desc="With fetch --probe, skip libraries whose catalog size exceeds this many tokens (empty: no cap)",
+)
+S_OUTPUT_LAYOUT = SettingDesc(
+    key="output_layout",
+    desc="Fetched file layout under output_dir: flat, org (one directory per org) or hash (hashed shards)",
+    default="flat",
+)
+S_KEEP_HISTORY = SettingDesc(
+    key="keep_history",
+    desc="Record every fetched revision in the delta-compressed history store",
+    default="false",
+)
+S_HISTORY_KEYFRAME_INTERVAL = SettingDesc(
+    key="history_keyframe_interval",
+    desc="Store a full copy every N revisions in the history store (deltas in between)",
+    default="10",
+)
+S_SNIPPET_STORE = SettingDesc(
+    key="snippet_store",
+    desc="Ingest --format json fetches into the indexed snippet store",
+    default="false",
+)
+S_OFFLINE = SettingDesc(
+    key="offline",
+    desc="Serve search/fetch only from the local response store (see c7fetch warm)",
+    default="false",
+)
+S_RESPONSE_STORE = SettingDesc(
+    key="response_store",
+    desc="Path of the response store written by c7fetch warm (defaults to the config directory)",
+)
+S_APIKEY_POOL = SettingDesc(
+    key="apikey_pool",
+    desc="Comma-separated API keys (or env:VAR entries) to spread requests over; overrides apikey",
+)
+S_QUEUE_DIR = SettingDesc(
+    key="queue_dir",
+    desc="Shared work queue directory for c7fetch queue submit/work/status",
+    default="{output_dir}/.queue",
+)
+S_QUEUE_LEASE_SECONDS = SettingDesc(
+    key="queue_lease_seconds",
+    desc="Seconds a queue worker's claim lasts without a heartbeat before others may take it over",
+    default="60",
+)
 
 SCHEMA = [
     S_APIKEY,
@@ -58,6 +134,23 @@ SCHEMA = [
     S_DEFAULT_FORMAT,
     S_USER_AGENT,
     S_REQUEST_DELAY,
+    S_ADAPTIVE_START_TOKENS,
+    S_ADAPTIVE_MAX_TOKENS,
+    S_FULLTEXT_INDEX,
+    S_WRITE_CHUNKS,
+    S_SERVER_URL,
+    S_SERVE_PORT,
+    S_SERVER_TOKEN,
+    S_PROBE_MAX_TOKENS,
+    S_OUTPUT_LAYOUT,
+    S_KEEP_HISTORY,
+    S_HISTORY_KEYFRAME_INTERVAL,
+    S_SNIPPET_STORE,
+    S_OFFLINE,
+    S_RESPONSE_STORE,
+    S_APIKEY_POOL,
+    S_QUEUE_DIR,
+    S_QUEUE_LEASE_SECONDS,
 ]
 
 SETTINGS_KEY2DESC = {s.key: s for s in SCHEMA}
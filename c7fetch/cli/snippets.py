@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+import rich
+import typer
+from rich.markup import escape
+from rich.table import Table
+
+from c7fetch.store import snippets
+
+from . import common, typer_util
+
+app = typer_util.TyperAlias(module=__name__)
+
+
+def _execute(
+    library: Optional[str],
+    topic: Optional[str],
+    title: Optional[str],
+    source: Optional[str],
+    language: Optional[str],
+    limit: int,
+    as_json: bool,
+    output_dir: Optional[Path],
+) -> None:
+    path = snippets.store_path(common.resolve_output_dir(output_dir))
+    if not path.exists():
+        rich.print(f"Error: no snippet store at {path}; fetch with --format json --snippets first.")
+        raise typer.Exit(code=1)
+
+    try:
+        with snippets.SnippetStore(path) as store:
+            rows = store.select(
+                library=library, topic=topic, title=title, source=source, language=language, limit=limit
+            )
+    except snippets.SnippetStoreError as exc:
+        rich.print(f"Error: {exc}")
+        raise typer.Exit(code=1) from None
+
+    if as_json:
+        for row in rows:
+            typer.echo(json.dumps(asdict(row), ensure_ascii=False))
+        return
+    if not rows:
+        rich.print("No snippets match.")
+        raise typer.Exit(code=1)
+
+    table = Table(title=f"Snippets ({len(rows)})")
+    table.add_column("Library", style="cyan", no_wrap=True)
+    table.add_column("Topic", style="magenta")
+    table.add_column("Title")
+    table.add_column("Language", style="green")
+    table.add_column("Source", style="dim")
+    for row in rows:
+        table.add_row(
+            escape(row.library_id),
+            escape(row.topic or "-"),
+            escape(row.title or "-"),
+            escape(row.language or "-"),
+            escape(row.source or "-"),
+        )
+    rich.print(table)
+
+
+@app.callback(invoke_without_command=True)
+def callback(
+    ctx: typer.Context,
+    library: Optional[str] = typer.Option(None, "--library", "-l", help="Glob pattern matched against library id."),
+    topic: Optional[str] = typer.Option(None, "--topic", help="Only snippets fetched with this topic."),
+    title: Optional[str] = typer.Option(None, "--title", "-t", help="Glob pattern matched against snippet title."),
+    source: Optional[str] = typer.Option(None, "--source", "-s", help="Glob pattern matched against snippet source."),
+    language: Optional[str] = typer.Option(None, "--language", help="Code language (case-insensitive)."),
+    limit: int = typer.Option(50, "--limit", "-n", min=1, help="Maximum number of snippets to show."),
+    as_json: bool = typer.Option(False, "--json", help="Print one JSON object per snippet, including code."),
+    output_dir: Optional[Path] = typer.Option(
+        None,
+        "--output-dir",
+        help="Directory holding the snippet store (defaults to configured output_dir).",
+        file_okay=False,
+        resolve_path=True,
+    ),
+):
+    if ctx.invoked_subcommand:
+        return
+    _execute(library, topic, title, source, language, limit, as_json, output_dir)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional
+
+import rich
+import typer
+
+from c7fetch.c7 import api, offline
+
+from . import common, typer_util
+
+app = typer_util.TyperAlias(module=__name__)
+
+
+@dataclass
+class _WarmItem:
+    kind: str
+    key: str
+    label: str
+    query: Optional[str] = None
+    library_id: Optional[str] = None
+    topic: Optional[str] = None
+    tokens: Optional[int] = None
+    fmt: str = "text"
+
+
+def _parse_manifest(path: Path) -> List[_WarmItem]:
+    """Read ``{"searches": [query, ...], "fetches": [library_id | {library_id, topic, tokens, format}, ...]}``."""
+    try:
+        data = common.load_json(path)
+    except (OSError, ValueError) as exc:
+        raise typer.BadParameter(f"Unable to read manifest {path}: {exc}") from None
+    if not isinstance(data, dict):
+        raise typer.BadParameter("The manifest must be a JSON object with 'searches' and/or 'fetches'.")
+
+    items: List[_WarmItem] = []
+    for entry in data.get("searches", []):
+        # Key searches exactly as `c7fetch search` will look them up.
+        queries = common.normalize_queries(entry) if isinstance(entry, str) else []
+        if not queries:
+            raise typer.BadParameter(f"Invalid search entry in manifest: {entry!r}")
+        for query in queries:
+            items.append(_WarmItem("search", offline.search_key(query), f"search {query!r}", query=query))
+    for entry in data.get("fetches", []):
+        spec: Any = {"library_id": entry} if isinstance(entry, str) else entry
+        if not isinstance(spec, dict) or not spec.get("library_id"):
+            raise typer.BadParameter(f"Invalid fetch entry in manifest: {entry!r}")
+        fmt = str(spec.get("format", "text")).lower()
+        if fmt not in {"text", "json"}:
+            raise typer.BadParameter(f"Invalid format in manifest entry {entry!r}; use 'text' or 'json'.")
+        library_id, topic = spec["library_id"], spec.get("topic")
+        items.append(
+            _WarmItem(
+                "fetch",
+                offline.fetch_key(library_id, fmt, topic),
+                f"fetch {library_id}" + (f" ({topic})" if topic else ""),
+                library_id=library_id,
+                topic=topic,
+                tokens=spec.get("tokens") or common.default_token_count(),
+                fmt=fmt,
+            )
+        )
+    return items
+
+
+def _warm_one(item: _WarmItem) -> tuple[Any, str]:
+    if item.kind == "search":
+        return api.search(item.query or ""), "application/json"
+    response = api.fetch(item.library_id or "", tokens=item.tokens, format=item.fmt, topic=item.topic)
+    return response.payload, response.content_type
+
+
+def _execute(manifest: Path, jobs: int, store_path: Optional[Path]) -> None:
+    if offline.is_enabled():
+        raise typer.BadParameter("warm needs network access; drop --offline (or the offline setting).")
+    items = _parse_manifest(manifest)
+    if not items:
+        rich.print("Manifest lists no searches or fetches.")
+        raise typer.Exit(code=1)
+    if not api.is_api_key_configured():
+        rich.print("Error: Context7 API key is not configured. Set one via `c7fetch config set apikey <value>`.")
+        raise typer.Exit(code=1)
+
+    target = store_path or offline.store_path()
+    failures = 0
+    try:
+        store = offline.ResponseStore(target)
+    except offline.StoreError as exc:
+        rich.print(f"Error: {exc}")
+        raise typer.Exit(code=1) from None
+    with store, ThreadPoolExecutor(max_workers=max(1, min(jobs, len(items)))) as pool:
+        futures = [pool.submit(_warm_one, item) for item in items]
+        for item, future in zip(items, futures, strict=True):
+            try:
+                body, content_type = future.result()
+            except api.MissingApiKey as exc:
+                for pending in futures:
+                    pending.cancel()
+                rich.print(str(exc))
+                raise typer.Exit(code=1) from None
+            except api.ApiError as exc:
+                failures += 1
+                rich.print(f"Failed to {item.label}: {exc}")
+                continue
+            store.put(item.kind, item.key, body, content_type, item.tokens)
+            rich.print(f"Stored {item.label}")
+        total = store.count()
+
+    rich.print(f"Warmed {len(items) - failures} of {len(items)} request(s); {total} response(s) in {target}")
+    if failures:
+        raise typer.Exit(code=1)
+
+
+@app.callback(invoke_without_command=True)
+def callback(
+    ctx: typer.Context,
+    manifest: Path = typer.Argument(
+        ...,
+        metavar="MANIFEST",
+        help="JSON manifest listing 'searches' and 'fetches' to store for offline use.",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    jobs: int = typer.Option(4, "--jobs", "-j", min=1, help="Requests to run concurrently."),
+    store_path: Optional[Path] = typer.Option(
+        None,
+        "--store",
+        help="Response store to fill (defaults to the response_store setting).",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+):
+    if ctx.invoked_subcommand:
+        return
+    _execute(manifest, jobs, store_path)
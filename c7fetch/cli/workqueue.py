@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import rich
+import typer
+from rich.table import Table
+
+from c7fetch.c7 import api
+from c7fetch.store import workqueue
+
+from . import common, fetching, typer_util
+
+app = typer_util.TyperAlias(name="queue")
+
+_QUEUE_DIR_HELP = "Shared queue directory (defaults to configured queue_dir)."
+
+
+def _resolve_queue(queue_dir: Optional[Path]) -> workqueue.WorkQueue:
+    return workqueue.WorkQueue(queue_dir if queue_dir is not None else common.config_path("queue_dir"))
+
+
+def _lease_seconds(override: Optional[float]) -> float:
+    if override is not None:
+        return override
+    return float(common.int_setting("queue_lease_seconds", 60))
+
+
+class _Heartbeat:
+    """Renews a lease every third of its TTL until stopped; records whether it was lost."""
+
+    def __init__(self, queue: workqueue.WorkQueue, lease: workqueue.Lease, ttl: float):
+        self.queue = queue
+        self.lease = lease
+        self.ttl = ttl
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            if not self.queue.heartbeat(self.lease, self.ttl):
+                self.lost = True
+                return
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+@app.command()
+def submit(
+    library_ids: List[str] = typer.Argument(..., metavar="LIBRARY_ID", help="Library identifiers to enqueue."),
+    topics: Optional[List[str]] = typer.Option(None, "--topic", help="Topic to fetch (repeatable)."),
+    tokens: Optional[int] = typer.Option(None, "--tokens", "-t", help="Maximum tokens to request per document."),
+    fmt: str = typer.Option("text", "--format", "-f", case_sensitive=False, help="Output format: text or json."),
+    queue_dir: Optional[Path] = typer.Option(None, "--queue-dir", help=_QUEUE_DIR_HELP, file_okay=False),
+):
+    """Add fetch jobs to the shared queue (already queued jobs are left alone)."""
+    fmt_normalized = fmt.lower()
+    if fmt_normalized not in {"text", "json"}:
+        raise typer.BadParameter("--format must be either 'text' or 'json'.")
+    queue = _resolve_queue(queue_dir)
+    added = 0
+    for library_id in library_ids:
+        for topic in fetching.resolve_topics(topics, None):
+            added += queue.submit(workqueue.QueueJob(library_id, topic, tokens, fmt_normalized))
+    rich.print(f"Queued {added} new job(s) in {queue.root}.")
+
+
+@app.command()
+def work(
+    queue_dir: Optional[Path] = typer.Option(None, "--queue-dir", help=_QUEUE_DIR_HELP, file_okay=False),
+    worker_id: Optional[str] = typer.Option(None, "--worker-id", help="Name recorded on leases and results."),
+    lease: Optional[float] = typer.Option(
+        None, "--lease", min=1, help="Lease length in seconds (defaults to queue_lease_seconds)."
+    ),
+    wait: bool = typer.Option(
+        False, "--wait", help="Keep polling while other workers still hold leases, instead of exiting when idle."
+    ),
+    poll: float = typer.Option(2.0, "--poll", min=0.1, help="Seconds between polls with --wait."),
+    output_dir: Optional[Path] = typer.Option(
+        None,
+        "--output-dir",
+        help="Directory for fetched documents (defaults to configured output_dir).",
+        file_okay=False,
+        resolve_path=True,
+    ),
+):
+    """Claim and fetch jobs from the queue until none are left."""
+    if not api.is_api_key_configured():
+        rich.print("Error: Context7 API key is not configured. Set one via `c7fetch config set apikey <value>`.")
+        raise typer.Exit(code=1)
+    queue = _resolve_queue(queue_dir)
+    worker = worker_id or workqueue.default_worker_id()
+    ttl = _lease_seconds(lease)
+    base_dir = common.resolve_output_dir(output_dir)
+    completed = failed = 0
+
+    with contextlib.ExitStack() as stack:
+        writers: Dict[str, fetching.OutputWriter] = {}
+
+        def writer_for(fmt: str) -> fetching.OutputWriter:
+            if fmt not in writers:
+                writers[fmt] = stack.enter_context(fetching.open_writer(base_dir, fmt))
+            return writers[fmt]
+
+        while True:
+            claimed = queue.claim(worker, ttl)
+            if claimed is None:
+                if wait and not queue.progress().finished:
+                    time.sleep(poll)
+                    continue
+                break
+            job = claimed.job
+            fetch_job = fetching.FetchJob(job.library_id, job.topic, job.tokens or common.default_token_count())
+            try:
+                with _Heartbeat(queue, claimed, ttl) as heartbeat:
+                    outcome = fetching.run_job(fetch_job, job.format)
+            except (api.MissingApiKey, api.OfflineMiss) as exc:
+                queue.release(claimed)
+                rich.print(str(exc))
+                raise typer.Exit(code=1) from None
+            except api.ApiError as exc:
+                failed += 1
+                queue.complete(claimed, workqueue.STATUS_FAILED, error=str(exc))
+                rich.print(f"Failed {job.library_id}: {exc}")
+                continue
+            except BaseException:
+                queue.release(claimed)
+                raise
+            if heartbeat.lost:
+                rich.print(f"Lost the lease on {job.library_id}; another worker took it over.")
+                continue
+            writer = writer_for(job.format)
+            writer.store(outcome)
+            queue.complete(
+                claimed,
+                path=str(writer.target_for(fetch_job)),
+                elapsed=round(outcome.elapsed, 3),
+            )
+            completed += 1
+
+    rich.print(f"Worker {worker} finished {completed} job(s), {failed} failed.")
+
+
+def _print_progress(queue: workqueue.WorkQueue, progress: workqueue.QueueProgress) -> None:
+    table = Table(title=f"Queue {queue.root}")
+    for column in ("Total", "Done", "Failed", "In progress", "Pending"):
+        table.add_column(column, justify="right")
+    table.add_row(
+        str(progress.total), str(progress.done), str(progress.failed), str(progress.leased), str(progress.pending)
+    )
+    rich.print(table)
+    if progress.by_worker:
+        workers = Table(title="Finished by worker")
+        workers.add_column("Worker", style="cyan")
+        workers.add_column("Jobs", justify="right")
+        for name, count in sorted(progress.by_worker.items()):
+            workers.add_row(name, str(count))
+        rich.print(workers)
+
+
+@app.command()
+def status(
+    queue_dir: Optional[Path] = typer.Option(None, "--queue-dir", help=_QUEUE_DIR_HELP, file_okay=False),
+    follow: bool = typer.Option(False, "--follow", help="Report progress every --interval until the queue drains."),
+    interval: float = typer.Option(5.0, "--interval", min=0.1, help="Seconds between reports with --follow."),
+):
+    """Report aggregate progress across all workers."""
+    queue = _resolve_queue(queue_dir)
+    progress = queue.progress()
+    while follow and not progress.finished:
+        rich.print(
+            f"{progress.done + progress.failed}/{progress.total} finished, "
+            f"{progress.leased} in progress, {progress.pending} pending"
+        )
+        time.sleep(interval)
+        progress = queue.progress()
+    # Only the final report reads every outcome record, for the per-worker breakdown.
+    _print_progress(queue, queue.progress(by_worker=True))
+    if progress.failed:
+        raise typer.Exit(code=1)
@@ -0,0 +1,163 @@
+"""Append-only, compressed single-file archive for fetched documents.
+
+Each fetched payload is zlib-compressed into one row of a SQLite database; an index
+on ``(library_id, topic, format)`` gives random access without unpacking the rest.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    library_id TEXT NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    format TEXT NOT NULL DEFAULT 'text',
+    content_type TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+# Archives written before the format column existed keyed revisions on (library_id, topic) only.
+_MIGRATE_FORMAT = """
+ALTER TABLE documents ADD COLUMN format TEXT NOT NULL DEFAULT 'text';
+UPDATE documents SET format = 'json' WHERE content_type = 'application/json';
+DROP INDEX IF EXISTS documents_key;
+"""
+
+_INDEX = "CREATE INDEX IF NOT EXISTS documents_format_key ON documents (library_id, topic, format, id);"
+
+_COMPRESSION_LEVEL = 6
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be opened or a document is missing."""
+
+
+@dataclass
+class ArchiveEntry:
+    id: int
+    library_id: str
+    topic: Optional[str]
+    format: str
+    content_type: str
+    fetched_at: float
+    size: int
+
+
+def _entry(row: tuple) -> ArchiveEntry:
+    return ArchiveEntry(
+        id=row[0],
+        library_id=row[1],
+        topic=row[2] or None,
+        format=row[3],
+        content_type=row[4],
+        fetched_at=row[5],
+        size=row[6],
+    )
+
+
+def encode_payload(payload: Any, content_type: str) -> bytes:
+    if content_type == "application/json":
+        return json.dumps(payload, sort_keys=True).encode("utf-8")
+    return str(payload).encode("utf-8")
+
+
+def decode_payload(data: bytes, content_type: str) -> Any:
+    if content_type == "application/json":
+        return json.loads(data)
+    return data.decode("utf-8")
+
+
+class Archive:
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(path)
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+            if "format" not in columns:
+                self._conn.executescript(_MIGRATE_FORMAT)
+            self._conn.execute(_INDEX)
+        except sqlite3.Error as exc:
+            raise ArchiveError(f"Unable to open archive {path}: {exc}") from exc
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def append(self, library_id: str, topic: Optional[str], payload: Any, content_type: str, fmt: str = "text") -> int:
+        """Store a new revision of ``library_id``/``topic`` in ``fmt``; earlier revisions are kept."""
+        raw = encode_payload(payload, content_type)
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO documents (library_id, topic, format, content_type, fetched_at, size, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    library_id,
+                    topic or "",
+                    fmt,
+                    content_type,
+                    time.time(),
+                    len(raw),
+                    zlib.compress(raw, _COMPRESSION_LEVEL),
+                ),
+            )
+        return int(cursor.lastrowid or 0)
+
+    def entries(self, library_id: Optional[str] = None) -> List[ArchiveEntry]:
+        sql = "SELECT id, library_id, topic, format, content_type, fetched_at, size FROM documents"
+        params: tuple = ()
+        if library_id is not None:
+            sql += " WHERE library_id = ?"
+            params = (library_id,)
+        rows = self._conn.execute(sql + " ORDER BY id", params).fetchall()
+        return [_entry(row) for row in rows]
+
+    def contains(self, library_id: str, topic: Optional[str] = None, fmt: str = "text") -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM documents WHERE library_id = ? AND topic = ? AND format = ? LIMIT 1",
+            (library_id, topic or "", fmt),
+        ).fetchone()
+        return row is not None
+
+    def read_bytes(self, library_id: str, topic: Optional[str] = None, fmt: str = "text") -> tuple[bytes, str]:
+        """Return the latest raw payload and its content type for ``library_id``/``topic`` in ``fmt``."""
+        row = self._conn.execute(
+            "SELECT data, content_type FROM documents WHERE library_id = ? AND topic = ? AND format = ? "
+            "ORDER BY id DESC LIMIT 1",
+            (library_id, topic or "", fmt),
+        ).fetchone()
+        if row is None:
+            label = f"{library_id} (topic {topic})" if topic else library_id
+            raise ArchiveError(f"No archived {fmt} document for {label} in {self.path}")
+        return zlib.decompress(row[0]), row[1]
+
+    def read(self, library_id: str, topic: Optional[str] = None, fmt: str = "text") -> Any:
+        data, content_type = self.read_bytes(library_id, topic, fmt)
+        return decode_payload(data, content_type)
+
+    def iter_latest(self) -> Iterator[tuple[ArchiveEntry, bytes]]:
+        """Stream the newest revision of every archived document."""
+        rows = self._conn.execute(
+            "SELECT id, library_id, topic, format, content_type, fetched_at, size, data FROM documents "
+            "WHERE id IN (SELECT MAX(id) FROM documents GROUP BY library_id, topic, format) "
+            "ORDER BY library_id, topic, format"
+        )
+        for row in rows:
+            yield _entry(row), zlib.decompress(row[7])
@@ -0,0 +1,108 @@
+"""Section-aware splitting of fetched markdown into snippet-sized chunks."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+CHUNK_SUFFIX = ".chunks.jsonl"
+
+# Context7 separates snippets with a bare run of dashes; headings start new sections.
+_DELIMITER = re.compile(rb"^-{10,}\s*$")
+_HEADING = re.compile(rb"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_TITLE = re.compile(rb"^TITLE:\s*(.*?)\s*$")
+_FENCE = re.compile(rb"^\s*(```|~~~)")
+
+
+@dataclass
+class Section:
+    start: int
+    end: int
+    title: Optional[str]
+
+
+@dataclass
+class Chunk:
+    index: int
+    title: Optional[str]
+    start: int
+    end: int
+    sha256: str
+    text: str
+
+
+def chunk_path(document: Path) -> Path:
+    return document.with_name(document.name + CHUNK_SUFFIX)
+
+
+def iter_sections(lines: Iterable[bytes]) -> Iterator[Section]:
+    """Yield the byte ranges of the sections formed by ``lines`` (each including its line ending)."""
+    offset = 0
+    start = 0
+    title: Optional[str] = None
+    has_body = False
+    in_fence = False
+    for line in lines:
+        size = len(line)
+        stripped = bytes(line).rstrip(b"\r\n")
+        if _FENCE.match(stripped):
+            in_fence = not in_fence
+        elif not in_fence:
+            if _DELIMITER.match(stripped):
+                if has_body:
+                    yield Section(start, offset, title)
+                start, title, has_body = offset + size, None, False
+                offset += size
+                continue
+            heading = _HEADING.match(stripped)
+            if heading and has_body:
+                yield Section(start, offset, title)
+                start, title, has_body = offset, None, False
+            if title is None:
+                label = heading or _TITLE.match(stripped)
+                if label:
+                    title = label.group(label.lastindex or 0).decode("utf-8", errors="replace")
+        if stripped.strip():
+            has_body = True
+        offset += size
+    if has_body:
+        yield Section(start, offset, title)
+
+
+def split_markdown(text: str) -> List[Chunk]:
+    """Split ``text`` along snippet delimiters and headings, keeping fenced code blocks intact."""
+    data = text.encode("utf-8")
+    chunks: List[Chunk] = []
+    for section in iter_sections(data.splitlines(keepends=True)):
+        raw = data[section.start : section.end]
+        chunks.append(
+            Chunk(
+                index=len(chunks),
+                title=section.title,
+                start=section.start,
+                end=section.end,
+                sha256=hashlib.sha256(raw).hexdigest(),
+                text=raw.decode("utf-8"),
+            )
+        )
+    return chunks
+
+
+def write_chunks(document: Path, text: str) -> Path:
+    """Write the JSONL chunk file for ``document`` and return its path."""
+    target = chunk_path(document)
+    lines = [json.dumps(asdict(chunk), ensure_ascii=False) for chunk in split_markdown(text)]
+    target.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+    return target
+
+
+def read_chunks(path: Path) -> Iterator[Chunk]:
+    """Stream chunks back from a JSONL chunk file."""
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield Chunk(**json.loads(line))
@@ -0,0 +1,217 @@
+"""Column-oriented view of trimmed search results for filtering, sorting and aggregating.
+
+Numeric fields live in ``array`` columns (viewed as NumPy arrays when NumPy is
+installed) and repeated strings are interned, so selections operate on whole
+columns and only the rows finally displayed are turned into Python objects.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import math
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from c7fetch.store import search_results
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is not installed
+    np = None  # type: ignore[assignment]
+
+# Sentinel for a missing timestamp; it sorts and compares below every real value.
+MISSING_MS = -(2**63)
+MS_PER_DAY = 86_400_000
+
+# Sortable numeric columns; all sort descending with missing values last.
+SORT_COLUMNS = {"updated": "updated_ms", "stars": "stars", "trust": "trust"}
+
+
+def _intern(value: Any) -> str:
+    return sys.intern(value) if isinstance(value, str) else sys.intern(str(value))
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Linear interpolation between closest ranks (NumPy's default method)."""
+    position = (len(sorted_values) - 1) * q / 100
+    low = math.floor(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+@dataclass
+class ResultTable:
+    ids: List[str] = field(default_factory=list)
+    titles: List[str] = field(default_factory=list)
+    descriptions: List[str] = field(default_factory=list)
+    updated_raw: List[Optional[str]] = field(default_factory=list)
+    updated_ms: array = field(default_factory=lambda: array("q"))
+    # -1 (Context7's "unknown") and missing stars are both stored as -1.
+    stars: array = field(default_factory=lambda: array("q"))
+    # Missing trust scores are NaN.
+    trust: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, result: Dict[str, Any]) -> None:
+        updated_ms = result.get(search_results.UPDATED_MS)
+        if updated_ms is None:
+            updated_ms = search_results.parse_timestamp_ms(result.get("lastUpdateDate"))
+        stars = result.get("stars")
+        trust = result.get("trustScore")
+        self.ids.append(_intern(result.get("id", "-")))
+        self.titles.append(_intern(result.get("title", "-")))
+        self.descriptions.append(result.get("description", ""))
+        self.updated_raw.append(result.get("lastUpdateDate"))
+        self.updated_ms.append(MISSING_MS if updated_ms is None else int(updated_ms))
+        self.stars.append(stars if isinstance(stars, int) and stars >= 0 else -1)
+        self.trust.append(float(trust) if isinstance(trust, (int, float)) else math.nan)
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict[str, Any]]) -> "ResultTable":
+        table = cls()
+        for result in results:
+            table.append(result)
+        return table
+
+    def all(self) -> List[int]:
+        return list(range(len(self)))
+
+    def _column(self, name: str) -> Any:
+        column = getattr(self, name)
+        if np is not None:
+            return np.frombuffer(column, dtype=np.int64 if column.typecode == "q" else np.float64)
+        return column
+
+    def _missing(self, name: str, index: int) -> bool:
+        value = getattr(self, name)[index]
+        if name == "updated_ms":
+            return value == MISSING_MS
+        if name == "stars":
+            return value < 0
+        return math.isnan(value)
+
+    def matching(self, filters: search_results.Filters, indices: Optional[List[int]] = None) -> List[int]:
+        """Apply the glob filters, matching each distinct (interned) string only once."""
+        selected = self.all() if indices is None else indices
+        for values, pattern in (
+            (self.ids, filters.library),
+            (self.titles, filters.title),
+            (self.descriptions, filters.description),
+        ):
+            if not pattern:
+                continue
+            verdicts: Dict[str, bool] = {}
+            kept = []
+            for index in selected:
+                value = values[index]
+                verdict = verdicts.get(value)
+                if verdict is None:
+                    verdict = verdicts[value] = fnmatch.fnmatch(value, pattern)
+                if verdict:
+                    kept.append(index)
+            selected = kept
+        return selected
+
+    def updated_since(self, cutoff_ms: int, indices: Optional[List[int]] = None) -> List[int]:
+        if np is not None:
+            mask = self._column("updated_ms") >= cutoff_ms
+            if indices is None:
+                return np.flatnonzero(mask).tolist()
+            chosen = np.asarray(indices, dtype=np.int64)
+            return chosen[mask[chosen]].tolist()
+        selected = self.all() if indices is None else indices
+        return [index for index in selected if self.updated_ms[index] >= cutoff_ms]
+
+    def order(self, sort: str, indices: Optional[List[int]] = None) -> List[int]:
+        """Return ``indices`` sorted descending on ``sort``; ties keep their order, missing values go last."""
+        name = SORT_COLUMNS[sort]
+        selected = self.all() if indices is None else indices
+        if np is not None:
+            chosen = np.asarray(selected, dtype=np.int64)
+            values = self._column(name)[chosen].astype(np.float64)
+            if name == "updated_ms":
+                values[values == MISSING_MS] = -np.inf
+            elif name == "stars":
+                values[values < 0] = -np.inf
+            values[np.isnan(values)] = -np.inf
+            return chosen[np.argsort(-values, kind="stable")].tolist()
+        column = getattr(self, name)
+
+        def key(index: int) -> tuple:
+            missing = self._missing(name, index)
+            return (missing, 0 if missing else -column[index])
+
+        return sorted(selected, key=key)
+
+    def select(
+        self,
+        filters: Optional[search_results.Filters] = None,
+        *,
+        now_ms: int,
+        max_age: Optional[int] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """Row indices after filtering, the ``max_age`` cutoff and sorting, truncated to ``limit``."""
+        indices = self.matching(filters) if filters is not None else self.all()
+        if max_age is not None:
+            indices = self.updated_since(now_ms - max_age * MS_PER_DAY, indices)
+        if sort is not None:
+            indices = self.order(sort, indices)
+        return indices[:limit] if limit is not None else indices
+
+    def age_days(self, index: int, now_ms: int) -> Optional[int]:
+        updated = self.updated_ms[index]
+        if updated == MISSING_MS:
+            return None
+        elapsed = now_ms - updated
+        return 0 if elapsed <= 0 else -(-elapsed // MS_PER_DAY)
+
+    def percentiles(self, name: str, quantiles: Sequence[float], indices: Optional[List[int]] = None) -> List[float]:
+        """Percentiles of the non-missing values of column ``name`` among ``indices`` (NaN when empty)."""
+        selected = self.all() if indices is None else indices
+        if np is not None:
+            values = self._column(name)[np.asarray(selected, dtype=np.int64)].astype(np.float64)
+            if name == "updated_ms":
+                values = values[values != MISSING_MS]
+            elif name == "stars":
+                values = values[values >= 0]
+            values = values[~np.isnan(values)]
+            if not len(values):
+                return [math.nan for _ in quantiles]
+            return [float(v) for v in np.percentile(values, list(quantiles))]
+        column = getattr(self, name)
+        present = sorted(float(column[i]) for i in selected if not self._missing(name, i))
+        if not present:
+            return [math.nan for _ in quantiles]
+        return [_percentile(present, q) for q in quantiles]
+
+    def take(self, indices: Iterable[int]) -> "ResultTable":
+        """Copy the given rows, in order, into a new table."""
+        taken = ResultTable()
+        for index in indices:
+            taken.ids.append(self.ids[index])
+            taken.titles.append(self.titles[index])
+            taken.descriptions.append(self.descriptions[index])
+            taken.updated_raw.append(self.updated_raw[index])
+            taken.updated_ms.append(self.updated_ms[index])
+            taken.stars.append(self.stars[index])
+            taken.trust.append(self.trust[index])
+        return taken
+
+    @classmethod
+    def concat(cls, tables: Iterable["ResultTable"]) -> "ResultTable":
+        merged = cls()
+        for table in tables:
+            merged.ids.extend(table.ids)
+            merged.titles.extend(table.titles)
+            merged.descriptions.extend(table.descriptions)
+            merged.updated_raw.extend(table.updated_raw)
+            merged.updated_ms.extend(table.updated_ms)
+            merged.stars.extend(table.stars)
+            merged.trust.extend(table.trust)
+        return merged
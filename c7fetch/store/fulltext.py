@@ -0,0 +1,144 @@
+"""Incremental SQLite FTS5 index over fetched documents."""
+
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from c7fetch.store import reader
+
+INDEX_FILENAME = ".c7fetch-fulltext.sqlite"
+DOC_SUFFIXES = {".md", ".json"}
+
+# Control characters never appear in fetched markdown, so they make safe highlight markers.
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(body, tokenize = 'porter unicode61');
+"""
+
+
+class FullTextError(Exception):
+    """Raised when the full-text index cannot be built or queried."""
+
+
+@dataclass
+class Hit:
+    path: Path
+    score: float
+    snippet: str
+
+
+def index_path(base_dir: Path) -> Path:
+    return base_dir / INDEX_FILENAME
+
+
+def iter_documents(base_dir: Path, exclude: Iterable[Path] = ()) -> Iterator[Path]:
+    """Yield fetched document files under ``base_dir``, skipping hidden entries and ``exclude`` trees."""
+    excluded = [p.resolve() for p in exclude]
+    for path in sorted(base_dir.rglob("*")):
+        if path.suffix not in DOC_SUFFIXES or not path.is_file():
+            continue
+        relative = path.relative_to(base_dir)
+        if any(part.startswith(".") for part in relative.parts):
+            continue
+        resolved = path.resolve()
+        if any(resolved.is_relative_to(root) for root in excluded):
+            continue
+        yield path
+
+
+class FullTextIndex:
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self.path = index_path(base_dir)
+        base_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.Error as exc:
+            raise FullTextError(f"Unable to open full-text index at {self.path}: {exc}") from exc
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "FullTextIndex":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def _key(self, path: Path) -> str:
+        return path.resolve().relative_to(self.base_dir.resolve()).as_posix()
+
+    def update_file(self, path: Path) -> bool:
+        """(Re)index ``path`` if its size or mtime changed. Returns True when the index was touched."""
+        key = self._key(path)
+        stat = path.stat()
+        row = self._conn.execute("SELECT id, size, mtime_ns FROM files WHERE path = ?", (key,)).fetchone()
+        if row is not None and row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+            return False
+        # Decode straight from the mapping instead of reading the whole file into bytes first.
+        with reader.open_document(path) as document:
+            body = document.text()
+        with self._conn:
+            if row is None:
+                cursor = self._conn.execute(
+                    "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                    (key, stat.st_size, stat.st_mtime_ns),
+                )
+                doc_id = cursor.lastrowid
+            else:
+                doc_id = row[0]
+                self._conn.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                    (stat.st_size, stat.st_mtime_ns, doc_id),
+                )
+                self._conn.execute("DELETE FROM docs WHERE rowid = ?", (doc_id,))
+            self._conn.execute("INSERT INTO docs (rowid, body) VALUES (?, ?)", (doc_id, body))
+        return True
+
+    def refresh(self, exclude: Iterable[Path] = ()) -> int:
+        """Bring the index in line with the directory; returns the number of files (re)indexed or dropped."""
+        seen = set()
+        changed = 0
+        for path in iter_documents(self.base_dir, exclude):
+            seen.add(self._key(path))
+            if self.update_file(path):
+                changed += 1
+        stale = [(doc_id,) for doc_id, key in self._conn.execute("SELECT id, path FROM files") if key not in seen]
+        if stale:
+            with self._conn:
+                self._conn.executemany("DELETE FROM docs WHERE rowid = ?", stale)
+                self._conn.executemany("DELETE FROM files WHERE id = ?", stale)
+            changed += len(stale)
+        return changed
+
+    def query(self, expression: str, limit: int = 20, snippet_tokens: int = 16) -> List[Hit]:
+        sql = (
+            "SELECT files.path, bm25(docs), snippet(docs, 0, ?, ?, '…', ?) "
+            "FROM docs JOIN files ON files.id = docs.rowid "
+            "WHERE docs MATCH ? ORDER BY bm25(docs) LIMIT ?"
+        )
+        try:
+            rows = self._conn.execute(sql, (MATCH_START, MATCH_END, snippet_tokens, expression, limit)).fetchall()
+        except sqlite3.OperationalError as exc:
+            raise FullTextError(f"Invalid query {expression!r}: {exc}") from exc
+        return [Hit(path=self.base_dir / key, score=-score, snippet=text) for key, score, text in rows]
+
+
+def open_index(base_dir: Path) -> Optional[FullTextIndex]:
+    """Open the index for ``base_dir``, or return None when SQLite/FTS5 is unavailable."""
+    try:
+        return FullTextIndex(base_dir)
+    except FullTextError:
+        return None
@@ -0,0 +1,216 @@
+"""Revision history of fetched documents, stored as line deltas between periodic keyframes.
+
+Every recorded revision is either a keyframe (the full zlib-compressed text) or a
+delta against the revision before it. At most ``keyframe_interval - 1`` deltas
+follow a keyframe, so materialising any revision replays a short, bounded chain.
+"""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+HISTORY_FILENAME = ".c7fetch-history.sqlite"
+DEFAULT_KEYFRAME_INTERVAL = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    id INTEGER PRIMARY KEY,
+    library_id TEXT NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    content_type TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    keyframe INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    data BLOB NOT NULL,
+    UNIQUE (library_id, topic, content_type, revision)
+);
+"""
+
+_COMPRESSION_LEVEL = 6
+
+# Delta ops: ``[start, end]`` copies lines ``start:end`` of the previous revision,
+# a string inserts new text.
+Delta = List[Union[List[int], str]]
+
+
+class HistoryError(Exception):
+    """Raised when the history store cannot be opened or a revision does not exist."""
+
+
+@dataclass
+class Revision:
+    revision: int
+    fetched_at: float
+    keyframe: bool
+    size: int
+    stored: int
+    sha256: str
+
+
+def history_path(base_dir: Path) -> Path:
+    return base_dir / HISTORY_FILENAME
+
+
+def make_delta(old: str, new: str) -> Delta:
+    """Line delta turning ``old`` into ``new``.
+
+    The unchanged head and tail are peeled off first and the rest is matched on
+    interned line ids with difflib's default autojunk. Autojunk ignores very common
+    lines (blank lines, fences, snippet separators) as match anchors, which keeps
+    large documents near-linear. The delta can be less minimal; ``record`` falls
+    back to a keyframe when it is not smaller than the document.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    limit = min(len(old_lines), len(new_lines))
+    head = 0
+    while head < limit and old_lines[head] == new_lines[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and old_lines[-1 - tail] == new_lines[-1 - tail]:
+        tail += 1
+    ids: Dict[str, int] = {}
+    old_ids = [ids.setdefault(line, len(ids)) for line in old_lines[head : len(old_lines) - tail]]
+    new_ids = [ids.setdefault(line, len(ids)) for line in new_lines[head : len(new_lines) - tail]]
+    delta: Delta = [[0, head]] if head else []
+    matcher = difflib.SequenceMatcher(None, old_ids, new_ids)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append([head + i1, head + i2])
+        elif j2 > j1:
+            delta.append("".join(new_lines[head + j1 : head + j2]))
+    if tail:
+        delta.append([len(old_lines) - tail, len(old_lines)])
+    return delta
+
+
+def apply_delta(old: str, delta: Delta) -> str:
+    old_lines = old.splitlines(keepends=True)
+    parts: List[str] = []
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[0] : op[1]])
+    return "".join(parts)
+
+
+class HistoryStore:
+    def __init__(self, path: Path, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        self.path = path
+        self.keyframe_interval = max(1, keyframe_interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(path)
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.Error as exc:
+            raise HistoryError(f"Unable to open history store {path}: {exc}") from exc
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def revisions(self, library_id: str, topic: Optional[str], content_type: str) -> List[Revision]:
+        rows = self._conn.execute(
+            "SELECT revision, fetched_at, keyframe, size, LENGTH(data), sha256 FROM revisions "
+            "WHERE library_id = ? AND topic = ? AND content_type = ? ORDER BY revision",
+            (library_id, topic or "", content_type),
+        ).fetchall()
+        return [Revision(row[0], row[1], bool(row[2]), row[3], row[4], row[5]) for row in rows]
+
+    def record(self, library_id: str, topic: Optional[str], content_type: str, text: str) -> Optional[int]:
+        """Append ``text`` as the next revision; returns its number, or None if it matches the latest one."""
+        key = (library_id, topic or "", content_type)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        latest = self._conn.execute(
+            "SELECT revision, sha256 FROM revisions WHERE library_id = ? AND topic = ? AND content_type = ? "
+            "ORDER BY revision DESC LIMIT 1",
+            key,
+        ).fetchone()
+        if latest is not None and latest[1] == digest:
+            return None
+        revision = latest[0] + 1 if latest is not None else 1
+        full = zlib.compress(text.encode("utf-8"), _COMPRESSION_LEVEL)
+        keyframe = True
+        data = full
+        if latest is not None and (revision - 1) % self.keyframe_interval != 0:
+            previous = self.materialize(library_id, topic, content_type, latest[0])
+            encoded = json.dumps(make_delta(previous, text), separators=(",", ":")).encode("utf-8")
+            packed = zlib.compress(encoded, _COMPRESSION_LEVEL)
+            # A rewrite can make the delta bigger than the document itself.
+            if len(packed) < len(full):
+                keyframe, data = False, packed
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO revisions (library_id, topic, content_type, revision, fetched_at, keyframe, size, "
+                "sha256, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, revision, time.time(), int(keyframe), len(text.encode("utf-8")), digest, data),
+            )
+        return revision
+
+    def revision_at(self, library_id: str, topic: Optional[str], content_type: str, timestamp: float) -> int:
+        """Return the newest revision fetched at or before ``timestamp``."""
+        row = self._conn.execute(
+            "SELECT MAX(revision) FROM revisions WHERE library_id = ? AND topic = ? AND content_type = ? "
+            "AND fetched_at <= ?",
+            (library_id, topic or "", content_type, timestamp),
+        ).fetchone()
+        if row is None or row[0] is None:
+            raise HistoryError(f"No revision of {_label(library_id, topic)} was recorded by then")
+        return int(row[0])
+
+    def materialize(
+        self, library_id: str, topic: Optional[str], content_type: str, revision: Optional[int] = None
+    ) -> str:
+        """Rebuild the text of ``revision`` (the latest when None) from its keyframe and deltas."""
+        key = (library_id, topic or "", content_type)
+        if revision is None:
+            row = self._conn.execute(
+                "SELECT MAX(revision) FROM revisions WHERE library_id = ? AND topic = ? AND content_type = ?",
+                key,
+            ).fetchone()
+            revision = row[0] if row is not None else None
+            if revision is None:
+                raise HistoryError(f"No recorded revisions of {_label(library_id, topic)} in {self.path}")
+        start = self._conn.execute(
+            "SELECT MAX(revision) FROM revisions WHERE library_id = ? AND topic = ? AND content_type = ? "
+            "AND keyframe = 1 AND revision <= ?",
+            (*key, revision),
+        ).fetchone()
+        if start is None or start[0] is None:
+            raise HistoryError(f"No revision {revision} of {_label(library_id, topic)} in {self.path}")
+        rows = self._conn.execute(
+            "SELECT revision, keyframe, data FROM revisions WHERE library_id = ? AND topic = ? AND content_type = ? "
+            "AND revision BETWEEN ? AND ? ORDER BY revision",
+            (*key, start[0], revision),
+        ).fetchall()
+        if not rows or rows[-1][0] != revision:
+            raise HistoryError(f"No revision {revision} of {_label(library_id, topic)} in {self.path}")
+        text = ""
+        for _revision, keyframe, data in rows:
+            raw = zlib.decompress(data)
+            text = raw.decode("utf-8") if keyframe else apply_delta(text, json.loads(raw))
+        return text
+
+
+def _label(library_id: str, topic: Optional[str]) -> str:
+    return f"{library_id} (topic {topic})" if topic else library_id
+
+
+def open_history(base_dir: Path, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> HistoryStore:
+    return HistoryStore(history_path(base_dir), keyframe_interval)
@@ -0,0 +1,104 @@
+"""Incremental reader for the one array we need out of a (possibly huge) JSON document."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterator, TextIO
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Reader:
+    """Decodes one JSON value at a time from ``handle``, keeping only unconsumed text buffered."""
+
+    def __init__(self, handle: TextIO, chunk_size: int):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        data = self.handle.read(size)
+        if not data:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of input)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of input'!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+            else:
+                # A number at the very end of the buffer may continue in the next chunk.
+                if end < len(self._buffer) or not self._fill(size):
+                    self._pos = end
+                    return value
+            # Grow reads geometrically so one large value is not re-scanned chunk by chunk.
+            size *= 2
+
+
+def iter_array(handle: TextIO, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the items of the top-level ``key`` array one at a time.
+
+    A top-level array is streamed as-is. Only one item (plus at most one read chunk)
+    is held in memory at a time; reading stops once the array has been consumed.
+    """
+    reader = _Reader(handle, chunk_size)
+    first = reader.peek()
+    if first == "{":
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                return
+            name = reader.value()
+            reader.expect(":")
+            if name == key:
+                break
+            reader.value()
+            if reader.peek() == ",":
+                reader.expect(",")
+            else:
+                reader.expect("}")
+                return
+    if reader.peek() == "[":
+        reader.expect("[")
+    else:
+        raise ValueError(f"Expected an array for {key!r}")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == ",":
+            reader.expect(",")
+        else:
+            reader.expect("]")
+            return
@@ -0,0 +1,119 @@
+"""Where fetched documents live under the output directory, plus an index of what is there."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from c7fetch.cli import common
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+INDEX_FILENAME = ".c7fetch-index.json"
+LAYOUTS = ("flat", "org", "hash")
+_INDEX_VERSION = 1
+# Two hex characters give 256 shard directories, enough to keep each one small.
+_HASH_WIDTH = 2
+
+
+def index_path(base_dir: Path) -> Path:
+    return base_dir / INDEX_FILENAME
+
+
+def _read_entries(path: Path) -> Dict[str, str]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if isinstance(data, dict) and data.get("version") == _INDEX_VERSION:
+        return data.get("entries", {})
+    return {}
+
+
+def entry_key(library_id: str, topic: Optional[str], extension: str) -> str:
+    key = f"{library_id}#{topic}" if topic else library_id
+    return f"{key}|{extension}"
+
+
+def shard_for(library_id: str, layout: str) -> Optional[str]:
+    """Return the shard directory name for ``library_id`` (None for the flat layout)."""
+    if layout == "org":
+        org = library_id.strip("/").split("/", 1)[0]
+        return common.sanitize_segment(org) or "_"
+    if layout == "hash":
+        return hashlib.sha1(library_id.encode("utf-8")).hexdigest()[:_HASH_WIDTH]
+    return None
+
+
+class OutputIndex:
+    """JSON map of ``entry_key`` to document path (relative to ``base_dir``).
+
+    Lookups and existence checks hit the in-memory map instead of the file system;
+    call :meth:`save` once after a batch of :meth:`record` calls. Saving merges this
+    process's records into the current file under a lock and replaces it atomically,
+    so concurrent fetches and queue workers sharing ``base_dir`` keep each other's entries.
+    """
+
+    def __init__(self, base_dir: Path, layout: str = "flat"):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown output layout '{layout}'; expected one of {', '.join(LAYOUTS)}.")
+        self.base_dir = base_dir
+        self.layout = layout
+        self.path = index_path(base_dir)
+        self._entries: Dict[str, str] = _read_entries(self.path)
+        self._pending: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, library_id: str, topic: Optional[str], extension: str) -> Optional[Path]:
+        relative = self._entries.get(entry_key(library_id, topic, extension))
+        return self.base_dir / relative if relative is not None else None
+
+    def contains(self, library_id: str, topic: Optional[str], extension: str) -> bool:
+        return entry_key(library_id, topic, extension) in self._entries
+
+    def path_for(self, library_id: str, topic: Optional[str], extension: str) -> Path:
+        """Return where a document goes: its indexed location, or a fresh one under the current layout."""
+        existing = self.lookup(library_id, topic, extension)
+        if existing is not None:
+            return existing
+        filename = common.auto_filename([library_id, topic], extension)
+        shard = shard_for(library_id, self.layout)
+        relative = Path(shard, filename) if shard else Path(filename)
+        return common.render_path(self.base_dir, relative.as_posix())
+
+    def record(self, library_id: str, topic: Optional[str], extension: str, path: Path) -> None:
+        key = entry_key(library_id, topic, extension)
+        relative = path.resolve().relative_to(self.base_dir.resolve()).as_posix()
+        if self._entries.get(key) != relative:
+            self._entries[key] = relative
+            self._pending[key] = relative
+
+    def save(self) -> None:
+        if not self._pending:
+            return
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        with open(lock_path, "a+", encoding="utf-8") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                entries = _read_entries(self.path)
+                entries.update(self._pending)
+                data = {"version": _INDEX_VERSION, "layout": self.layout, "entries": entries}
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_text(json.dumps(data, separators=(",", ":"), sort_keys=True), encoding="utf-8")
+                os.replace(tmp, self.path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        self._entries = entries
+        self._pending = {}
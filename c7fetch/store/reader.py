@@ -0,0 +1,91 @@
+"""Memory-mapped, zero-copy access to fetched documents and search result files."""
+
+from __future__ import annotations
+
+import json
+import mmap
+import re
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from c7fetch.store import chunks
+
+# The line endings bytes.splitlines() recognises, so sections match chunks.split_markdown.
+_LINE_END = re.compile(rb"\r\n|\r|\n")
+
+
+class MappedDocument:
+    """Read-only ``mmap`` view of a file.
+
+    Slices, lines and sections are handed out as ``memoryview`` objects over the
+    mapping, so only the pages that are actually touched get read and nothing is
+    decoded until :meth:`text` is called. Views that are still alive at
+    :meth:`close` keep the mapping open until they are garbage collected.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = path.open("rb")
+        size = path.stat().st_size
+        # Zero-length files cannot be mapped.
+        self._map: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b"")
+
+    def close(self) -> None:
+        self._view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Outstanding views still reference the mapping; it is unmapped when they go away.
+                pass
+        self._file.close()
+
+    def __enter__(self) -> "MappedDocument":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    @property
+    def view(self) -> memoryview:
+        return self._view
+
+    def slice(self, start: int, end: Optional[int] = None) -> memoryview:
+        """Return the byte range ``[start, end)`` without copying."""
+        return self._view[start:end]
+
+    def text(self, start: int = 0, end: Optional[int] = None) -> str:
+        """Decode only the byte range ``[start, end)``."""
+        return str(self._view[start:end], "utf-8", errors="replace")
+
+    def find(self, needle: bytes, start: int = 0) -> int:
+        """Return the offset of ``needle`` at or after ``start``, or -1."""
+        if self._map is None:
+            return -1
+        return self._map.find(needle, start)
+
+    def iter_lines(self) -> Iterator[memoryview]:
+        """Yield each line (including its ending) lazily, split where ``bytes.splitlines`` splits."""
+        offset = 0
+        for ending in _LINE_END.finditer(self._view):
+            yield self._view[offset : ending.end()]
+            offset = ending.end()
+        if offset < len(self._view):
+            yield self._view[offset:]
+
+    def iter_sections(self) -> Iterator[tuple[chunks.Section, memoryview]]:
+        """Yield ``(section, view)`` pairs using the same rules as :func:`chunks.split_markdown`."""
+        for section in chunks.iter_sections(self.iter_lines()):
+            yield section, self._view[section.start : section.end]
+
+    def json(self) -> Any:
+        """Decode the whole file as JSON (this necessarily materialises it)."""
+        return json.loads(self._view.tobytes())
+
+
+def open_document(path: Path) -> MappedDocument:
+    return MappedDocument(path)
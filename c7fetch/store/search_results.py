@@ -0,0 +1,310 @@
+"""Parallel, incrementally cached parsing of saved search result files."""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from c7fetch.cli import settings
+from c7fetch.store import jsonstream
+
+# Only the fields review displays or filters on are kept in the cache.
+RESULT_FIELDS = ("id", "title", "description", "lastUpdateDate", "stars", "trustScore", "totalTokens")
+
+# Added by ``trim_result``: ``lastUpdateDate`` as epoch milliseconds (absent when unparseable).
+UPDATED_MS = "lastUpdateMs"
+
+_CACHE_VERSION = 4
+CACHE_DIRNAME = "review_cache"
+_SHARD_SUFFIX = ".jsonl"
+
+# Below this many uncached files a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 8
+
+
+@dataclass(frozen=True)
+class Filters:
+    library: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+
+    def matches(self, result: Dict[str, Any]) -> bool:
+        return (
+            _matches(result.get("id", ""), self.library)
+            and _matches(result.get("title", ""), self.title)
+            and _matches(result.get("description", ""), self.description)
+        )
+
+
+@dataclass
+class ParsedFile:
+    path: Path
+    size: int
+    mtime_ns: int
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def matching(self, filters: Filters) -> List[Dict[str, Any]]:
+        return [result for result in self.results if filters.matches(result)]
+
+
+def _matches(value: str, pattern: Optional[str]) -> bool:
+    if not pattern:
+        return True
+    return fnmatch.fnmatch(value, pattern)
+
+
+def now_ms() -> int:
+    """Current time in epoch milliseconds, comparable with ``parse_timestamp_ms``."""
+    return int(time.time() * 1000)
+
+
+def parse_timestamp_ms(raw_value: Optional[str]) -> Optional[int]:
+    """Parse an ISO-8601 timestamp (``Z`` suffix allowed) into epoch milliseconds."""
+    if not raw_value or not isinstance(raw_value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(raw_value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def trim_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    trimmed = {key: result[key] for key in RESULT_FIELDS if key in result}
+    updated_ms = parse_timestamp_ms(trimmed.get("lastUpdateDate"))
+    if updated_ms is not None:
+        trimmed[UPDATED_MS] = updated_ms
+    return trimmed
+
+
+def iter_file_results(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream the raw ``results`` entries of a search file without loading the whole document."""
+    with path.open("r", encoding="utf-8") as handle:
+        for result in jsonstream.iter_array(handle, "results"):
+            if isinstance(result, dict):
+                yield result
+
+
+def parse_file(
+    path: Path,
+    filters: Optional[Filters] = None,
+    sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> ParsedFile:
+    """Decode one search result file; errors are reported on the result rather than raised.
+
+    Entries are trimmed as they stream in and only those passing ``filters`` are kept,
+    so peak memory follows the matching rows rather than the size of the file. Every
+    trimmed entry, matching or not, is also handed to ``sink`` (used to fill the cache).
+    """
+    try:
+        stat = path.stat()
+        results: List[Dict[str, Any]] = []
+        for raw in iter_file_results(path):
+            result = trim_result(raw)
+            if sink is not None:
+                sink(result)
+            if filters is None or filters.matches(result):
+                results.append(result)
+    except Exception as exc:  # pragma: no cover - best effort error surfacing
+        return ParsedFile(path=path, size=-1, mtime_ns=-1, error=str(exc))
+    return ParsedFile(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns, results=results)
+
+
+class _ShardWriter:
+    """Streams trimmed results into a temporary shard that only replaces the old one on commit."""
+
+    def __init__(self, target: Path, header: Dict[str, Any]):
+        self.target = target
+        self.tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.tmp.open("w", encoding="utf-8")
+        self.add(header)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self._handle.write(json.dumps(entry, separators=(",", ":")))
+        self._handle.write("\n")
+
+    def commit(self) -> None:
+        self._handle.close()
+        os.replace(self.tmp, self.target)
+
+    def abort(self) -> None:
+        self._handle.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+class ParseCache:
+    """Trimmed results of previously parsed files, one JSON-lines shard per file.
+
+    A shard starts with a header line recording the file's path, size and mtime,
+    followed by one trimmed result per line. Shards are written atomically as files
+    are parsed, so a warm run only decodes the shards it needs (on the worker pool,
+    like parsing) and a change rewrites just that file's shard.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def shard_path(self, path: Path) -> Path:
+        digest = hashlib.sha1(str(path).encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}{_SHARD_SUFFIX}"
+
+    def get(self, path: Path, filters: Optional[Filters] = None) -> Optional[ParsedFile]:
+        """Return the cached results of ``path`` (only those passing ``filters``) if still valid."""
+        try:
+            stat = path.stat()
+            with self.shard_path(path).open("r", encoding="utf-8") as handle:
+                if json.loads(handle.readline()) != _shard_header(path, stat.st_size, stat.st_mtime_ns):
+                    return None
+                results = []
+                for line in handle:
+                    result = json.loads(line)
+                    if filters is None or filters.matches(result):
+                        results.append(result)
+        except (OSError, ValueError):
+            return None
+        return ParsedFile(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns, results=results)
+
+    def parse(self, path: Path, filters: Optional[Filters] = None) -> ParsedFile:
+        """Parse ``path``, streaming every trimmed result into a fresh shard as it goes."""
+        try:
+            stat = path.stat()
+        except OSError as exc:
+            return ParsedFile(path=path, size=-1, mtime_ns=-1, error=str(exc))
+        shard = _ShardWriter(self.shard_path(path), _shard_header(path, stat.st_size, stat.st_mtime_ns))
+        try:
+            parsed = parse_file(path, filters, sink=shard.add)
+        except BaseException:
+            shard.abort()
+            raise
+        if parsed.error is None:
+            shard.commit()
+        else:
+            shard.abort()
+        return parsed
+
+    def prune(self, keep: Iterable[Path]) -> None:
+        wanted = {self.shard_path(path).name for path in keep}
+        for shard in self.directory.glob(f"*{_SHARD_SUFFIX}"):
+            if shard.name not in wanted:
+                shard.unlink(missing_ok=True)
+
+
+def default_cache() -> ParseCache:
+    """The parse cache shared by review, fetch scheduling and the serve daemon."""
+    return ParseCache(Path(settings.CONFIG_DIR) / CACHE_DIRNAME)
+
+
+def _shard_header(path: Path, size: int, mtime_ns: int) -> Dict[str, Any]:
+    return {"version": _CACHE_VERSION, "path": str(path), "size": size, "mtime_ns": mtime_ns}
+
+
+def _load(path: Path, cache_dir: Optional[Path], filters: Optional[Filters]) -> ParsedFile:
+    """Read ``path`` from its cache shard, or parse it and write the shard (runs in pool workers)."""
+    if cache_dir is None:
+        return parse_file(path, filters)
+    cache = ParseCache(cache_dir)
+    return cache.get(path, filters) or cache.parse(path, filters)
+
+
+def iter_parsed(
+    files: List[Path],
+    *,
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    batch_size: Optional[int] = None,
+    filters: Optional[Filters] = None,
+) -> Iterator[ParsedFile]:
+    """Yield a ``ParsedFile`` per path, in order, holding only the results that pass ``filters``.
+
+    Cache shards are read and missing files decoded on a process pool (when there
+    are enough files and ``jobs > 1``) one bounded batch at a time, so memory stays
+    flat and early files can be rendered while later ones are still being loaded.
+    """
+    cache_dir = cache.directory if cache is not None else None
+    pool: Optional[Executor] = None
+    if jobs > 1 and len(files) >= PARALLEL_MIN_FILES:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+    step = batch_size or max(jobs, 1) * 4
+    try:
+        for offset in range(0, len(files), step):
+            batch = files[offset : offset + step]
+            if pool is not None:
+                yield from pool.map(_load, batch, [cache_dir] * len(batch), [filters] * len(batch))
+            else:
+                yield from (_load(path, cache_dir, filters) for path in batch)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def load_catalog(files: List[Path], cache: Optional[ParseCache] = None) -> Dict[str, Dict[str, Any]]:
+    """Map library id to its most recently seen trimmed search result across ``files``."""
+    catalog: Dict[str, Dict[str, Any]] = {}
+    for parsed in iter_parsed(files, cache=cache):
+        for result in parsed.results:
+            library_id = result.get("id")
+            if library_id:
+                catalog[library_id] = result
+    return catalog
+
+
+def scan(paths: Iterable[Path]) -> Dict[Path, Tuple[int, int]]:
+    """Return ``{path: (size, mtime_ns)}`` for the given files, skipping ones that vanished."""
+    snapshot: Dict[Path, Tuple[int, int]] = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def list_directory(directory: Path) -> List[Path]:
+    if not directory.is_dir():
+        return []
+    with os.scandir(directory) as entries:
+        return sorted(Path(entry.path) for entry in entries if entry.name.endswith(".json") and entry.is_file())
+
+
+class Catalog:
+    """Long-lived view over a set of search files that re-parses only what changed."""
+
+    def __init__(self, cache: Optional[ParseCache] = None, filters: Optional[Filters] = None):
+        self.cache = cache
+        # Applied while parsing, so only matching rows are held between refreshes.
+        self.filters = filters
+        self.files: Dict[Path, ParsedFile] = {}
+        self._seen: Dict[Path, Tuple[int, int]] = {}
+
+    def refresh(self, paths: Iterable[Path], jobs: int = 1) -> bool:
+        """Sync with ``paths``; returns True when any file was added, changed or removed."""
+        current = scan(paths)
+        changed = sorted(path for path, signature in current.items() if self._seen.get(path) != signature)
+        removed = [path for path in self._seen if path not in current]
+        self._seen = current
+        for path in removed:
+            self.files.pop(path, None)
+        for parsed in iter_parsed(changed, jobs=jobs, cache=self.cache, filters=self.filters):
+            if parsed.error is None:
+                self.files[parsed.path] = parsed
+            else:
+                # Usually a file caught mid-write; it is retried once its mtime moves again.
+                self.files.pop(parsed.path, None)
+        return bool(changed or removed)
+
+    def parsed(self) -> List[ParsedFile]:
+        return [self.files[path] for path in sorted(self.files)]
@@ -0,0 +1,176 @@
+"""Normalized SQLite store of snippets from ``--format json`` fetches.
+
+Each snippet becomes one row with indexed library, topic, title, source and
+language columns, so selecting snippets across many libraries is a query rather
+than a re-parse of every JSON document.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+STORE_FILENAME = ".c7fetch-snippets.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snippets (
+    id INTEGER PRIMARY KEY,
+    library_id TEXT NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    position INTEGER NOT NULL,
+    title TEXT,
+    source TEXT,
+    language TEXT COLLATE NOCASE,
+    description TEXT,
+    code TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snippets_library ON snippets (library_id, topic, position);
+CREATE INDEX IF NOT EXISTS snippets_title ON snippets (title);
+CREATE INDEX IF NOT EXISTS snippets_source ON snippets (source);
+CREATE INDEX IF NOT EXISTS snippets_language ON snippets (language);
+"""
+
+# Candidate keys for each column, most specific first; Context7 has used both styles.
+_TITLE_KEYS = ("codeTitle", "title", "pageTitle", "breadcrumb")
+_SOURCE_KEYS = ("codeId", "source", "url", "pageId")
+_LANGUAGE_KEYS = ("codeLanguage", "language")
+_DESCRIPTION_KEYS = ("codeDescription", "description")
+_LIST_KEYS = ("snippets", "codeSnippets", "infoSnippets", "results")
+
+
+class SnippetStoreError(Exception):
+    """Raised when the snippet store cannot be opened or queried."""
+
+
+@dataclass
+class Snippet:
+    library_id: str
+    topic: Optional[str]
+    position: int
+    title: Optional[str]
+    source: Optional[str]
+    language: Optional[str]
+    description: Optional[str]
+    code: Optional[str]
+
+
+def store_path(base_dir: Path) -> Path:
+    return base_dir / STORE_FILENAME
+
+
+def _first(item: Dict[str, Any], keys: tuple) -> Optional[str]:
+    for key in keys:
+        value = item.get(key)
+        if value:
+            return str(value)
+    return None
+
+
+def iter_snippet_objects(payload: Any) -> Iterator[Dict[str, Any]]:
+    """Yield the snippet objects in a JSON fetch payload (a bare list or lists under known keys)."""
+    if isinstance(payload, list):
+        yield from (item for item in payload if isinstance(item, dict))
+        return
+    if not isinstance(payload, dict):
+        return
+    for key in _LIST_KEYS:
+        items = payload.get(key)
+        if isinstance(items, list):
+            yield from (item for item in items if isinstance(item, dict))
+
+
+def normalize(item: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    code_list = [entry for entry in item.get("codeList") or [] if isinstance(entry, dict)]
+    language = _first(item, _LANGUAGE_KEYS)
+    if language is None and code_list:
+        language = _first(code_list[0], ("language",))
+    if code_list:
+        code: Optional[str] = "\n\n".join(str(entry.get("code", "")) for entry in code_list)
+    else:
+        code = _first(item, ("code", "content"))
+    return {
+        "title": _first(item, _TITLE_KEYS),
+        "source": _first(item, _SOURCE_KEYS),
+        "language": language,
+        "description": _first(item, _DESCRIPTION_KEYS),
+        "code": code,
+    }
+
+
+class SnippetStore:
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(path)
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.Error as exc:
+            raise SnippetStoreError(f"Unable to open snippet store {path}: {exc}") from exc
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SnippetStore":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def ingest(self, library_id: str, topic: Optional[str], payload: Any) -> int:
+        """Replace the snippets stored for ``library_id``/``topic``; returns how many were stored."""
+        rows = [
+            (library_id, topic or "", position, *normalize(item).values(), json.dumps(item, sort_keys=True))
+            for position, item in enumerate(iter_snippet_objects(payload))
+        ]
+        with self._conn:
+            self._conn.execute("DELETE FROM snippets WHERE library_id = ? AND topic = ?", (library_id, topic or ""))
+            self._conn.executemany(
+                "INSERT INTO snippets (library_id, topic, position, title, source, language, description, code, raw) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def select(
+        self,
+        *,
+        library: Optional[str] = None,
+        topic: Optional[str] = None,
+        title: Optional[str] = None,
+        source: Optional[str] = None,
+        language: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Snippet]:
+        """Return snippets matching every given filter; ``library``/``title``/``source`` are globs."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, pattern in (("library_id", library), ("title", title), ("source", source)):
+            if pattern:
+                clauses.append(f"{column} GLOB ?")
+                params.append(pattern)
+        if topic is not None:
+            clauses.append("topic = ?")
+            params.append(topic)
+        if language:
+            clauses.append("language = ?")
+            params.append(language)
+        sql = "SELECT library_id, topic, position, title, source, language, description, code FROM snippets"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY library_id, topic, position"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        try:
+            rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as exc:
+            raise SnippetStoreError(f"Unable to query snippet store {self.path}: {exc}") from exc
+        return [Snippet(row[0], row[1] or None, *row[2:]) for row in rows]
+
+
+def open_store(base_dir: Path) -> SnippetStore:
+    return SnippetStore(store_path(base_dir))
@@ -0,0 +1,288 @@
+"""Persistent trigram index over cached search results for offline fuzzy library lookup.
+
+Ids, titles and descriptions of every result in ``search_dir`` are split into
+word trigrams (``pg_trgm`` style: lower-cased, padded with two leading spaces and
+one trailing space). The index lives in SQLite, is refreshed per file using
+size/mtime like the review cache, and ranks candidates by weighted trigram
+overlap with the query.
+
+Each library is indexed once, from the newest file that lists it; ``sources``
+remembers every file that does, so dropping a file re-reads the library from
+another one. Candidates must share a trigram with the query's id or title:
+descriptions only refine their score, since common description trigrams would
+otherwise pull in most of the corpus.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from c7fetch.cli import settings
+from c7fetch.store import search_results
+
+INDEX_FILENAME = "lookup_index.sqlite"
+
+_SCHEMA_VERSION = 2
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    library_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    description TEXT,
+    stars INTEGER,
+    grams_id INTEGER NOT NULL,
+    grams_title INTEGER NOT NULL,
+    grams_description INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS docs_file ON docs (file_id);
+CREATE TABLE IF NOT EXISTS sources (
+    library_id TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (library_id, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sources_file ON sources (file_id);
+CREATE TABLE IF NOT EXISTS grams (
+    gram TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    field INTEGER NOT NULL,
+    PRIMARY KEY (gram, field, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS grams_doc ON grams (doc_id);
+"""
+
+_FIELD_ID, _FIELD_TITLE, _FIELD_DESCRIPTION = 0, 1, 2
+# Ids and titles are compared by Jaccard similarity; descriptions by how much of the query they contain.
+_WEIGHTS = {_FIELD_ID: 3.0, _FIELD_TITLE: 2.0, _FIELD_DESCRIPTION: 1.0}
+_WORD = re.compile(r"[0-9a-z]+")
+# Candidates whose descriptions are scored per query.
+_BATCH = 256
+
+
+class TrigramIndexError(Exception):
+    """Raised when the lookup index cannot be opened."""
+
+
+@dataclass
+class Match:
+    library_id: str
+    title: Optional[str]
+    description: Optional[str]
+    stars: Optional[int]
+    score: float
+
+
+def index_path() -> Path:
+    return Path(settings.CONFIG_DIR) / INDEX_FILENAME
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    grams: Set[str] = set()
+    for word in _WORD.findall((text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(path)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                # Derived data only: rebuild from the search files on the next refresh.
+                self._conn.executescript(
+                    "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS docs; DROP TABLE IF EXISTS sources; "
+                    f"DROP TABLE IF EXISTS grams; PRAGMA user_version = {_SCHEMA_VERSION};"
+                )
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.Error as exc:
+            raise TrigramIndexError(f"Unable to open lookup index {path}: {exc}") from exc
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "TrigramIndex":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def _drop_doc(self, doc_id: int) -> None:
+        self._conn.execute("DELETE FROM grams WHERE doc_id = ?", (doc_id,))
+        self._conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def _drop_file(self, file_id: int) -> Set[str]:
+        """Forget a file; returns the libraries whose indexed copy came from it."""
+        orphaned = set()
+        for doc_id, library_id in self._conn.execute(
+            "SELECT id, library_id FROM docs WHERE file_id = ?", (file_id,)
+        ).fetchall():
+            self._drop_doc(doc_id)
+            orphaned.add(library_id)
+        self._conn.execute("DELETE FROM sources WHERE file_id = ?", (file_id,))
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        return orphaned
+
+    def _add_result(self, file_id: int, mtime_ns: int, result: Dict[str, Any]) -> None:
+        """Index ``result`` unless its library is already indexed from a file at least as new."""
+        existing = self._conn.execute(
+            "SELECT docs.id, files.mtime_ns FROM docs JOIN files ON files.id = docs.file_id WHERE docs.library_id = ?",
+            (result["id"],),
+        ).fetchone()
+        if existing is not None:
+            if existing[1] >= mtime_ns:
+                return
+            self._drop_doc(existing[0])
+        fields = {
+            _FIELD_ID: trigrams(result.get("id")),
+            _FIELD_TITLE: trigrams(result.get("title")),
+            _FIELD_DESCRIPTION: trigrams(result.get("description")),
+        }
+        stars = result.get("stars")
+        cursor = self._conn.execute(
+            "INSERT INTO docs (file_id, library_id, title, description, stars, grams_id, grams_title, "
+            "grams_description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                file_id,
+                result["id"],
+                result.get("title"),
+                result.get("description"),
+                stars if isinstance(stars, int) and stars >= 0 else None,
+                len(fields[_FIELD_ID]),
+                len(fields[_FIELD_TITLE]),
+                len(fields[_FIELD_DESCRIPTION]),
+            ),
+        )
+        doc_id = cursor.lastrowid
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO grams (gram, doc_id, field) VALUES (?, ?, ?)",
+            [(gram, doc_id, field) for field, grams in fields.items() for gram in grams],
+        )
+
+    def refresh(self, paths: Iterable[Path], cache: Optional[search_results.ParseCache] = None) -> int:
+        """Re-index files that are new or changed and forget ones that are gone; returns how many changed."""
+        current = search_results.scan(paths)
+        known = {
+            Path(path): (file_id, size, mtime_ns)
+            for file_id, path, size, mtime_ns in self._conn.execute("SELECT id, path, size, mtime_ns FROM files")
+        }
+        stale = [path for path, (_id, size, mtime_ns) in known.items() if current.get(path) != (size, mtime_ns)]
+        # Newest first, so each library is indexed once from the file that wins.
+        changed = sorted(
+            (path for path, signature in current.items() if known.get(path, (None,))[1:] != signature),
+            key=lambda path: (-current[path][1], str(path)),
+        )
+        with self._conn:
+            orphaned: Set[str] = set()
+            for path in stale:
+                orphaned |= self._drop_file(known[path][0])
+            for parsed in search_results.iter_parsed(changed, cache=cache):
+                if parsed.error is not None:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                    (str(parsed.path), parsed.size, parsed.mtime_ns),
+                )
+                file_id = int(cursor.lastrowid or 0)
+                results = [result for result in parsed.results if result.get("id")]
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO sources (library_id, file_id) VALUES (?, ?)",
+                    [(result["id"], file_id) for result in results],
+                )
+                for result in results:
+                    self._add_result(file_id, parsed.mtime_ns, result)
+            self._restore(orphaned, cache)
+        return len(set(stale) | set(changed))
+
+    def _restore(self, library_ids: Set[str], cache: Optional[search_results.ParseCache]) -> None:
+        """Re-index libraries that lost their indexed copy but are still listed by unchanged files."""
+        missing = {
+            library_id
+            for library_id in library_ids
+            if self._conn.execute("SELECT 1 FROM docs WHERE library_id = ?", (library_id,)).fetchone() is None
+        }
+        files: Dict[Path, int] = {}
+        for library_id in missing:
+            for file_id, path in self._conn.execute(
+                "SELECT files.id, files.path FROM sources JOIN files ON files.id = sources.file_id "
+                "WHERE sources.library_id = ?",
+                (library_id,),
+            ):
+                files[Path(path)] = file_id
+        for parsed in search_results.iter_parsed(sorted(files), cache=cache):
+            for result in parsed.results:
+                if result.get("id") in missing:
+                    self._add_result(files[parsed.path], parsed.mtime_ns, result)
+
+    def lookup(self, query: str, limit: int = 10, min_score: float = 0.1) -> List[Match]:
+        """Rank indexed libraries by weighted trigram similarity to ``query`` (best first, one row per id)."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        placeholders = ",".join("?" * len(grams))
+        total_weight = sum(_WEIGHTS.values())
+        scores: Dict[int, float] = {}
+        for doc_id, field, count, *sizes in self._conn.execute(
+            "SELECT grams.doc_id, grams.field, COUNT(*), docs.grams_id, docs.grams_title FROM grams "
+            f"JOIN docs ON docs.id = grams.doc_id WHERE grams.gram IN ({placeholders}) "
+            f"AND grams.field < {_FIELD_DESCRIPTION} GROUP BY grams.doc_id, grams.field",
+            list(grams),
+        ):
+            similarity = count / (len(grams) + sizes[field] - count)
+            scores[doc_id] = scores.get(doc_id, 0.0) + _WEIGHTS[field] * similarity
+        # Descriptions only refine candidates, best id/title score first. A description adds at most its
+        # weight, so stop once no remaining candidate can reach min_score or the limit-th best score so far.
+        order = sorted(scores, key=scores.__getitem__, reverse=True)
+        best: List[float] = []
+        candidates: List[int] = []
+        for start in range(0, len(order), _BATCH):
+            batch = order[start : start + _BATCH]
+            floor = max(min_score * total_weight, best[0] - 1e-4 * total_weight if len(best) >= limit else 0.0)
+            if scores[batch[0]] + _WEIGHTS[_FIELD_DESCRIPTION] < floor:
+                break
+            for doc_id, count in self._conn.execute(
+                f"SELECT doc_id, COUNT(*) FROM grams WHERE gram IN ({placeholders}) "
+                f"AND field = {_FIELD_DESCRIPTION} AND doc_id IN ({','.join('?' * len(batch))}) GROUP BY doc_id",
+                [*grams, *batch],
+            ):
+                scores[doc_id] += _WEIGHTS[_FIELD_DESCRIPTION] * count / len(grams)
+            for doc_id in batch:
+                heapq.heappush(best, scores[doc_id])
+                if len(best) > limit:
+                    heapq.heappop(best)
+            candidates.extend(batch)
+        ranked = {
+            doc_id: round(scores[doc_id] / total_weight, 4)
+            for doc_id in candidates
+            if scores[doc_id] / total_weight >= min_score
+        }
+        if len(ranked) > limit:
+            # Keep ties with the limit-th score; stars and ids break them below.
+            cutoff = sorted(ranked.values(), reverse=True)[limit - 1]
+            ranked = {doc_id: score for doc_id, score in ranked.items() if score >= cutoff}
+        matches = [
+            Match(library_id, title, description, stars, ranked[doc_id])
+            for doc_id in ranked
+            for library_id, title, description, stars in self._conn.execute(
+                "SELECT library_id, title, description, stars FROM docs WHERE id = ?", (doc_id,)
+            )
+        ]
+        matches.sort(key=lambda match: (-match.score, -(match.stars or 0), match.library_id))
+        return matches[:limit]
+
+
+def open_index() -> TrigramIndex:
+    return TrigramIndex(index_path())
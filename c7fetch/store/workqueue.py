@@ -0,0 +1,269 @@
+"""File-system work queue shared by ``c7fetch queue work`` processes.
+
+The queue is a directory, possibly on a shared file system::
+
+    pending/<id>.json  unfinished job specs; the id is derived from the spec, so resubmitting is a no-op
+    leases/<id>.json   current claim: owner, random token and expiry (wall clock), renewed by heartbeats
+    done/<id>.json     outcome record of a finished job (moved out of pending/ on completion)
+    failed/<id>.json   outcome record of a failed job; resubmitting re-queues it
+
+Claims only ever list ``pending/``, so finished work costs nothing, and jobs are
+only decoded once their lease is won. A fresh lease is created with
+``O_CREAT | O_EXCL`` so exactly one worker wins it.
+
+Every other lease change (taking over an expired lease, heartbeats, release) first
+renames the lease file to a private name. Rename is atomic, so at most one worker
+gets it. That worker then checks the token inside. If the lease is not the one it
+expected, it links the file back with ``os.link``, which never replaces an existing
+file. A worker therefore never overwrites or deletes a lease it does not own.
+
+While a lease is moved aside, another worker can create a fresh one. The displaced
+holder then fails its next heartbeat and abandons the job. So a job can be run
+twice, but it is not recorded by a worker that lost its lease. Records are written
+through a temporary file and ``os.replace`` so readers never see partial records.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class QueueJob:
+    library_id: str
+    topic: Optional[str] = None
+    tokens: Optional[int] = None
+    format: str = "text"
+
+    @property
+    def id(self) -> str:
+        key = json.dumps([self.library_id, self.topic or "", self.format], separators=(",", ":"))
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class Lease:
+    job: QueueJob
+    worker: str
+    expires: float
+    token: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+@dataclass
+class QueueProgress:
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    leased: int = 0
+    by_worker: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.done - self.failed - self.leased
+
+    @property
+    def finished(self) -> bool:
+        return self.done + self.failed >= self.total
+
+
+def _write_atomic(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(data, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _names(directory: Path) -> List[str]:
+    with os.scandir(directory) as entries:
+        return sorted(
+            entry.name for entry in entries if entry.name.endswith(".json") and not entry.name.startswith(".")
+        )
+
+
+def _move_aside(path: Path) -> Optional[Path]:
+    """Rename ``path`` to a private name (only one caller can); None when it no longer exists."""
+    aside = path.with_name(f".{path.name}.{uuid.uuid4().hex}.aside")
+    try:
+        os.rename(path, aside)
+    except FileNotFoundError:
+        return None
+    return aside
+
+
+def _put_back(aside: Path, path: Path) -> bool:
+    """Restore a moved-aside file unless ``path`` was re-created meanwhile; returns whether it was restored."""
+    try:
+        os.link(aside, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        aside.unlink(missing_ok=True)
+
+
+class WorkQueue:
+    def __init__(self, root: Path):
+        self.root = root
+        self.pending_dir = root / "pending"
+        self.leases_dir = root / "leases"
+        self.done_dir = root / "done"
+        self.failed_dir = root / "failed"
+        for directory in (self.pending_dir, self.leases_dir, self.done_dir, self.failed_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def submit(self, job: QueueJob) -> bool:
+        """Add ``job``; returns False when it is already queued or finished. Failed jobs are re-queued."""
+        name = f"{job.id}.json"
+        if (self.pending_dir / name).exists() or (self.done_dir / name).exists():
+            return False
+        _write_atomic(self.pending_dir / name, asdict(job))
+        (self.failed_dir / name).unlink(missing_ok=True)
+        return True
+
+    def iter_jobs(self) -> Iterator[QueueJob]:
+        """Unfinished jobs, in id order."""
+        for name in _names(self.pending_dir):
+            data = _read(self.pending_dir / name)
+            if data is not None:
+                yield QueueJob(**data)
+
+    def _lease_path(self, job_id: str) -> Path:
+        return self.leases_dir / f"{job_id}.json"
+
+    def _try_lease(self, job_id: str, worker: str, ttl: float) -> Optional[Lease]:
+        spec = _read(self.pending_dir / f"{job_id}.json")
+        if spec is None:
+            return None
+        lease = Lease(job=QueueJob(**spec), worker=worker, expires=time.time() + ttl)
+        try:
+            fd = os.open(self._lease_path(job_id), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"worker": worker, "token": lease.token, "expires": lease.expires}, handle)
+        # The job may have been completed between reading its spec and taking the lease.
+        if not (self.pending_dir / f"{job_id}.json").exists():
+            self.release(lease)
+            return None
+        return lease
+
+    def _take_over(self, job_id: str, stale: Dict[str, Any], worker: str, ttl: float) -> Optional[Lease]:
+        """Replace the expired lease ``stale`` (as read earlier) with a new one for ``worker``."""
+        aside = _move_aside(self._lease_path(job_id))
+        if aside is None:
+            return None
+        if (_read(aside) or {}).get("token") != stale.get("token"):
+            # Another contender already replaced the stale lease; hand its fresh lease back.
+            _put_back(aside, self._lease_path(job_id))
+            return None
+        aside.unlink(missing_ok=True)
+        return self._try_lease(job_id, worker, ttl)
+
+    def claim(self, worker: str, ttl: float) -> Optional[Lease]:
+        """Lease the next unfinished job that nobody holds a live lease on."""
+        held = set(_names(self.leases_dir))
+        pending = _names(self.pending_dir)
+        for name in pending:
+            if name not in held:
+                lease = self._try_lease(name[: -len(".json")], worker, ttl)
+                if lease is not None:
+                    return lease
+        now = time.time()
+        for name in pending:
+            if name not in held:
+                continue
+            job_id = name[: -len(".json")]
+            current = _read(self._lease_path(job_id))
+            if current is None or current.get("expires", 0) >= now:
+                continue
+            # The holder stopped heartbeating.
+            lease = self._take_over(job_id, current, worker, ttl)
+            if lease is not None:
+                return lease
+        return None
+
+    def holds(self, lease: Lease) -> bool:
+        current = _read(self._lease_path(lease.job.id))
+        return current is not None and current.get("token") == lease.token
+
+    def _with_own_lease(self, lease: Lease) -> Optional[Path]:
+        """Move ``lease``'s file aside if it is still ours; otherwise leave the current owner's lease in place."""
+        path = self._lease_path(lease.job.id)
+        aside = _move_aside(path)
+        if aside is None:
+            return None
+        if (_read(aside) or {}).get("token") != lease.token:
+            _put_back(aside, path)
+            return None
+        return aside
+
+    def heartbeat(self, lease: Lease, ttl: float) -> bool:
+        """Extend ``lease``; returns False when it has been lost to another worker."""
+        aside = self._with_own_lease(lease)
+        if aside is None:
+            return False
+        lease.expires = time.time() + ttl
+        aside.write_text(
+            json.dumps({"worker": lease.worker, "token": lease.token, "expires": lease.expires}), encoding="utf-8"
+        )
+        return _put_back(aside, self._lease_path(lease.job.id))
+
+    def complete(self, lease: Lease, status: str = STATUS_OK, **details: Any) -> None:
+        name = f"{lease.job.id}.json"
+        record = {
+            "status": status,
+            "worker": lease.worker,
+            "finished_at": time.time(),
+            "job": asdict(lease.job),
+            **details,
+        }
+        _write_atomic((self.failed_dir if status == STATUS_FAILED else self.done_dir) / name, record)
+        (self.pending_dir / name).unlink(missing_ok=True)
+        self.release(lease)
+
+    def release(self, lease: Lease) -> None:
+        """Give a job back (e.g. on shutdown, or after completing it) so its lease no longer blocks anyone."""
+        aside = self._with_own_lease(lease)
+        if aside is not None:
+            aside.unlink(missing_ok=True)
+
+    def progress(self, by_worker: bool = False) -> QueueProgress:
+        """Count jobs from directory listings; ``by_worker`` also reads every outcome record."""
+        done, failed = _names(self.done_dir), _names(self.failed_dir)
+        pending = set(_names(self.pending_dir))
+        progress = QueueProgress(total=len(pending) + len(done) + len(failed), done=len(done), failed=len(failed))
+        now = time.time()
+        for name in _names(self.leases_dir):
+            lease = _read(self.leases_dir / name)
+            if name in pending and lease is not None and lease.get("expires", 0) >= now:
+                progress.leased += 1
+        if by_worker:
+            workers: Counter = Counter()
+            for directory, names in ((self.done_dir, done), (self.failed_dir, failed)):
+                for name in names:
+                    record = _read(directory / name) or {}
+                    workers[record.get("worker", "?")] += 1
+            progress.by_worker = dict(workers)
+        return progress
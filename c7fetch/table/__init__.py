@@ -182,7 +182,7 @@ class NegColTable(Table):
         else:
             yield from super().__rich_console__(console, options)
 
-    def __rich_measure__(self, console: "Console", options: "ConsoleOptions") -> Measurement:
+    def __rich_measure__(self, console: "Console", options: "ConsoleOptions") -> "Measurement":
         """Measure the minimum and maximum width of the table.
 
         Args:
@@ -1,19 +1,33 @@
+import itertools
 import json
+import os
+import pstats
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from pathlib import Path
 
 import pytest
+import requests
 from rich.console import Console
 from typer.testing import CliRunner
 
-from c7fetch.c7 import api
-from c7fetch.cli import common, fetch, review, search, settings
+from c7fetch.c7 import api, offline, ratelimit, remote, server
+from c7fetch.cli import budgets, common, fetch, fetching, main, probe, profiling, query, review, search, settings
+from c7fetch.store import archive, chunks, columns, fulltext, history, layout, reader, search_results
+from c7fetch.store import snippets as snippets_store
+from c7fetch.store import trigram, workqueue
 
 
 @pytest.fixture()
 def config_setup(tmp_path, monkeypatch):
     config_dir = tmp_path / "config"
     config_dir.mkdir()
-    config_file = config_dir / "settings.json"
+    config_file = config_dir / "config.json"
     config = {
         "output_dir": str(tmp_path / "out"),
         "apikey": "test-key",
@@ -132,3 +146,1021 @@ def test_resolve_api_key_prefers_env(monkeypatch):
     )
     monkeypatch.setenv("C7_KEY", "env-value")
     assert api._resolve_api_key() == "env-value"
+
+
+def test_profile_option_writes_stats(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    monkeypatch.chdir(tmp_path)
+
+    result = runner.invoke(main.app, ["--profile", "config", "describe"])
+
+    assert result.exit_code == 0, result.stdout
+    profiles = list(tmp_path.glob("c7fetch-profile-*.prof"))
+    assert len(profiles) == 1
+
+    # Values of other root options must not end the scan for a bare --profile.
+    for profile in profiles:
+        profile.unlink()
+    result = runner.invoke(main.app, ["--profile-top", "3", "--profile", "config", "describe"])
+    assert result.exit_code == 0, result.stdout
+    profiles = list(tmp_path.glob("c7fetch-profile-*.prof"))
+    assert len(profiles) == 1
+    pstats.Stats(str(profiles[0]))
+    summary = profiling.summary_path(profiles[0]).read_text(encoding="utf-8")
+    assert "cumulative" in summary
+
+
+def test_fetch_fans_out_over_topics(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    calls = []
+
+    def fake_fetch(library_id, **kwargs):
+        calls.append((library_id, kwargs["topic"]))
+        return api.FetchResponse(payload=f"# {kwargs['topic']}", content_type="text/markdown")
+
+    monkeypatch.setattr(api, "fetch", fake_fetch)
+    topics_file = tmp_path / "topics.txt"
+    topics_file.write_text("# comment\nhooks\n\nrouting\n", encoding="utf-8")
+
+    result = runner.invoke(fetch.app, ["--topic", "state", "--topics-file", str(topics_file), "/libs/react"])
+
+    assert result.exit_code == 0, result.stdout
+    assert sorted(calls) == [("/libs/react", "hooks"), ("/libs/react", "routing"), ("/libs/react", "state")]
+    output_dir = common.config_path("output_dir")
+    for topic in ("state", "hooks", "routing"):
+        target = output_dir / common.auto_filename(["/libs/react", topic], "md")
+        assert target.read_text(encoding="utf-8") == f"# {topic}"
+    assert "Fetch Summary" in result.stdout
+
+    def flaky_fetch(library_id, **kwargs):
+        if kwargs["topic"] == "hooks":
+            raise api.ApiError("Context7 API error 500", status=500)
+        return api.FetchResponse(payload=f"# again {kwargs['topic']}", content_type="text/markdown")
+
+    monkeypatch.setattr(api, "fetch", flaky_fetch)
+    result = runner.invoke(
+        fetch.app, ["--overwrite", "--topic", "hooks", "--topic", "routing", "--jobs", "2", "/libs/react"]
+    )
+
+    assert result.exit_code == 1
+    assert "Fetch /libs/react failed: Context7 API error 500" in result.stdout
+    assert "1 of 2 fetch(es) failed." in result.stdout
+    routing = output_dir / common.auto_filename(["/libs/react", "routing"], "md")
+    assert routing.read_text(encoding="utf-8") == "# again routing"
+
+
+def test_fetch_stores_documents_as_they_complete(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    output_dir = common.config_path("output_dir")
+    fast_file = output_dir / common.auto_filename(["/libs/fast"], "md")
+
+    def fake_fetch(library_id, **kwargs):
+        if library_id == "/libs/slow":
+            deadline = time.monotonic() + 2
+            while not fast_file.exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+        return api.FetchResponse(payload=f"# {library_id}", content_type="text/markdown")
+
+    monkeypatch.setattr(api, "fetch", fake_fetch)
+
+    result = runner.invoke(fetch.app, ["--jobs", "2", "/libs/slow", "/libs/fast"])
+
+    assert result.exit_code == 0, result.stdout
+    assert result.stdout.index("libs_fast.md") < result.stdout.index("libs_slow.md")
+
+
+def test_fetch_adaptive_grows_and_records_budget(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    requested = []
+
+    def fake_fetch(library_id, **kwargs):
+        requested.append(kwargs["tokens"])
+        return api.FetchResponse(payload="x" * min(kwargs["tokens"] * 4, 20000), content_type="text/markdown")
+
+    monkeypatch.setattr(api, "fetch", fake_fetch)
+
+    result = runner.invoke(fetch.app, ["--adaptive", "/libs/react"])
+
+    assert result.exit_code == 0, result.stdout
+    assert requested == [2000, 4000, 8000]
+    # 20000 bytes fit in 5264 tokens without looking truncated, so that is what is remembered.
+    assert budgets.load_budgets() == {"/libs/react": 5264}
+
+    requested.clear()
+    result = runner.invoke(fetch.app, ["--adaptive", "/libs/react"])
+
+    assert result.exit_code == 0, result.stdout
+    assert requested == [5264]
+    # A budgets file that is not a JSON object is ignored rather than crashing.
+    budgets.budgets_path().write_text("[]", encoding="utf-8")
+    assert budgets.load_budgets() == {}
+    budgets.record_budgets({"/libs/react": 5264})
+
+    # A document that shrank lowers its recorded budget.
+    def shrunk_fetch(library_id, **kwargs):
+        requested.append(kwargs["tokens"])
+        return api.FetchResponse(payload="x" * 2000, content_type="text/markdown")
+
+    monkeypatch.setattr(api, "fetch", shrunk_fetch)
+    requested.clear()
+    result = runner.invoke(fetch.app, ["--adaptive", "/libs/react"])
+    assert requested == [5264]
+    assert budgets.load_budgets() == {"/libs/react": 527}
+
+    # A larger request answered 304 stops growing instead of being measured as a tiny payload.
+    responses = iter(
+        [
+            api.FetchResponse(payload="x" * 2200, content_type="text/markdown"),
+            api.FetchResponse(payload=None, content_type="text/markdown", not_modified=True),
+        ]
+    )
+    monkeypatch.setattr(api, "fetch", lambda library_id, **kwargs: next(responses))
+    result = runner.invoke(fetch.app, ["--adaptive", "/libs/react"])
+    assert result.exit_code == 0, result.stdout
+    assert budgets.load_budgets() == {"/libs/react": 527}
+    assert (common.config_path("output_dir") / "libs_react.md").read_text() == "x" * 2200
+
+
+def test_query_finds_fetched_documents(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    payloads = {
+        "/libs/react": "# React\n\nuseState lets a component remember values.",
+        "/libs/vue": "# Vue\n\nref and reactive create reactive state.",
+    }
+    monkeypatch.setattr(
+        api,
+        "fetch",
+        lambda library_id, **kwargs: api.FetchResponse(payload=payloads[library_id], content_type="text/markdown"),
+    )
+
+    output_dir = common.config_path("output_dir")
+    result = runner.invoke(fetch.app, ["/libs/react"])
+    assert result.exit_code == 0, result.stdout
+    assert not fulltext.index_path(output_dir).exists()
+
+    result = runner.invoke(main.app, ["config", "set", "fulltext_index", "true"])
+    assert result.exit_code == 0, result.stdout
+    result = runner.invoke(fetch.app, ["--overwrite", "/libs/react", "/libs/vue"])
+    assert result.exit_code == 0, result.stdout
+    assert fulltext.index_path(output_dir).exists()
+
+    result = runner.invoke(query.app, ["--no-refresh", "usestate"])
+
+    assert result.exit_code == 0, result.stdout
+    assert "libs_react.md" in result.stdout
+    assert "libs_vue.md" not in result.stdout
+
+    (output_dir / "libs_vue.md").write_text("# Vue\n\nNow with useState too.", encoding="utf-8")
+    with fulltext.FullTextIndex(output_dir) as index:
+        assert index.refresh() == 1
+        assert {hit.path.name for hit in index.query("usestate")} == {"libs_react.md", "libs_vue.md"}
+
+
+def test_fetch_writes_section_chunks(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    document = (
+        "TITLE: Install\nDESCRIPTION: Añadir the package.\n\n```bash\nnpm i react\n----------\n```\n"
+        "----------------------------------------\n\n"
+        "TITLE: Render\nCODE:\n```js\nrender(<App />)\n```\n"
+        "## Notes\nHeadings start their own section.\n"
+    )
+    monkeypatch.setattr(
+        api,
+        "fetch",
+        lambda library_id, **kwargs: api.FetchResponse(payload=document, content_type="text/markdown"),
+    )
+
+    result = runner.invoke(fetch.app, ["--chunks", "/libs/react"])
+
+    assert result.exit_code == 0, result.stdout
+    target = common.config_path("output_dir") / common.auto_filename(["/libs/react"], "md")
+    records = list(chunks.read_chunks(chunks.chunk_path(target)))
+    assert [c.title for c in records] == ["Install", "Render", "Notes"]
+    raw = target.read_bytes()
+    for record in records:
+        assert raw[record.start : record.end].decode("utf-8") == record.text
+    assert "npm i react\n----------" in records[0].text
+
+
+def test_fetch_archive_mode_appends_to_bundle(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    versions = iter(["# v1", "# v2", "# hooks"])
+    monkeypatch.setattr(
+        api,
+        "fetch",
+        lambda library_id, **kwargs: api.FetchResponse(payload=next(versions), content_type="text/markdown"),
+    )
+    bundle_path = tmp_path / "docs.c7a"
+
+    for args in (["/libs/react"], ["/libs/react"], ["--topic", "hooks", "/libs/react"]):
+        result = runner.invoke(fetch.app, ["--archive", str(bundle_path), *args])
+        assert result.exit_code == 0, result.stdout
+
+    monkeypatch.setattr(
+        api,
+        "fetch",
+        lambda library_id, **kwargs: api.FetchResponse(payload={"snippets": []}, content_type="application/json"),
+    )
+    result = runner.invoke(fetch.app, ["--archive", str(bundle_path), "--format", "json", "/libs/react"])
+    assert result.exit_code == 0, result.stdout
+    result = runner.invoke(fetch.app, ["--archive", str(bundle_path), "--no-overwrite", "/libs/react"])
+    assert result.exit_code == 0, result.stdout
+    assert "already in" in result.stdout
+
+    assert not common.config_path("output_dir").exists()
+    with archive.Archive(bundle_path) as bundle:
+        assert bundle.read("/libs/react") == "# v2"
+        assert bundle.read("/libs/react", fmt="json") == {"snippets": []}
+        assert bundle.read("/libs/react", "hooks") == "# hooks"
+        assert len(bundle.entries("/libs/react")) == 4
+        with pytest.raises(archive.ArchiveError):
+            bundle.read("/libs/vue")
+
+
+def test_mapped_document_slices_lines_and_sections(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_bytes("TITLE: Intro\nHällo\n----------\n## Usage\ncall()\n".encode("utf-8"))
+
+    with reader.open_document(path) as document:
+        assert [bytes(line) for line in document.iter_lines()][1] == "Hällo\n".encode("utf-8")
+        sections = [(section.title, view.tobytes()) for section, view in document.iter_sections()]
+        assert sections == [("Intro", "TITLE: Intro\nHällo\n".encode("utf-8")), ("Usage", b"## Usage\ncall()\n")]
+        offset = document.find(b"call")
+        assert document.text(offset, offset + 6) == "call()"
+        assert isinstance(document.slice(0, 5), memoryview)
+
+    # Lone carriage returns end lines exactly as they do for the .chunks.jsonl files.
+    text = "Intro\r## One\rbody\r\n## Two\nmore\n"
+    path.write_bytes(text.encode("utf-8"))
+    with reader.open_document(path) as document:
+        sections = [(section.title, section.start, section.end) for section, _view in document.iter_sections()]
+    assert sections == [(chunk.title, chunk.start, chunk.end) for chunk in chunks.split_markdown(text)]
+    assert len(sections) == 3
+
+
+def test_review_parses_in_parallel_and_reuses_cache(tmp_path, config_setup, monkeypatch):
+    runner = CliRunner()
+    search_dir = common.config_path("search_dir")
+    for idx in range(search_results.PARALLEL_MIN_FILES + 2):
+        common.write_json(
+            search_dir / f"q{idx:02d}.json",
+            {"results": [{"id": f"/libs/lib{idx:02d}", "title": f"Lib {idx}", "stars": idx}]},
+        )
+    monkeypatch.setattr(review, "console", Console(width=200, force_terminal=True, record=True))
+
+    result = runner.invoke(review.app, ["--jobs", "2", "--merge"])
+
+    assert result.exit_code == 0, result.stdout
+    rendered = review.console.export_text()
+    positions = [rendered.index(f"/libs/lib{idx:02d}") for idx in range(search_results.PARALLEL_MIN_FILES + 2)]
+    assert positions == sorted(positions)
+    cache = search_results.default_cache()
+    shards = {path.name: path.stat().st_mtime_ns for path in cache.directory.glob("*.jsonl")}
+    assert len(shards) == search_results.PARALLEL_MIN_FILES + 2
+
+    # A changed file only rewrites its own shard.
+    changed = search_dir / "q00.json"
+    common.write_json(changed, {"results": [{"id": "/libs/renamed", "title": "Renamed"}]})
+    result = runner.invoke(review.app, ["--jobs", "2", "--merge"])
+    assert result.exit_code == 0, result.stdout
+    rewritten = {path.name for path in cache.directory.glob("*.jsonl") if path.stat().st_mtime_ns != shards[path.name]}
+    assert rewritten == {cache.shard_path(changed).name}
+
+    def fail_parse(_path, *_args, **_kwargs):  # pragma: no cover - safety guard
+        raise AssertionError("unchanged files should come from the cache")
+
+    monkeypatch.setattr(search_results, "parse_file", fail_parse)
+    monkeypatch.setattr(review, "console", Console(width=200, force_terminal=True, record=True))
+
+    result = runner.invoke(review.app, ["--jobs", "1", "--library", "/libs/lib03"])
+
+    assert result.exit_code == 0, result.stdout
+    assert "/libs/lib03" in review.console.export_text()
+
+
+def test_review_filters_and_sorts_by_age(tmp_path, config_setup, monkeypatch):
+    runner = CliRunner()
+    search_dir = common.config_path("search_dir")
+    payload = {
+        "results": [
+            {"id": "/libs/old", "title": "Old", "lastUpdateDate": "2025-01-01T00:00:00Z", "stars": 900},
+            {"id": "/libs/fresh", "title": "Fresh", "lastUpdateDate": "2025-09-20T12:00:00Z", "stars": 5},
+            {"id": "/libs/recent", "title": "Recent", "lastUpdateDate": "2025-09-11T00:00:00Z", "stars": 50},
+            {"id": "/libs/undated", "title": "Undated", "lastUpdateDate": "soon", "stars": 1},
+        ]
+    }
+    common.write_json(search_dir / "libs.json", payload)
+    monkeypatch.setattr(review, "_current_time", lambda: datetime(2025, 9, 21, tzinfo=timezone.utc))
+    monkeypatch.setattr(review, "console", Console(width=160, force_terminal=True, record=True))
+
+    result = runner.invoke(review.app, ["--max-age", "30", "--sort", "updated"])
+
+    assert result.exit_code == 0, result.stdout
+    rendered = review.console.export_text()
+    assert "/libs/old" not in rendered
+    assert "/libs/undated" not in rendered
+    assert rendered.index("/libs/fresh") < rendered.index("/libs/recent")
+    assert "1 day" in rendered
+    assert "10 days" in rendered
+
+    monkeypatch.setattr(review, "console", Console(width=160, force_terminal=True, record=True))
+    result = runner.invoke(review.app, ["--sort", "stars", "--merge"])
+
+    rendered = review.console.export_text()
+    order = [rendered.index(f"/libs/{name}") for name in ("old", "recent", "fresh", "undated")]
+    assert order == sorted(order)
+    assert "soon" in rendered
+
+
+def test_review_watch_ingests_only_new_files(tmp_path, config_setup, monkeypatch):
+    runner = CliRunner()
+    search_dir = common.config_path("search_dir")
+    common.write_json(search_dir / "first.json", {"results": [{"id": "/libs/first", "title": "First"}]})
+    parsed_paths = []
+    original_parse = search_results.parse_file
+
+    def counting_parse(path, *args, **kwargs):
+        parsed_paths.append(path.name)
+        return original_parse(path, *args, **kwargs)
+
+    sleeps = iter(["add", "stop"])
+
+    def fake_sleep(_seconds):
+        step = next(sleeps)
+        if step == "add":
+            common.write_json(search_dir / "second.json", {"results": [{"id": "/libs/second", "title": "Second"}]})
+        else:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(search_results, "parse_file", counting_parse)
+    monkeypatch.setattr(review.time, "sleep", fake_sleep)
+    monkeypatch.setattr(review, "console", Console(width=160, force_terminal=True, record=True))
+
+    result = runner.invoke(review.app, ["--watch", "--merge", "--jobs", "1", "--no-cache"])
+
+    assert result.exit_code == 0, result.stdout
+    assert parsed_paths == ["first.json", "second.json"]
+    rendered = review.console.export_text()
+    assert "/libs/second" in rendered
+    assert "Done." in result.stdout
+
+
+def test_serve_daemon_forwards_and_caches(tmp_path, monkeypatch, config_setup):
+    upstream_calls = []
+
+    class FakeResponse:
+        def __init__(self, body, status_code=200):
+            self._body = body
+            self.text = json.dumps(body)
+            self.status_code = status_code
+            self.headers = {"ETag": '"v1"'}
+
+        def json(self):
+            return self._body
+
+    def fake_request(path, *, params=None, accept="application/json", conditional=None):
+        upstream_calls.append((path, params))
+        if conditional:
+            assert conditional == {"If-None-Match": '"v1"'}
+            return FakeResponse(None, status_code=304)
+        return FakeResponse({"results": [{"id": "/libs/react", "title": "React"}]})
+
+    monkeypatch.setattr(api, "_request", fake_request)
+    daemon = server.create_server("127.0.0.1", 0, cache_ttl=60)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    try:
+        config_file = tmp_path / "config" / "config.json"
+        config = json.loads(config_file.read_text(encoding="utf-8"))
+        config["server_url"] = daemon.url
+        config_file.write_text(json.dumps(config), encoding="utf-8")
+
+        runner = CliRunner()
+        for _ in range(2):
+            result = runner.invoke(search.app, ["React"])
+            assert result.exit_code == 0, result.stdout
+        assert upstream_calls == [("search", {"query": "React"})]
+
+        monkeypatch.setattr(review, "console", Console(width=160, force_terminal=True, record=True))
+        result = runner.invoke(review.app, ["--library", "/libs/*"])
+        assert result.exit_code == 0, result.stdout
+        assert "/libs/react" in review.console.export_text()
+
+        # Conditional fetches keep working through the daemon.
+        response = api.fetch("/libs/react", etag='"v1"')
+        assert response.not_modified and response.payload is None
+        assert response.etag == '"v1"'
+
+        token_file = remote.token_path(daemon.port)
+        assert token_file.stat().st_mode & 0o777 == 0o600
+        token = {remote.TOKEN_HEADER: token_file.read_text(encoding="utf-8")}
+        assert requests.get(f"{daemon.url}/health", timeout=5).status_code == 401
+        assert (
+            requests.get(f"{daemon.url}/health", headers={remote.TOKEN_HEADER: "tökén"}, timeout=5).status_code == 401
+        )
+        # A second daemon gets its own token file and leaves the first one's clients alone.
+        second = server.create_server("127.0.0.1", 0)
+        assert remote.token_path(second.port) != token_file
+        second.server_close()
+        assert not remote.token_path(second.port).exists()
+        assert requests.get(f"{daemon.url}/health", headers=token, timeout=5).status_code == 200
+        assert requests.get(f"{daemon.url}/health", headers=token, timeout=5).status_code == 200
+        rebound = {**token, "Host": f"attacker.example:{daemon.server_address[1]}"}
+        assert requests.get(f"{daemon.url}/search", headers=rebound, timeout=5).status_code == 403
+        from_page = {**token, "Origin": "http://attacker.example"}
+        assert requests.get(f"{daemon.url}/search", headers=from_page, timeout=5).status_code == 403
+    finally:
+        daemon.shutdown()
+        daemon.server_close()
+    assert not token_file.exists()
+
+    with pytest.raises(ValueError):
+        server.create_server("0.0.0.0", 0)
+
+
+def test_response_cache_evicts_expired_and_oversized_entries(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: clock[0])
+    cache = server.ResponseCache(10, max_entries=2, max_bytes=40)
+
+    for name in ("a", "b", "c"):
+        cache.get_or_compute("search", {"query": name}, lambda name=name: {"q": name})
+    assert len(cache) == 2
+    calls = []
+    cache.get_or_compute("search", {"query": "a"}, lambda: calls.append("a") or {"q": "a"})
+    assert calls == ["a"]
+
+    clock[0] = 11.0
+    cache.get_or_compute("search", {"query": "d"}, lambda: {"q": "d"})
+    assert len(cache) == 1
+    cache.get_or_compute("search", {"query": "big"}, lambda: {"q": "x" * 64})
+    assert len(cache) == 1
+    assert cache.size <= 40
+
+
+def test_identical_in_flight_requests_are_coalesced(monkeypatch, config_setup):
+    release = threading.Event()
+    calls = []
+
+    class FakeSession:
+        def get(self, url, params=None, headers=None, timeout=None):
+            calls.append((url, params))
+            release.wait(5)
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b'{"results": []}'
+            return response
+
+    monkeypatch.setattr(api, "_session", FakeSession())
+    monkeypatch.setattr(api, "_rate_limit_delay", lambda: None)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(api.search, "react") for _ in range(4)]
+        while not calls:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert results == [{"results": []}] * 4
+
+
+def test_fetch_schedule_orders_by_priority_fairness_and_size(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    common.write_json(
+        common.config_path("search_dir") / "catalog.json",
+        {
+            "results": [
+                {"id": "/big/huge", "totalTokens": 900},
+                {"id": "/big/large", "totalTokens": 500},
+                {"id": "/big/small", "totalTokens": 50},
+                {"id": "/tiny/doc", "totalTokens": 300},
+                {"id": "/vip/docs", "totalTokens": 1000},
+            ]
+        },
+    )
+    order = []
+
+    def fake_fetch(library_id, **kwargs):
+        order.append(library_id)
+        return api.FetchResponse(payload="# doc", content_type="text/markdown")
+
+    monkeypatch.setattr(api, "fetch", fake_fetch)
+
+    library_ids = ["/big/huge", "/big/large", "/big/small", "/tiny/doc", "/vip/docs"]
+    result = runner.invoke(fetch.app, ["--jobs", "1", "--schedule", "--priority", "/vip/*=5", *library_ids])
+
+    assert result.exit_code == 0, result.stdout
+    assert order == ["/vip/docs", "/big/small", "/tiny/doc", "/big/large", "/big/huge"]
+
+
+def test_fetch_probe_skips_unchanged_and_oversized(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    catalog_file = common.config_path("search_dir") / "catalog.json"
+    results = [
+        {"id": "/acme/docs", "lastUpdateDate": "2025-01-01T00:00:00Z", "totalTokens": 500},
+        {"id": "/acme/huge", "lastUpdateDate": "2025-01-01T00:00:00Z", "totalTokens": 90000},
+    ]
+    common.write_json(catalog_file, {"results": results})
+    calls = []
+
+    def fake_fetch(library_id, **kwargs):
+        calls.append((library_id, kwargs.get("etag")))
+        if kwargs.get("etag"):
+            return api.FetchResponse(payload=None, content_type="text/markdown", etag='"v1"', not_modified=True)
+        return api.FetchResponse(payload="# doc", content_type="text/markdown", etag='"v1"')
+
+    monkeypatch.setattr(api, "fetch", fake_fetch)
+    args = ["--probe", "--max-size", "1000", "/acme/docs", "/acme/huge"]
+
+    first = runner.invoke(fetch.app, args)
+    assert first.exit_code == 0, first.stdout
+    assert calls == [("/acme/docs", None)]
+    assert "exceeds" in first.stdout
+
+    second = runner.invoke(fetch.app, args)
+    assert second.exit_code == 0, second.stdout
+    assert calls == [("/acme/docs", None)]
+    assert "unchanged since" in second.stdout
+
+    results[0]["lastUpdateDate"] = "2025-02-01T00:00:00Z"
+    catalog_file.write_text(json.dumps({"results": results, "padding": True}), encoding="utf-8")
+    third = runner.invoke(fetch.app, args)
+    assert third.exit_code == 0, third.stdout
+    assert calls[-1] == ("/acme/docs", '"v1"')
+    assert "not modified" in third.stdout
+
+    # The 304 refreshed the probe state, so the next run skips without asking again.
+    fourth = runner.invoke(fetch.app, args)
+    assert fourth.exit_code == 0, fourth.stdout
+    assert len(calls) == 2
+    assert "unchanged since" in fourth.stdout
+
+    # State written by another version (unknown keys) or corrupted into a non-object still loads.
+    states = json.loads(probe.state_path().read_text(encoding="utf-8"))
+    for state in states.values():
+        state["content_hash"] = "abc"
+    probe.state_path().write_text(json.dumps(states), encoding="utf-8")
+    fifth = runner.invoke(fetch.app, args)
+    assert fifth.exit_code == 0, fifth.stdout
+    assert "unchanged since" in fifth.stdout
+    probe.state_path().write_text("[]", encoding="utf-8")
+    assert probe.load_states() == {}
+
+
+def test_fetch_sharded_layout_records_index(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    config_file = Path(settings.config_file_path())
+    config = json.loads(config_file.read_text(encoding="utf-8"))
+    config_file.write_text(json.dumps({**config, "output_layout": "org"}), encoding="utf-8")
+    monkeypatch.setattr(
+        api, "fetch", lambda library_id, **kwargs: api.FetchResponse(payload="# doc", content_type="text/markdown")
+    )
+
+    result = runner.invoke(fetch.app, ["/vercel/next.js", "/facebook/react"])
+
+    assert result.exit_code == 0, result.stdout
+    base_dir = common.config_path("output_dir")
+    assert (base_dir / "vercel" / "vercel_next.js.md").read_text(encoding="utf-8") == "# doc"
+    index = layout.OutputIndex(base_dir, "hash")
+    assert index.lookup("/facebook/react", None, "md") == base_dir / "facebook" / "facebook_react.md"
+    # Already indexed documents keep their location when the layout changes.
+    assert index.path_for("/vercel/next.js", None, "md") == base_dir / "vercel" / "vercel_next.js.md"
+    assert index.path_for("/acme/new", None, "md").parent.name == layout.shard_for("/acme/new", "hash")
+
+    # Writers sharing output_dir merge their records instead of the last save winning.
+    first, second = layout.OutputIndex(base_dir, "org"), layout.OutputIndex(base_dir, "org")
+    first.record("/acme/one", None, "md", base_dir / "acme" / "one.md")
+    second.record("/acme/two", None, "md", base_dir / "acme" / "two.md")
+    first.save()
+    second.save()
+    merged = layout.OutputIndex(base_dir, "org")
+    assert merged.contains("/acme/one", None, "md") and merged.contains("/acme/two", None, "md")
+    assert merged.contains("/vercel/next.js", None, "md")
+
+    # An index entry whose file was deleted does not count as stored.
+    writer = fetching.OutputWriter(
+        base_dir=base_dir, fmt="text", output=None, overwrite=False, chunks=False, archive_path=None
+    )
+    job = fetching.FetchJob("/vercel/next.js", None, 1000)
+    assert writer.has(job)
+    (base_dir / "vercel" / "vercel_next.js.md").unlink()
+    assert not writer.has(job)
+
+
+def test_history_delta_of_large_document_is_fast():
+    snippets = [
+        f"TITLE: Snippet {i}\nDESCRIPTION: Step {i % 50}.\n\nCODE:\n```js\nrun({i % 7});\n```\n\n{'-' * 40}\n\n"
+        for i in range(3000)
+    ]
+    old = "".join(snippets)
+    snippets[100] = "TITLE: Changed\n"
+    snippets.insert(2000, "TITLE: Added\n\n")
+    del snippets[2500]
+    new = "".join(snippets)
+
+    started = time.perf_counter()
+    delta = history.make_delta(old, new)
+    assert time.perf_counter() - started < 2
+    assert history.apply_delta(old, delta) == new
+    assert history.apply_delta(old, history.make_delta(old, old)) == old
+
+
+def test_fetch_history_records_deltas_and_materializes(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    base = "".join(f"line {i}\n" for i in range(200))
+    versions = [base, base.replace("line 50\n", "line fifty\n"), base + "appended\n", base + "appended\n"]
+    payloads = iter(versions)
+    monkeypatch.setattr(
+        api,
+        "fetch",
+        lambda library_id, **kwargs: api.FetchResponse(payload=next(payloads), content_type="text/markdown"),
+    )
+
+    for _ in versions:
+        result = runner.invoke(fetch.app, ["--history", "--no-overwrite", "/libs/react"])
+        assert result.exit_code == 0, result.stdout
+
+    base_dir = common.config_path("output_dir")
+    with history.open_history(base_dir) as store:
+        revisions = store.revisions("/libs/react", None, "text/markdown")
+        # The unchanged fourth fetch adds no revision; later ones are small deltas.
+        assert [rev.keyframe for rev in revisions] == [True, False, False]
+        assert all(rev.stored < revisions[0].stored for rev in revisions[1:])
+        for rev, expected in zip(revisions, versions):
+            assert store.materialize("/libs/react", None, "text/markdown", rev.revision) == expected
+
+    target = tmp_path / "rev2.md"
+    result = runner.invoke(main.app, ["history", "--revision", "2", "--output", str(target), "/libs/react"])
+    assert result.exit_code == 0, result.stdout
+    assert target.read_text(encoding="utf-8") == versions[1]
+    listing = runner.invoke(main.app, ["history", "/libs/react"])
+    assert "keyframe" in listing.stdout and "delta" in listing.stdout
+
+
+def test_fetch_json_snippets_are_stored_and_queryable(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    payloads = {
+        "/libs/react": {
+            "snippets": [
+                {
+                    "codeTitle": "Render a root",
+                    "codeId": "https://react.dev/reference/client",
+                    "codeList": [{"language": "jsx", "code": "root.render(<App />)"}],
+                },
+                {"codeTitle": "Install", "codeLanguage": "bash", "codeId": "https://react.dev/learn"},
+            ]
+        },
+        "/libs/vue": [{"title": "Mount", "language": "JS", "source": "https://vuejs.org/guide"}],
+    }
+    monkeypatch.setattr(
+        api,
+        "fetch",
+        lambda library_id, **kwargs: api.FetchResponse(payload=payloads[library_id], content_type="application/json"),
+    )
+
+    result = runner.invoke(fetch.app, ["--format", "json", "--snippets", "/libs/react", "/libs/vue"])
+    assert result.exit_code == 0, result.stdout
+
+    with snippets_store.open_store(common.config_path("output_dir")) as store:
+        assert [s.title for s in store.select(language="js")] == ["Mount"]
+        assert [s.library_id for s in store.select(source="https://react.dev/*")] == ["/libs/react"] * 2
+        rendered = store.select(title="Render*")[0]
+        assert (rendered.language, rendered.code) == ("jsx", "root.render(<App />)")
+
+    listing = runner.invoke(main.app, ["snippets", "--json", "--language", "bash"])
+    assert listing.exit_code == 0, listing.stdout
+    assert [json.loads(line)["title"] for line in listing.stdout.splitlines()] == ["Install"]
+
+
+def test_search_file_results_stream_with_bounded_memory(tmp_path):
+    path = tmp_path / "merged.json"
+    results = [{"id": f"/org/lib{i}", "title": f"Lib {i}", "readme": "x" * 5000} for i in range(1000)]
+    path.write_text(json.dumps({"query": "merged", "meta": {"pages": [1, 2]}, "results": results}), encoding="utf-8")
+
+    tracemalloc.start()
+    try:
+        parsed = search_results.parse_file(path)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert parsed.error is None
+    assert [r["id"] for r in parsed.results] == [r["id"] for r in results]
+    assert "readme" not in parsed.results[0]
+    assert peak < path.stat().st_size // 5
+
+    # Filters run on the stream: only matching rows are kept, while the cache shard gets them all.
+    filters = search_results.Filters(library="/org/lib99*")
+    cache = search_results.ParseCache(tmp_path / "cache")
+    tracemalloc.start()
+    try:
+        filtered = cache.parse(path, filters)
+        _current, filtered_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert [r["id"] for r in filtered.results] == ["/org/lib99", *(f"/org/lib{i}" for i in range(990, 1000))]
+    assert filtered_peak < peak
+    assert len(cache.get(path).results) == len(results)
+    assert len(cache.get(path, filters).results) == 11
+
+
+def test_warm_then_offline_serves_from_store(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            {"searches": [" react | vue "], "fetches": ["/libs/react", {"library_id": "/libs/vue", "topic": "router"}]}
+        ),
+        encoding="utf-8",
+    )
+    online_fetch, online_search = api.fetch, api.search
+
+    monkeypatch.setattr(api, "search", lambda query, **kwargs: {"query": query, "results": [{"id": "/libs/react"}]})
+    monkeypatch.setattr(
+        api,
+        "fetch",
+        lambda library_id, **kwargs: api.FetchResponse(payload=f"# {library_id}", content_type="text/markdown"),
+    )
+    warmed = runner.invoke(main.app, ["warm", "--jobs", "2", str(manifest)])
+    assert warmed.exit_code == 0, warmed.stdout
+    assert "Warmed 4 of 4" in warmed.stdout
+
+    def no_network(*_args, **_kwargs):
+        raise AssertionError("offline mode must not touch the network")
+
+    monkeypatch.setattr(api, "fetch", online_fetch)
+    monkeypatch.setattr(api, "_send_request", no_network)
+    result = runner.invoke(main.app, ["--offline", "fetch", "--topic", "router", "/libs/vue"])
+    assert result.exit_code == 0, result.stdout
+    target = common.config_path("output_dir") / common.auto_filename(["/libs/vue", "router"], "md")
+    assert target.read_text(encoding="utf-8") == "# /libs/vue"
+
+    missing = runner.invoke(main.app, ["--offline", "fetch", "/libs/angular"])
+    assert missing.exit_code == 1
+    assert "no stored response" in missing.stdout
+
+    # Manifest searches are keyed like `c7fetch search` normalizes its argument.
+    monkeypatch.setattr(api, "search", online_search)
+    searched = runner.invoke(main.app, ["--offline", "search", "vue"])
+    assert searched.exit_code == 0, searched.stdout
+    assert offline.store_path() in offline._open_stores
+
+
+def test_pipeline_searches_filters_and_fetches_top_k(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    responses = {
+        "react": {
+            "results": [
+                {"id": "/facebook/react", "title": "React", "stars": 200},
+                {"id": "/acme/react-clone", "title": "Clone", "stars": 5},
+                {"id": "/facebook/react-native", "title": "React Native", "stars": 100},
+            ]
+        },
+        "vue": {"results": [{"id": "/vuejs/core", "title": "Vue", "stars": 50}, {"id": "/facebook/react", "stars": 1}]},
+    }
+    fetched = []
+    monkeypatch.setattr(api, "search", lambda query, **kwargs: responses[query])
+
+    def fake_fetch(library_id, **kwargs):
+        fetched.append(library_id)
+        return api.FetchResponse(payload=f"# {library_id}", content_type="text/markdown")
+
+    monkeypatch.setattr(api, "fetch", fake_fetch)
+
+    result = runner.invoke(
+        main.app, ["pipeline", "--library", "/facebook/*", "--sort", "stars", "--top", "1", "react", "vue"]
+    )
+
+    assert result.exit_code == 0, result.stdout
+    assert fetched == ["/facebook/react"]
+    assert (common.config_path("output_dir") / common.auto_filename(["/facebook/react"], "md")).exists()
+    assert not common.config_path("search_dir").exists()
+
+
+def test_api_key_pool_rotates_and_sidelines_bad_keys(monkeypatch, config_setup):
+    config_file = Path(settings.config_file_path())
+    config = json.loads(config_file.read_text(encoding="utf-8"))
+    config.update({"apikey_pool": "key-a, key-b, env:C7_POOL_KEY", "request_delay": "0"})
+    config_file.write_text(json.dumps(config), encoding="utf-8")
+    monkeypatch.setenv("C7_POOL_KEY", "key-c")
+    used = []
+
+    class FakeSession:
+        def get(self, url, params=None, headers=None, timeout=None):
+            key = headers["Authorization"].removeprefix("Bearer ")
+            used.append(key)
+            response = requests.Response()
+            response.status_code = {"key-a": 401, "key-b": 429}.get(key, 200)
+            response.headers["Retry-After"] = "60"
+            response._content = b'{"results": []}'
+            return response
+
+    monkeypatch.setattr(api, "_session", FakeSession())
+
+    assert api.search("first") == {"results": []}
+    assert api.search("second") == {"results": []}
+    # key-a is dropped after its 401 and key-b cools down after its 429; key-c serves the rest.
+    assert used == ["key-a", "key-b", "key-c", "key-c"]
+
+    throttled = requests.Response()
+    for value in ("0", "Wed, 21 Oct 2015 07:28:00 GMT"):
+        throttled.headers["Retry-After"] = value
+        assert api._retry_after(throttled) == api._MIN_COOLDOWN
+
+    # Even when cooldowns are disabled, a persistent 429 ends with an error instead of spinning.
+    class ThrottledSession:
+        def get(self, url, params=None, headers=None, timeout=None):
+            used.append(headers["Authorization"])
+            response = requests.Response()
+            response.status_code = 429
+            response.headers["Retry-After"] = "0"
+            return response
+
+    monkeypatch.setattr(api, "_session", ThrottledSession())
+    monkeypatch.setattr(api, "_MIN_COOLDOWN", 0.0)
+    used.clear()
+    with pytest.raises(api.HttpError):
+        api.search("third")
+    assert len(used) == api._MAX_ATTEMPTS_PER_KEY * 3
+
+
+def test_queue_workers_share_leased_jobs(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    queue_dir = tmp_path / "queue"
+    submitted = runner.invoke(
+        main.app, ["queue", "submit", "--queue-dir", str(queue_dir), "/libs/a", "/libs/b", "/libs/broken"]
+    )
+    assert submitted.exit_code == 0, submitted.stdout
+    again = runner.invoke(main.app, ["queue", "submit", "--queue-dir", str(queue_dir), "/libs/a"])
+    assert "Queued 0 new job(s)" in again.stdout
+
+    queue = workqueue.WorkQueue(queue_dir)
+    # A worker that claimed a job and died: its lease expires and the job is taken over.
+    ghost = queue.claim("ghost", ttl=0.01)
+    other = queue.claim("other", ttl=60)
+    assert ghost is not None and other is not None and other.job.id != ghost.job.id
+    queue.release(other)
+    time.sleep(0.05)
+
+    def fake_fetch(library_id, **kwargs):
+        if library_id == "/libs/broken":
+            raise api.HttpError("boom", status=500)
+        return api.FetchResponse(payload=f"# {library_id}", content_type="text/markdown")
+
+    monkeypatch.setattr(api, "fetch", fake_fetch)
+    worked = runner.invoke(main.app, ["queue", "work", "--queue-dir", str(queue_dir), "--worker-id", "w1"])
+    assert worked.exit_code == 0, worked.stdout
+    assert "finished 2 job(s), 1 failed" in worked.stdout
+    assert queue.heartbeat(ghost, 60) is False
+    for library_id in ("/libs/a", "/libs/b"):
+        assert (common.config_path("output_dir") / common.auto_filename([library_id], "md")).exists()
+
+    progress = queue.progress()
+    assert (progress.total, progress.done, progress.failed, progress.pending) == (3, 2, 1, 0)
+    status = runner.invoke(main.app, ["queue", "status", "--queue-dir", str(queue_dir)])
+    assert status.exit_code == 1
+    assert "w1" in status.stdout
+
+
+def test_queue_lease_takeover_never_clobbers_a_fresh_lease(tmp_path):
+    queue = workqueue.WorkQueue(tmp_path / "queue")
+    for n in range(300):
+        queue.submit(workqueue.QueueJob(library_id=f"/libs/{n}"))
+    stale = queue.claim("ghost", ttl=-1)
+    expired = json.loads((queue.leases_dir / f"{stale.job.id}.json").read_text())
+
+    # Two workers saw the same expired lease; the first one takes it over...
+    fresh = queue._take_over(stale.job.id, expired, "fast", ttl=60)
+    assert fresh is not None and queue.holds(fresh)
+    # ...and the slower one must neither replace it nor let the ghost renew it.
+    assert queue._take_over(stale.job.id, expired, "slow", ttl=60) is None
+    assert queue.heartbeat(stale, 60) is False
+    queue.release(stale)
+    assert queue.holds(fresh) and queue.heartbeat(fresh, 60)
+
+    # Finished jobs leave pending/, so draining the queue does not rescan them.
+    queue.complete(fresh)
+    started = time.perf_counter()
+    while (lease := queue.claim("w", ttl=60)) is not None:
+        queue.complete(lease)
+    assert time.perf_counter() - started < 5
+    assert not any(queue.pending_dir.iterdir()) and not any(queue.leases_dir.iterdir())
+    progress = queue.progress(by_worker=True)
+    assert (progress.total, progress.done, progress.finished) == (300, 300, True)
+    assert progress.by_worker == {"fast": 1, "w": 299}
+
+
+def test_rate_limit_slots_are_shared_across_processes(tmp_path):
+    # Reservations are spaced exactly one delay apart however the processes interleave.
+    script = "from c7fetch.c7 import ratelimit\nprint(ratelimit.reserve('default', 5.0))\n"
+    env = {**os.environ, "C7FETCH_CONFIG_DIR": str(tmp_path)}
+    procs = [
+        subprocess.Popen([sys.executable, "-c", script], env=env, stdout=subprocess.PIPE, text=True) for _ in range(3)
+    ]
+    starts = sorted(float(proc.communicate(timeout=30)[0]) for proc in procs)
+
+    assert all(proc.returncode == 0 for proc in procs)
+    gaps = [later - earlier for earlier, later in itertools.pairwise(starts)]
+    assert all(gap == pytest.approx(5.0, abs=1e-6) for gap in gaps)
+    assert (tmp_path / ratelimit.STATE_FILENAME).exists()
+
+
+@pytest.mark.parametrize("backend", ["array", "numpy"])
+def test_result_table_filters_sorts_and_aggregates(monkeypatch, backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(columns, "np", None)
+    now_ms = search_results.parse_timestamp_ms("2025-03-01T00:00:00Z")
+    table = columns.ResultTable.from_results(
+        search_results.trim_result(result)
+        for result in [
+            {"id": "/a/old", "title": "Old", "lastUpdateDate": "2024-01-01T00:00:00Z", "stars": 500, "trustScore": 9},
+            {"id": "/a/new", "title": "New", "lastUpdateDate": "2025-02-27T00:00:00Z", "stars": 10, "trustScore": 7.5},
+            {"id": "/a/mid", "title": "Mid", "lastUpdateDate": "2025-02-01T00:00:00Z", "stars": -1},
+            {"id": "/b/top", "title": "Top", "lastUpdateDate": "2025-02-28T00:00:00Z", "stars": 900},
+            {"id": "/a/none", "title": "Undated", "stars": 40},
+        ]
+    )
+
+    filters = search_results.Filters(library="/a/*")
+    assert [table.ids[i] for i in table.select(filters, now_ms=now_ms, sort="stars")] == [
+        "/a/old",
+        "/a/none",
+        "/a/new",
+        "/a/mid",
+    ]
+    recent = table.select(filters, now_ms=now_ms, max_age=60, sort="updated")
+    assert [table.ids[i] for i in recent] == ["/a/new", "/a/mid"]
+    assert [table.ids[i] for i in table.select(now_ms=now_ms, sort="trust", limit=2)] == ["/a/old", "/a/new"]
+    assert table.percentiles("stars", (50, 100), table.matching(filters)) == [40.0, 500.0]
+    assert table.age_days(1, now_ms) == 2 and table.age_days(4, now_ms) is None
+    assert table.ids[0] is table.take([0]).ids[0]
+
+
+def test_lookup_ranks_fuzzy_matches_and_indexes_incrementally(tmp_path, monkeypatch, config_setup):
+    runner = CliRunner()
+    search_dir = common.config_path("search_dir")
+    common.write_json(
+        search_dir / "react.json",
+        {
+            "results": [
+                {"id": "/vercel/next.js", "title": "Next.js", "description": "The React framework", "stars": 120},
+                {"id": "/facebook/react", "title": "React", "description": "UI library", "stars": 200},
+            ]
+        },
+    )
+    common.write_json(
+        search_dir / "py.json",
+        {"results": [{"id": "/tiangolo/fastapi", "title": "FastAPI", "description": "Python web framework"}]},
+    )
+
+    result = runner.invoke(main.app, ["lookup", "--json", "nextjs"])
+    assert result.exit_code == 0, result.stdout
+    matches = [json.loads(line) for line in result.stdout.splitlines()]
+    assert matches[0]["library_id"] == "/vercel/next.js"
+    assert all(match["score"] <= 1 for match in matches)
+
+    result = runner.invoke(main.app, ["find", "--json", "--limit", "1", "fastapy"])
+    assert [json.loads(line)["library_id"] for line in result.stdout.splitlines()] == ["/tiangolo/fastapi"]
+
+    common.write_json(search_dir / "vue.json", {"results": [{"id": "/vuejs/core", "title": "Vue"}]})
+    parsed_paths = []
+    original_parse = search_results.parse_file
+
+    def counting_parse(path, *args, **kwargs):
+        parsed_paths.append(path.name)
+        return original_parse(path, *args, **kwargs)
+
+    monkeypatch.setattr(search_results, "parse_file", counting_parse)
+    result = runner.invoke(main.app, ["lookup", "vue", "core"])
+    assert result.exit_code == 0, result.stdout
+    assert parsed_paths == ["vue.json"]
+    assert "Indexed 1 changed search file(s)." in result.stdout
+    assert "/vuejs/core" in result.stdout
+
+    (search_dir / "vue.json").unlink()
+    with trigram.open_index() as index:
+        assert index.refresh(search_results.list_directory(search_dir)) == 1
+        assert index.lookup("vue core") == []
+
+
+def test_lookup_indexes_each_library_once_from_its_newest_file(tmp_path, config_setup):
+    search_dir = common.config_path("search_dir")
+    for n, title in enumerate(("Tokio Old", "Tokio New")):
+        path = search_dir / f"{n}.json"
+        common.write_json(path, {"results": [{"id": "/tokio-rs/tokio", "title": title}]})
+        os.utime(path, ns=(n * 10**9, n * 10**9))
+    # Only shares description trigrams with the query, so it is never a candidate.
+    common.write_json(search_dir / "2.json", {"results": [{"id": "/misc/x", "title": "X", "description": "tokio"}]})
+
+    with trigram.open_index() as index:
+        index.refresh(search_results.list_directory(search_dir))
+        assert [(m.library_id, m.title) for m in index.lookup("tokio")] == [("/tokio-rs/tokio", "Tokio New")]
+        (search_dir / "1.json").unlink()
+        index.refresh(search_results.list_directory(search_dir))
+        assert [m.title for m in index.lookup("tokio")] == ["Tokio Old"]
+        assert index._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0] == 2